@@ -16,7 +16,7 @@ from pathlib import Path
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from metrics.code_reviewer import CodeReviewer, display_debrief  # noqa: E402
+from metrics.code_reviewer import display_debrief, get_code_reviewer  # noqa: E402
 
 
 def demo_simple_code():
@@ -33,7 +33,7 @@ def demo_simple_code():
     print(code)
     print()
 
-    reviewer = CodeReviewer()
+    reviewer = get_code_reviewer()
 
     if not reviewer.llm_manager.is_any_available():
         print("⚠️  No LLM providers available!")
@@ -80,7 +80,7 @@ def process_data(data):
     print(code)
     print()
 
-    reviewer = CodeReviewer()
+    reviewer = get_code_reviewer()
 
     print("🔍 Reviewing code...\n")
     result = reviewer.review_code(code, context="Data processing function that handles JSON input")
@@ -5,16 +5,545 @@ Generates code with pattern awareness based on context and pattern library.
 Uses real LLM (Anthropic Claude) for intelligent code generation.
 """
 
-import ast
+import asyncio
+import io
 import logging
-from dataclasses import dataclass
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+import os
+import re
+import sys
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import InitVar, dataclass
+from functools import lru_cache, partial
+from operator import itemgetter
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+import numpy as np
 
 from metrics.llm_providers import get_llm_manager
 
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; scoring falls back to NumPy
+    njit = None
+
 logger = logging.getLogger(__name__)
 
+_by_confidence = itemgetter("confidence")
+
+# Prompt substrings that signal each context indicator, in scoring-column order
+_INDICATOR_TERMS = {
+    "numpy": ("numpy", "np.", "array"),
+    "json": ("json", "api", "serialize"),
+    "list_access": ("list", "array", "first"),
+    "exception": ("exception", "error", "try"),
+    "logging": ("log", "debug", "print"),
+    "file": ("file", "temp", "upload"),
+    "large_file": ("large", "audio", "upload"),
+    "categorization": ("categorize", "classify"),
+    "fastapi": ("fastapi", "endpoint", "api"),
+}
+_INDICATOR_KEYS = tuple(_INDICATOR_TERMS)
+
+
+def _build_indicator_scanner():
+    """Compile one case-insensitive regex that finds every indicator term.
+
+    The lookahead reports a match at every position, so overlapping terms such as
+    "api" inside "fastapi" are still seen. Only the longest alternative matches at a
+    given position, so each term also implies any shorter term it starts with.
+
+    Returns:
+        Tuple of (compiled regex, mapping of lowercase matched term to the terms it
+        implies, mapping of term to indicator names)
+    """
+    term_indicators: Dict[str, set] = {}
+    for indicator, terms in _INDICATOR_TERMS.items():
+        for term in terms:
+            term_indicators.setdefault(term, set()).add(indicator)
+
+    terms = sorted(term_indicators, key=len, reverse=True)
+    implied = {
+        term: frozenset(prefix for prefix in terms if term.startswith(prefix)) for term in terms
+    }
+    # ASCII-only case folding: with Unicode folding "ſ" matches "s" and "İ" matches
+    # "i", yielding hits that are not indicator terms
+    pattern = re.compile(
+        "(?=(" + "|".join(map(re.escape, terms)) + "))", re.IGNORECASE | re.ASCII
+    )
+    return pattern, implied, {term: frozenset(names) for term, names in term_indicators.items()}
+
+
+_SCAN_RE, _IMPLIED_TERMS, _TERM_INDICATORS = _build_indicator_scanner()
+
+
+@lru_cache(maxsize=256)
+def _scan_prompt_terms(prompt: str) -> FrozenSet[str]:
+    """Return the indicator terms present in a prompt, case-insensitively.
+
+    Cached so the indicator analysis and the template dispatch in generate() share
+    one scan, without copying an ASCII prompt with lower().
+
+    Args:
+        prompt: User prompt
+
+    Returns:
+        Lowercase indicator terms found in the prompt
+    """
+    if not prompt.isascii():
+        # lower() can map non-ASCII letters onto ASCII ones (the Kelvin sign to "k"),
+        # which ASCII case folding alone would miss
+        prompt = prompt.lower()
+    found: set = set()
+    for match in _SCAN_RE.finditer(prompt):
+        found |= _IMPLIED_TERMS[match.group(1).lower()]
+        if len(found) == len(_IMPLIED_TERMS):
+            # Every term has been seen; the rest of the prompt cannot add any
+            break
+    return frozenset(found)
+
+
+@lru_cache(maxsize=256)
+def _indicators_for_terms(terms: FrozenSet[str]) -> FrozenSet[str]:
+    """Return the context indicators signalled by a set of prompt terms.
+
+    Args:
+        terms: Indicator terms from _scan_prompt_terms
+
+    Returns:
+        Names of the context indicators the terms signal
+    """
+    return frozenset().union(*(_TERM_INDICATORS[term] for term in terms))
+
+
+# Default pattern matching rules - can be overridden via config
+_DEFAULT_PATTERN_RULES = {
+    "numpy_json_serialization": ["numpy", "json"],
+    "bounds_checking": ["list_access"],
+    "specific_exceptions": ["exception"],
+    "logger_debug": ["logging"],
+    "metadata_categorization": ["categorization"],
+    "temp_file_handling": ["file"],
+    "large_file_processing": ["large_file", "file"],
+}
+
+
+# Bit assigned to each indicator in the context and rule bitmasks
+_INDICATOR_BITS = {key: 1 << i for i, key in enumerate(_INDICATOR_KEYS)}
+
+
+@lru_cache(maxsize=512)
+def _context_mask(context_indicators: FrozenSet[str]) -> np.uint64:
+    """Pack a set of detected indicators into a uint64 bitmask.
+
+    Args:
+        context_indicators: Detected indicator names
+
+    Returns:
+        Bitmask with the bit of each known indicator set
+    """
+    return np.uint64(sum(_INDICATOR_BITS.get(key, 0) for key in context_indicators))
+
+
+# Set-bit count of every byte value, for NumPy builds without bitwise_count
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _popcount(masks):
+    """Count the set bits of each element of a uint64 array.
+
+    Args:
+        masks: uint64 array
+
+    Returns:
+        Array of bit counts, one per element
+    """
+    if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+        return np.bitwise_count(masks)
+    return _POPCOUNT8[masks.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+
+
+def _score_patterns_loop(rule_masks, rule_counts, context_mask, critical_mask, highfreq_mask):
+    """Score every pattern against a prompt's indicator bitmask.
+
+    Written as a plain loop over arrays so Numba can compile it to machine code. The
+    overall confidence (mean of the top three positive scores) is tracked in the
+    same pass.
+
+    Args:
+        rule_masks: uint64 bitmask of the indicators each pattern's rules use
+        rule_counts: Number of rules per pattern
+        context_mask: uint64 bitmask of the indicators detected in the prompt
+        critical_mask: True for patterns flagged critical in the metrics context
+        highfreq_mask: True for patterns flagged high-frequency in the metrics context
+
+    Returns:
+        Tuple of (array of match scores in [0, 1], one per pattern; overall
+        confidence, 0.5 when nothing matched)
+    """
+    n = rule_masks.shape[0]
+    out = np.empty(n, np.float64)
+    top1 = top2 = top3 = 0.0
+    matched = 0
+    for i in range(n):
+        score = 0.0
+        if rule_counts[i] > 0:
+            bits = rule_masks[i] & context_mask
+            hits = 0
+            while bits:
+                bits &= bits - np.uint64(1)
+                hits += 1
+            score = hits / rule_counts[i]
+        if critical_mask[i]:
+            score = min(1.0, score + 0.3)
+        elif highfreq_mask[i]:
+            score = min(1.0, score + 0.2)
+        out[i] = score
+
+        if score > 0.0:
+            matched += 1
+            if score > top1:
+                top1, top2, top3 = score, top1, top2
+            elif score > top2:
+                top2, top3 = score, top2
+            elif score > top3:
+                top3 = score
+
+    if matched == 0:
+        return out, 0.5
+    return out, (top1 + top2 + top3) / min(matched, 3)
+
+
+def _score_patterns_numpy(rule_masks, rule_counts, context_mask, critical_mask, highfreq_mask):
+    """NumPy equivalent of _score_patterns_loop, used when Numba is not installed."""
+    hits = _popcount(rule_masks & context_mask).astype(np.float64)
+    scores = np.divide(hits, rule_counts, out=np.zeros_like(hits), where=rule_counts > 0)
+    # Critical boost takes precedence over the high-frequency boost
+    scores = np.clip(
+        scores + 0.3 * critical_mask + 0.2 * (highfreq_mask & ~critical_mask), 0.0, 1.0
+    )
+
+    positive = scores[scores > 0.0]
+    if positive.size == 0:
+        return scores, 0.5
+    top = np.sort(positive)[::-1][:3].tolist()
+    return scores, sum(top) / len(top)
+
+
+if njit is not None:
+    # No reassociation or reciprocal flags, so results match the NumPy fallback bit for bit
+    _FASTMATH_FLAGS = {"nnan", "ninf", "nsz"}
+    _score_patterns = njit(cache=True, fastmath=_FASTMATH_FLAGS, nogil=True)(_score_patterns_loop)
+else:
+    _score_patterns = _score_patterns_numpy
+
+
+# Fixed instructions that lead every enriched LLM prompt
+_LLM_SYSTEM_PROMPT = (
+    "Generate production-ready Python code that:\n"
+    "1. Implements the requested functionality\n"
+    "2. Applies all required patterns\n"
+    "3. Includes proper error handling\n"
+    "4. Has clear comments explaining pattern usage\n"
+    "5. Is syntactically correct and ready to run\n"
+)
+_REQUIRED_PATTERNS_HEADER = (
+    "## Required Patterns\nApply the following validated patterns to your code:\n\n"
+)
+
+# Opening fence of the code block _extract_code_from_response prefers
+_PYTHON_FENCE = "```python"
+
+# Leading prompt segments (required patterns) marked for provider caching
+_CACHEABLE_SEGMENTS = 1
+
+# Enriched prompts kept per generator for repeated or retried generations
+_PROMPT_CACHE_SIZE = 128
+
+
+def _format_pattern_module(name: str, pattern: Dict[str, Any]) -> str:
+    """Format one pattern as a required-pattern section of the LLM prompt.
+
+    Args:
+        name: Pattern name
+        pattern: Pattern dict from the library
+
+    Returns:
+        Prompt text for the pattern
+    """
+    good_example = pattern.get("good_example", "")
+    effectiveness = pattern.get("effectiveness_score", 0.5)
+
+    module = (
+        f"### Pattern: {name}\n"
+        f"**Effectiveness:** {effectiveness:.1%}\n"
+        f"**Description:** {pattern.get('description', '')}\n"
+    )
+    if good_example:
+        module += f"**Example:**\n```python\n{good_example}\n```\n"
+    return module + "\n"
+
+
+# Import statements each applied pattern's template code relies on
+_PATTERN_IMPORTS = {
+    "numpy_json_serialization": ("import json", "import numpy as np"),
+    "bounds_checking": ("import logging",),
+    "specific_exceptions": ("import json", "import logging"),
+    "logger_debug": ("import logging",),
+    "temp_file_handling": ("import os", "import tempfile", "import logging"),
+    "large_file_processing": ("import os", "import logging"),
+}
+
+
+@lru_cache(maxsize=128)
+def _imports_for(pattern_names: FrozenSet[str]) -> Tuple[str, ...]:
+    """Return the sorted, de-duplicated imports for a set of applied patterns.
+
+    Args:
+        pattern_names: Names of the applied patterns
+
+    Returns:
+        Tuple of import statement strings
+    """
+    imports = set()
+    for name in pattern_names:
+        imports.update(_PATTERN_IMPORTS.get(name, ()))
+    return tuple(sorted(imports))
+
+
+# Fixed template-mode function bodies; shared read-only by every generate() call
+_TMPL_NUMPY_JSON = (
+    "def process_numpy_data(data_array):",
+    '    """Process NumPy array and return JSON-serializable result."""',
+    "    # PATTERN: numpy_json_serialization - Convert before JSON serialization",
+    "    result = {",
+    '        "mean": float(np.mean(data_array)),',
+    '        "std": float(np.std(data_array)),',
+    '        "max": float(np.max(data_array))',
+    "    }",
+    "    return json.dumps(result)",
+)
+
+_TMPL_LIST_ACCESS = (
+    "def get_first_item(items):",
+    '    """Get first item with bounds checking."""',
+    "    # PATTERN: bounds_checking - Validate before accessing",
+    "    if not items:",
+    '        logger.debug("List is empty, returning None")',
+    "        return None",
+    "    return items[0]",
+)
+
+_TMPL_FILE_PROCESSING = (
+    "def process_file(file_path, max_size_bytes=800 * 1024 * 1024):",
+    '    """Process file with size validation."""',
+    "    # PATTERN: large_file_processing - Check size before loading",
+    "    try:",
+    "        file_size = os.path.getsize(file_path)",
+    "        ",
+    "        if file_size > max_size_bytes:",
+    '            logger.debug(f"File too large: {file_size} > {max_size_bytes}")',
+    "            return None",
+    "        ",
+    "        return {",
+    '            "file_path": file_path,',
+    '            "size_bytes": int(file_size)',
+    "        }",
+    "    except (FileNotFoundError, IOError, OSError) as e:",
+    '        logger.debug(f"Error processing file: {e}")',
+    "        return None",
+)
+
+# Prompt terms that select each template-mode function body, checked in order
+_TEMPLATE_TRIGGERS: Tuple[Tuple[str, FrozenSet[str]], ...] = (
+    ("numpy_json", frozenset({"numpy", "json"})),
+    ("list_access", frozenset({"list"})),
+    ("list_access", frozenset({"first"})),
+    ("file_processing", frozenset({"file"})),
+)
+
+
+@lru_cache(maxsize=256)
+def _template_key(terms: FrozenSet[str]) -> Optional[str]:
+    """Return the template-mode function to use for a prompt's matched terms.
+
+    Args:
+        terms: Indicator terms found in the prompt (see _scan_prompt_terms)
+
+    Returns:
+        Key into PatternAwareGenerator._template_fns, or None for the generic body
+    """
+    for key, required in _TEMPLATE_TRIGGERS:
+        if required <= terms:
+            return key
+    return None
+
+
+_llm_providers_logged = False
+
+
+def _log_llm_providers_once(llm_manager: Any) -> None:
+    """Log the available LLM providers the first time a generator uses them.
+
+    Args:
+        llm_manager: Shared manager returned by get_llm_manager()
+    """
+    global _llm_providers_logged
+    if _llm_providers_logged:
+        return
+    _llm_providers_logged = True
+    providers = llm_manager.list_available_providers()
+    logger.info("LLM manager initialized with providers: %s", providers)
+
+
+class _SemanticCache:
+    """In-memory cache of LLM-generated code keyed by prompt similarity.
+
+    Prompts are embedded locally as hashed bag-of-words vectors (unigrams and
+    bigrams), so paraphrases that share most of their wording land close together
+    without calling an embedding model. Entries are partitioned by an exact key
+    (the applied pattern names), and a lookup hits when the cosine similarity to a
+    stored prompt reaches the threshold.
+    """
+
+    def __init__(self, threshold: float, dim: int = 512, max_entries: int = 256):
+        """Initialize the cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a hit, in (0, 1]
+            dim: Embedding dimension
+            max_entries: Maximum prompts kept per key; the oldest are evicted first
+        """
+        self.threshold = threshold
+        self.dim = dim
+        self.max_entries = max_entries
+        self._entries: Dict[Any, Tuple[np.ndarray, List[str]]] = {}
+        self._lock = threading.Lock()
+
+    def embed(self, text: str) -> np.ndarray:
+        """Embed text as a normalized hashed bag of unigrams and bigrams.
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            float32 unit vector (all zeros for text without words)
+        """
+        words = re.findall(r"\w+", text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for feature in features:
+            # crc32 rather than hash() so embeddings are stable across processes
+            vec[zlib.crc32(feature.encode()) % self.dim] += 1.0
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def lookup(self, key: Any, embedding: np.ndarray) -> Optional[str]:
+        """Return the cached value most similar to embedding, if similar enough.
+
+        Args:
+            key: Exact-match partition key
+            embedding: Query embedding from embed()
+
+        Returns:
+            Cached value, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            matrix, values = entry
+            similarities = matrix @ embedding
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                return values[best]
+            return None
+
+    def store(self, key: Any, embedding: np.ndarray, value: str) -> None:
+        """Add a value to the cache.
+
+        Args:
+            key: Exact-match partition key
+            embedding: Prompt embedding from embed()
+            value: Value to cache
+        """
+        with self._lock:
+            matrix, values = self._entries.get(key, (np.empty((0, self.dim), np.float32), []))
+            start = max(0, len(values) + 1 - self.max_entries)
+            self._entries[key] = (
+                np.vstack([matrix[start:], embedding]),
+                values[start:] + [value],
+            )
+
+
+# Substrings _check_code warns about, found in one pass
+_VALIDATION_RE = re.compile(r"print\(|except:|except Exception:|TODO|FIXME")
+
+
+@lru_cache(maxsize=256)
+def _check_code(code: str) -> Tuple[bool, Optional[str], Tuple[str, ...]]:
+    """Parse and lint generated code.
+
+    Cached because template output and semantic-cache hits repeat the same code;
+    callers get a fresh ValidationResult built from the returned tuple.
+
+    Args:
+        code: Generated code to validate
+
+    Returns:
+        Tuple of (syntax_valid, compilation_error, warnings)
+    """
+    import ast
+
+    try:
+        ast.parse(code)
+    except SyntaxError as e:
+        return False, f"Syntax error at line {e.lineno}: {e.msg}", ()
+
+    found = set(_VALIDATION_RE.findall(code))
+    warnings = []
+
+    # Check for common issues
+    if "print(" in found:
+        warnings.append("Code contains print() statements - consider using logger.debug()")
+
+    if "except:" in found and "except Exception:" not in found:
+        warnings.append("Code contains bare except: - use specific exceptions")
+
+    # Check for TODO comments
+    if "TODO" in found or "FIXME" in found:
+        warnings.append("Code contains TODO/FIXME comments")
+
+    return True, None, tuple(warnings)
+
+
+# Thread pool shared by all generators for batch and async generation
+_generation_executor: Optional[ThreadPoolExecutor] = None
+_generation_executor_lock = threading.Lock()
+
+
+def _get_generation_executor() -> ThreadPoolExecutor:
+    """Get or lazily create the shared generation thread pool.
+
+    Threads rather than processes: per-prompt scoring takes microseconds and
+    releases the GIL in the compiled kernel, so pickling the pattern arrays to a
+    worker process would cost more than it saves, and the LLM clients cannot be
+    shared across processes.
+
+    Returns:
+        Shared ThreadPoolExecutor
+    """
+    global _generation_executor
+    with _generation_executor_lock:
+        if _generation_executor is None:
+            _generation_executor = ThreadPoolExecutor(
+                max_workers=min(32, (os.cpu_count() or 1) + 4),
+                thread_name_prefix="pattern-generate",
+            )
+        return _generation_executor
+
 
 @dataclass
 class ValidationResult:
@@ -28,20 +557,71 @@ class ValidationResult:
 
 @dataclass
 class GenerationResult:
-    """Result of code generation."""
+    """Result of code generation.
+
+    ``metadata`` and ``report`` may be given directly, or left as None and built by
+    ``metadata_factory`` / ``report_factory`` the first time they are read, so
+    callers that just need ``code`` never pay for building them.
+    """
 
     code: str
     patterns_applied: List[Dict[str, Any]]
     patterns_suggested: List[Dict[str, Any]]
-    metadata: Dict[str, Any]
-    report: str
-    confidence: float
+    metadata: Optional[Dict[str, Any]] = None
+    report: Optional[str] = None
+    confidence: float = 0.0
     validation: Optional[ValidationResult] = None
+    metadata_factory: InitVar[Optional[Callable[[], Dict[str, Any]]]] = None
+    report_factory: InitVar[Optional[Callable[[], str]]] = None
+
+    def __post_init__(
+        self,
+        metadata_factory: Optional[Callable[[], Dict[str, Any]]],
+        report_factory: Optional[Callable[[], str]],
+    ) -> None:
+        # Kept off the dataclass fields, so asdict(), repr() and == ignore them
+        self._factories = {"metadata": metadata_factory, "report": report_factory}
+
+
+def _lazy_result_field(name: str, empty: Callable[[], Any]) -> property:
+    """Return a property that builds a GenerationResult field from its factory on first read.
+
+    Args:
+        name: Field name; the factory is the ``<name>_factory`` init argument
+        empty: Called for the value when there is no factory either
+
+    Returns:
+        Property storing the value in the instance under ``_<name>``
+    """
+    private = f"_{name}"
+
+    def read(self: GenerationResult) -> Any:
+        value = self.__dict__.get(private)
+        if value is None:
+            factory = self._factories[name]
+            value = self.__dict__[private] = factory() if factory is not None else empty()
+        return value
+
+    def assign(self: GenerationResult, value: Any) -> None:
+        self.__dict__[private] = value
+
+    return property(read, assign, doc=f"Generation {name}, built on first access.")
+
+
+# Installed after @dataclass, which has already captured the None defaults
+GenerationResult.metadata = _lazy_result_field("metadata", dict)  # type: ignore[assignment]
+GenerationResult.report = _lazy_result_field("report", str)  # type: ignore[assignment]
 
 
 class PatternAwareGenerator:
     """Generates code with pattern awareness using real LLM."""
 
+    # critical/high/medium are applied (medium with notice); low is suggest-only
+    _APPLY_SEVERITIES = frozenset({"critical", "high", "medium"})
+
+    # Patterns whose templates emit logger calls
+    _LOGGING_PATTERNS = frozenset({"logger_debug", "bounds_checking", "specific_exceptions"})
+
     def __init__(
         self,
         pattern_library: List[Dict[str, Any]],
@@ -49,6 +629,8 @@ class PatternAwareGenerator:
         use_llm: bool = True,
         api_key: Optional[str] = None,
         llm_provider: Optional[str] = None,
+        semantic_cache_threshold: Optional[float] = None,
+        scoring_cache_dir: Optional[str] = None,
     ):
         """Initialize the pattern-aware code generator.
 
@@ -58,11 +640,22 @@ class PatternAwareGenerator:
             use_llm: Whether to use LLM for generation (default: True)
             api_key: API key (deprecated - use environment variables)
             llm_provider: Preferred LLM provider ("claude", "openai", "gemini")
+            semantic_cache_threshold: If set, reuse LLM-generated code for prompts
+                whose similarity to an earlier prompt with the same applied patterns
+                is at least this value (e.g. 0.93). Disabled by default.
+            scoring_cache_dir: If set, directory where the precomputed rule arrays are
+                saved and reloaded across processes (e.g. ~/.cache/feedback-loop).
+                Entries are keyed by library version, pattern names and rules.
         """
         self.pattern_library = pattern_library
         self.pattern_library_version = pattern_library_version
         self.use_llm = use_llm
         self.llm_manager = None
+        self._semantic_cache = (
+            _SemanticCache(semantic_cache_threshold)
+            if semantic_cache_threshold is not None
+            else None
+        )
 
         # Initialize LLM manager if using LLM
         if self.use_llm:
@@ -72,8 +665,7 @@ class PatternAwareGenerator:
                     self.llm_manager.preferred_provider = llm_provider
 
                 if self.llm_manager.is_any_available():
-                    providers = self.llm_manager.list_available_providers()
-                    logger.info(f"LLM manager initialized with providers: {providers}")
+                    _log_llm_providers_once(self.llm_manager)
                 else:
                     logger.warning("No LLM providers available, falling back to template mode")
                     self.use_llm = False
@@ -83,6 +675,179 @@ class PatternAwareGenerator:
                 )
                 self.use_llm = False
 
+        self._build_scoring_index(scoring_cache_dir)
+
+        # Pattern library entries do not change after init, so their prompt text is fixed
+        self._pattern_prompt_modules = {
+            name: _format_pattern_module(name, pattern)
+            for name, pattern in zip(self._pattern_names, self.pattern_library)
+        }
+        self._prompt_cache: Dict[Tuple[Any, ...], Tuple[str, ...]] = {}
+        self._prompt_cache_lock = threading.Lock()
+        self._template_fns: Dict[str, Callable[[], Tuple[str, ...]]] = {
+            "numpy_json": self._generate_numpy_json_function,
+            "list_access": self._generate_list_access_function,
+            "file_processing": self._generate_file_processing_function,
+        }
+
+    def _build_scoring_index(self, cache_dir: Optional[str] = None) -> None:
+        """Precompute the array form of the pattern rules used by _match_patterns.
+
+        Args:
+            cache_dir: Optional directory to load the rule arrays from, or save them to
+        """
+        # Pattern matching rules - can be overridden via config
+        from metrics.config_manager import ConfigManager
+
+        config = ConfigManager()
+        pattern_rules = config.get("pattern_matching.rules", _DEFAULT_PATTERN_RULES)
+
+        # Interned so name comparisons downstream are pointer-equal
+        self._pattern_names = [
+            sys.intern(pattern.get("name", "")) for pattern in self.pattern_library
+        ]
+        # Parallel per-pattern columns so matching never touches the pattern dicts
+        self._pattern_descriptions = [
+            pattern.get("description", "") for pattern in self.pattern_library
+        ]
+        self._pattern_severities = [
+            pattern.get("severity", "medium") for pattern in self.pattern_library
+        ]
+
+        cache_path = None
+        arrays = None
+        if cache_dir:
+            cache_path = self._scoring_cache_path(cache_dir, pattern_rules)
+            arrays = self._load_rule_arrays(cache_path)
+        if arrays is None:
+            arrays = self._compute_rule_arrays(pattern_rules)
+            if cache_path is not None:
+                self._save_rule_arrays(cache_path, arrays)
+        self._rule_masks, self._rule_counts = arrays
+
+        # Shared all-False mask for the common case of no metrics boosts
+        self._empty_pattern_mask = np.zeros(len(self._pattern_names), dtype=np.bool_)
+
+    def _compute_rule_arrays(
+        self, pattern_rules: Dict[str, List[str]]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Build the per-pattern indicator bitmasks and rule counts.
+
+        Args:
+            pattern_rules: Pattern name -> context indicators it matches on
+
+        Returns:
+            Tuple of (rule_masks, rule_counts) arrays aligned with _pattern_names
+        """
+        rule_masks = np.zeros(len(self._pattern_names), dtype=np.uint64)
+        rule_counts = np.zeros(len(self._pattern_names), dtype=np.float64)
+        for i, name in enumerate(self._pattern_names):
+            rules = pattern_rules.get(name, [])
+            rule_counts[i] = len(rules)
+            mask = 0
+            for rule in rules:
+                mask |= _INDICATOR_BITS.get(rule, 0)
+            rule_masks[i] = mask
+        return rule_masks, rule_counts
+
+    def _scoring_cache_path(self, cache_dir: str, pattern_rules: Dict[str, List[str]]) -> str:
+        """Return the on-disk location of the rule arrays for this library.
+
+        Args:
+            cache_dir: Directory holding cached rule arrays
+            pattern_rules: Pattern name -> context indicators it matches on
+
+        Returns:
+            Path of the .npz file for this version, pattern set and rule config
+        """
+        import hashlib
+
+        key = repr(
+            (
+                _INDICATOR_KEYS,
+                [(name, tuple(pattern_rules.get(name, ()))) for name in self._pattern_names],
+            )
+        )
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+        filename = f"patterns-{self.pattern_library_version}-{digest}.npz"
+        return os.path.join(os.path.expanduser(cache_dir), filename)
+
+    def _load_rule_arrays(self, path: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Load cached rule arrays, or None if missing or unusable.
+
+        Args:
+            path: Cache file from _scoring_cache_path
+
+        Returns:
+            Tuple of (rule_masks, rule_counts), or None
+        """
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                rule_masks = data["rule_masks"]
+                rule_counts = data["rule_counts"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.debug("Ignoring unreadable scoring cache %s: %s", path, e)
+            return None
+
+        expected = (len(self._pattern_names),)
+        if (
+            rule_masks.dtype != np.uint64
+            or rule_counts.dtype != np.float64
+            or rule_masks.shape != expected
+            or rule_counts.shape != expected
+        ):
+            logger.debug("Ignoring scoring cache %s with mismatched arrays", path)
+            return None
+        return rule_masks, rule_counts
+
+    def _save_rule_arrays(self, path: str, arrays: Tuple[np.ndarray, np.ndarray]) -> None:
+        """Atomically write rule arrays to the scoring cache.
+
+        Args:
+            path: Cache file from _scoring_cache_path
+            arrays: Tuple of (rule_masks, rule_counts)
+        """
+        import tempfile
+
+        rule_masks, rule_counts = arrays
+        cache_dir = os.path.dirname(path)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Write to a temp file in the same directory, then rename over the target
+            temp_fd, temp_path = tempfile.mkstemp(suffix=".npz", dir=cache_dir, prefix="patterns_")
+            try:
+                with os.fdopen(temp_fd, "wb") as f:
+                    np.savez(f, rule_masks=rule_masks, rule_counts=rule_counts)
+                os.replace(temp_path, path)
+            except Exception:
+                try:
+                    os.unlink(temp_path)
+                except OSError:
+                    pass
+                raise
+        except OSError as e:
+            logger.debug("Could not write scoring cache %s: %s", path, e)
+
+    def _pattern_mask(self, names: Optional[List[str]]) -> np.ndarray:
+        """Build a boolean mask over the pattern library for the given names.
+
+        Args:
+            names: Pattern names to flag (None or empty flags none)
+
+        Returns:
+            Boolean array, True for library patterns whose name is in names
+        """
+        if not names:
+            return self._empty_pattern_mask
+        wanted = frozenset(names)
+        return np.fromiter(
+            (name in wanted for name in self._pattern_names),
+            dtype=np.bool_,
+            count=len(self._pattern_names),
+        )
+
     def generate(
         self,
         prompt: str,
@@ -106,22 +871,22 @@ class PatternAwareGenerator:
         # Analyze prompt for context indicators
         context_indicators = self._analyze_prompt(prompt)
 
-        # Match patterns based on context
-        matched_patterns = self._match_patterns(context_indicators, metrics_context)
+        # Match patterns based on context; also yields the overall confidence
+        matched_patterns, confidence = self._score_matches(context_indicators, metrics_context)
 
         # Apply patterns by severity
-        patterns_to_apply, patterns_to_suggest = self._prioritize_patterns(
+        patterns_to_apply, patterns_to_suggest, applied_names = self._prioritize_patterns(
             matched_patterns, apply_patterns, min_confidence
         )
 
         # Generate code with pattern annotations
         if self.use_llm and self.llm_manager:
             code = self._generate_code_with_llm(
-                prompt, patterns_to_apply, patterns_to_suggest, metrics_context
+                prompt, patterns_to_apply, patterns_to_suggest, applied_names, metrics_context
             )
         else:
             code = self._generate_code_with_templates(
-                prompt, patterns_to_apply, patterns_to_suggest
+                prompt, patterns_to_apply, patterns_to_suggest, applied_names
             )
 
         # Validate code if requested
@@ -129,152 +894,217 @@ class PatternAwareGenerator:
         if validate:
             validation_result = self._validate_code(code)
 
-        # Calculate overall confidence
-        confidence = self._calculate_confidence(matched_patterns)
-
         # Adjust confidence based on validation
         if validation_result and not validation_result.is_valid:
             confidence = confidence * 0.5  # Reduce confidence for invalid code
 
-        # Generate metadata
-        metadata = {
-            "prompt": prompt,
-            "pattern_library_version": self.pattern_library_version,
-            "timestamp": datetime.now().isoformat(),
-            "confidence": float(confidence),
-            "context_indicators": context_indicators,
-            "use_llm": self.use_llm,
-        }
-
-        # Generate report
-        report = self._generate_report(
-            patterns_to_apply,
-            patterns_to_suggest,
-            context_indicators,
-            confidence,
-            validation_result,
-        )
-
-        logger.debug(f"Generated code with {len(patterns_to_apply)} patterns applied")
+        logger.debug("Generated code with %d patterns applied", len(patterns_to_apply))
 
+        # Metadata and report are only built if the caller reads them
         return GenerationResult(
             code=code,
             patterns_applied=patterns_to_apply,
             patterns_suggested=patterns_to_suggest,
-            metadata=metadata,
-            report=report,
             confidence=confidence,
             validation=validation_result,
+            metadata_factory=partial(
+                self._build_metadata,
+                prompt,
+                context_indicators,
+                confidence,
+                time.time_ns(),
+            ),
+            report_factory=partial(
+                self._generate_report,
+                patterns_to_apply,
+                patterns_to_suggest,
+                context_indicators,
+                confidence,
+                validation_result,
+            ),
         )
 
-    def _analyze_prompt(self, prompt: str) -> Dict[str, bool]:
-        """Analyze prompt for context indicators.
+    def _build_metadata(
+        self,
+        prompt: str,
+        context_indicators: FrozenSet[str],
+        confidence: float,
+        generated_at_ns: int,
+    ) -> Dict[str, Any]:
+        """Build the metadata dict for a generation result.
 
         Args:
-            prompt: User prompt
+            prompt: Original prompt
+            context_indicators: Context detected from prompt
+            confidence: Overall confidence score
+            generated_at_ns: Time the code was generated, in ns since the epoch
 
         Returns:
-            Dictionary of context indicators
-        """
-        prompt_lower = prompt.lower()
-
-        indicators = {
-            "numpy": "numpy" in prompt_lower or "np." in prompt_lower or "array" in prompt_lower,
-            "json": "json" in prompt_lower or "api" in prompt_lower or "serialize" in prompt_lower,
-            "list_access": "list" in prompt_lower
-            or "array" in prompt_lower
-            or "first" in prompt_lower,
-            "exception": "exception" in prompt_lower
-            or "error" in prompt_lower
-            or "try" in prompt_lower,
-            "logging": "log" in prompt_lower or "debug" in prompt_lower or "print" in prompt_lower,
-            "file": "file" in prompt_lower or "temp" in prompt_lower or "upload" in prompt_lower,
-            "large_file": "large" in prompt_lower
-            or "audio" in prompt_lower
-            or "upload" in prompt_lower,
-            "categorization": "categorize" in prompt_lower or "classify" in prompt_lower,
-            "fastapi": "fastapi" in prompt_lower
-            or "endpoint" in prompt_lower
-            or "api" in prompt_lower,
+            Metadata dictionary
+        """
+        from datetime import datetime, timezone
+
+        return {
+            "prompt": prompt,
+            "pattern_library_version": self.pattern_library_version,
+            "timestamp": datetime.fromtimestamp(
+                generated_at_ns // 1_000_000_000, timezone.utc
+            ).isoformat(timespec="seconds"),
+            "confidence": confidence,
+            "context_indicators": {key: key in context_indicators for key in _INDICATOR_KEYS},
+            "use_llm": self.use_llm,
         }
 
-        return indicators
+    def generate_batch(
+        self,
+        prompts: List[str],
+        max_workers: Optional[int] = None,
+        **kwargs: Any,
+    ) -> List[GenerationResult]:
+        """Generate code for several prompts concurrently.
+
+        Generation is dominated by LLM I/O and the compiled scoring kernel releases
+        the GIL, so a thread pool is used; the generator's LLM clients are shared
+        rather than pickled into worker processes.
+
+        Args:
+            prompts: User prompts for code generation
+            max_workers: Maximum number of worker threads (default: use the shared
+                generation pool)
+            **kwargs: Keyword arguments passed through to generate()
+
+        Returns:
+            List of GenerationResult, in the same order as prompts
+        """
+        if not prompts:
+            return []
+
+        generate = partial(self.generate, **kwargs)
+        if max_workers is None:
+            return list(_get_generation_executor().map(generate, prompts))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(generate, prompts))
+
+    async def agenerate(self, prompt: str, **kwargs: Any) -> GenerationResult:
+        """Async variant of generate().
+
+        Generation runs on the shared generation thread pool so the event loop
+        stays free (e.g. when called from a FastAPI endpoint) and concurrent requests
+        overlap their prompt scoring with each other's LLM I/O.
+
+        Args:
+            prompt: User prompt for code generation
+            **kwargs: Keyword arguments passed through to generate()
+
+        Returns:
+            GenerationResult with code and metadata
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _get_generation_executor(), partial(self.generate, prompt, **kwargs)
+        )
+
+    async def agenerate_many(
+        self, prompts: List[str], max_concurrency: int = 8, **kwargs: Any
+    ) -> List[GenerationResult]:
+        """Generate code for several prompts with overlapping LLM calls.
+
+        Args:
+            prompts: User prompts for code generation
+            max_concurrency: Maximum number of generations in flight at once
+            **kwargs: Keyword arguments passed through to generate()
+
+        Returns:
+            List of GenerationResult, in the same order as prompts
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _bounded(prompt: str) -> GenerationResult:
+            async with semaphore:
+                return await self.agenerate(prompt, **kwargs)
+
+        return list(await asyncio.gather(*(_bounded(prompt) for prompt in prompts)))
+
+    def _analyze_prompt(self, prompt: str) -> FrozenSet[str]:
+        """Analyze prompt for context indicators.
+
+        Args:
+            prompt: User prompt
+
+        Returns:
+            Names of the context indicators detected in the prompt
+        """
+        return _indicators_for_terms(_scan_prompt_terms(prompt))
 
     def _match_patterns(
         self,
-        context_indicators: Dict[str, bool],
+        context_indicators: FrozenSet[str],
         metrics_context: Optional[Dict[str, Any]],
     ) -> List[Dict[str, Any]]:
         """Match patterns based on context.
 
         Args:
-            context_indicators: Context indicators from prompt analysis
+            context_indicators: Detected context indicators from prompt analysis
             metrics_context: Metrics context from analyzer
 
         Returns:
-            List of matched patterns with confidence scores
+            List of matched patterns with confidence scores. Each match carries the
+            pattern's name, description and severity at the top level alongside the
+            original pattern dict.
         """
-        matched = []
+        return self._score_matches(context_indicators, metrics_context)[0]
 
-        # Pattern matching rules - can be overridden via config
-        # Default rules are defined here, but can be customized via ConfigManager
-        from metrics.config_manager import ConfigManager
+    def _score_matches(
+        self,
+        context_indicators: FrozenSet[str],
+        metrics_context: Optional[Dict[str, Any]],
+    ) -> Tuple[List[Dict[str, Any]], float]:
+        """Match patterns and compute the overall confidence in one scoring pass.
 
-        config = ConfigManager()
-        pattern_rules = config.get(
-            "pattern_matching.rules",
-            {
-                "numpy_json_serialization": ["numpy", "json"],
-                "bounds_checking": ["list_access"],
-                "specific_exceptions": ["exception"],
-                "logger_debug": ["logging"],
-                "metadata_categorization": ["categorization"],
-                "temp_file_handling": ["file"],
-                "large_file_processing": ["large_file", "file"],
-            },
-        )
+        Args:
+            context_indicators: Detected context indicators from prompt analysis
+            metrics_context: Metrics context from analyzer
 
-        # Check each pattern
-        for pattern in self.pattern_library:
-            pattern_name = pattern.get("name", "")
-            rules = pattern_rules.get(pattern_name, [])
-
-            # Calculate match score
-            match_score = 0.0
-            if rules:
-                matches = sum(1 for rule in rules if context_indicators.get(rule, False))
-                match_score = matches / len(rules)
-
-            # Boost score if pattern appears in metrics context
-            if metrics_context:
-                high_freq = metrics_context.get("high_frequency_patterns", [])
-                critical = metrics_context.get("critical_patterns", [])
-
-                if pattern_name in critical:
-                    match_score = min(1.0, match_score + 0.3)
-                elif pattern_name in high_freq:
-                    match_score = min(1.0, match_score + 0.2)
-
-            if match_score > 0:
-                matched.append(
-                    {
-                        "pattern": pattern,
-                        "confidence": float(match_score),
-                        "severity": pattern.get("severity", "medium"),
-                    }
-                )
+        Returns:
+            Tuple of (matched patterns as returned by _match_patterns, overall
+            confidence as computed by _calculate_confidence)
+        """
+        # Boost score if pattern appears in metrics context
+        metrics_context = metrics_context or {}
+        critical_mask = self._pattern_mask(metrics_context.get("critical_patterns"))
+        highfreq_mask = self._pattern_mask(metrics_context.get("high_frequency_patterns"))
+
+        scores, confidence = _score_patterns(
+            self._rule_masks,
+            self._rule_counts,
+            _context_mask(context_indicators),
+            critical_mask,
+            highfreq_mask,
+        )
 
-        # Sort by confidence descending
-        matched.sort(key=lambda x: x["confidence"], reverse=True)
+        # Only matched rows are turned into dicts; flatnonzero keeps library order
+        score_list = scores.tolist()
+        matched = [
+            {
+                "name": self._pattern_names[i],
+                "description": self._pattern_descriptions[i],
+                "severity": self._pattern_severities[i],
+                "confidence": score_list[i],
+                "pattern": self.pattern_library[i],
+            }
+            for i in np.flatnonzero(scores > 0).tolist()
+        ]
 
-        return matched
+        # Left in library order; _prioritize_patterns sorts each partition
+        return matched, confidence
 
     def _prioritize_patterns(
         self,
         matched_patterns: List[Dict[str, Any]],
         apply_patterns: bool,
         min_confidence: float,
-    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], FrozenSet[str]]:
         """Prioritize patterns by severity and confidence.
 
         Args:
@@ -283,26 +1113,21 @@ class PatternAwareGenerator:
             min_confidence: Minimum confidence to apply
 
         Returns:
-            Tuple of (patterns_to_apply, patterns_to_suggest)
+            Tuple of (patterns_to_apply, patterns_to_suggest, applied_names), the
+            lists sorted by confidence descending and applied_names the set of
+            pattern names in patterns_to_apply
         """
         to_apply = []
         to_suggest = []
 
         if not apply_patterns:
-            return [], matched_patterns
-
-        severity_rules = {
-            "critical": True,  # Always apply
-            "high": True,  # Apply by default
-            "medium": True,  # Apply with notice
-            "low": False,  # Suggest only
-        }
+            return [], sorted(matched_patterns, key=_by_confidence, reverse=True), frozenset()
 
         for match in matched_patterns:
             confidence = match["confidence"]
             severity = match["severity"]
 
-            should_apply = severity_rules.get(severity, False)
+            should_apply = severity in self._APPLY_SEVERITIES
             meets_confidence = confidence >= min_confidence
 
             if should_apply and meets_confidence:
@@ -310,13 +1135,17 @@ class PatternAwareGenerator:
             else:
                 to_suggest.append(match)
 
-        return to_apply, to_suggest
+        to_apply.sort(key=_by_confidence, reverse=True)
+        to_suggest.sort(key=_by_confidence, reverse=True)
+
+        return to_apply, to_suggest, frozenset(match["name"] for match in to_apply)
 
     def _generate_code_with_llm(
         self,
         prompt: str,
         patterns_to_apply: List[Dict[str, Any]],
         patterns_to_suggest: List[Dict[str, Any]],
+        applied_names: FrozenSet[str],
         metrics_context: Optional[Dict[str, Any]] = None,
     ) -> str:
         """Generate code using LLM with pattern context.
@@ -325,25 +1154,45 @@ class PatternAwareGenerator:
             prompt: Original prompt
             patterns_to_apply: Patterns to apply
             patterns_to_suggest: Patterns to suggest
+            applied_names: Names of the patterns to apply
             metrics_context: Optional metrics context
 
         Returns:
             Generated code
         """
         # Build enriched prompt with pattern context
-        enriched_prompt = self._build_enriched_prompt(
+        segments = self._build_prompt_segments(
             prompt, patterns_to_apply, patterns_to_suggest, metrics_context
         )
 
+        cache_key = embedding = None
+        if self._semantic_cache is not None:
+            cache_key = (self.pattern_library_version, applied_names)
+            embedding = self._semantic_cache.embed(prompt)
+            cached = self._semantic_cache.lookup(cache_key, embedding)
+            if cached is not None:
+                logger.debug("Semantic cache hit; skipping LLM call")
+                return cached
+
         try:
             if not self.llm_manager:
                 raise ValueError("LLM Manager not available")
 
-            # Use LLM manager for generation
-            response = self.llm_manager.generate(enriched_prompt, max_tokens=4096, fallback=True)
+            # Stream from the LLM manager; the fixed instructions go in the system
+            # prompt and the stable prefix of the user prompt is marked cacheable
+            chunks = self.llm_manager.stream(
+                "".join(segments),
+                system=_LLM_SYSTEM_PROMPT,
+                max_tokens=4096,
+                fallback=True,
+                cache_segments=segments[:_CACHEABLE_SEGMENTS],
+            )
+
+            # Extract code as it arrives, stopping once the code block is closed
+            code = self._extract_code_from_stream(chunks)
 
-            # Extract code from response
-            code = self._extract_code_from_response(response.text)
+            if self._semantic_cache is not None:
+                self._semantic_cache.store(cache_key, embedding, code)
 
             return code
 
@@ -351,7 +1200,7 @@ class PatternAwareGenerator:
             logger.error(f"LLM generation failed: {e}")
             # Fall back to template mode
             return self._generate_code_with_templates(
-                prompt, patterns_to_apply, patterns_to_suggest
+                prompt, patterns_to_apply, patterns_to_suggest, applied_names
             )
 
     def _build_enriched_prompt(
@@ -372,57 +1221,108 @@ class PatternAwareGenerator:
         Returns:
             Enriched prompt string
         """
-        enriched = f"{prompt}\n\n"
+        return "".join(
+            self._build_prompt_segments(
+                prompt, patterns_to_apply, patterns_to_suggest, metrics_context
+            )
+        )
 
-        enriched += "## Required Patterns\n"
-        enriched += "Apply the following validated patterns to your code:\n\n"
+    def _build_prompt_segments(
+        self,
+        prompt: str,
+        patterns_to_apply: List[Dict[str, Any]],
+        patterns_to_suggest: List[Dict[str, Any]],
+        metrics_context: Optional[Dict[str, Any]] = None,
+    ) -> List[str]:
+        """Build the enriched prompt segments, reusing earlier identical builds.
 
-        if patterns_to_apply:
-            for match in patterns_to_apply:
-                pattern = match["pattern"]
-                pattern_name = pattern["name"]
-                description = pattern.get("description", "")
-                good_example = pattern.get("good_example", "")
-                effectiveness = pattern.get("effectiveness_score", 0.5)
+        The prompt depends only on the user prompt, the ordered pattern names (whose
+        text comes from the library), and the high-frequency issues in the metrics
+        context, so those form the cache key.
 
-                enriched += f"### Pattern: {pattern_name}\n"
-                enriched += f"**Effectiveness:** {effectiveness:.1%}\n"
-                enriched += f"**Description:** {description}\n"
+        Args:
+            prompt: Original prompt
+            patterns_to_apply: Patterns to apply
+            patterns_to_suggest: Patterns to suggest
+            metrics_context: Optional metrics context
 
-                if good_example:
-                    enriched += f"**Example:**\n```python\n{good_example}\n```\n"
+        Returns:
+            List of prompt segments; joined, they form the enriched prompt
+        """
+        key = (
+            self.pattern_library_version,
+            prompt,
+            tuple(match["name"] for match in patterns_to_apply),
+            tuple(match["name"] for match in patterns_to_suggest),
+            bool(metrics_context),
+            tuple(metrics_context.get("high_frequency_patterns", [])[:5])
+            if metrics_context
+            else (),
+        )
+        with self._prompt_cache_lock:
+            segments = self._prompt_cache.get(key)
+        if segments is None:
+            segments = tuple(
+                self._assemble_prompt_segments(
+                    prompt, patterns_to_apply, patterns_to_suggest, metrics_context
+                )
+            )
+            with self._prompt_cache_lock:
+                if len(self._prompt_cache) >= _PROMPT_CACHE_SIZE:
+                    # Evict the oldest entry (dicts keep insertion order)
+                    del self._prompt_cache[next(iter(self._prompt_cache))]
+                self._prompt_cache[key] = segments
+        return list(segments)
+
+    def _assemble_prompt_segments(
+        self,
+        prompt: str,
+        patterns_to_apply: List[Dict[str, Any]],
+        patterns_to_suggest: List[Dict[str, Any]],
+        metrics_context: Optional[Dict[str, Any]] = None,
+    ) -> List[str]:
+        """Build the enriched prompt as segments ordered from most to least stable.
+
+        The first _CACHEABLE_SEGMENTS segments (the required-pattern modules)
+        repeat across calls, so providers with prompt caching can reuse them; the
+        per-call context and user prompt come last. The fixed instructions are
+        sent separately as the system prompt.
+
+        Args:
+            prompt: Original prompt
+            patterns_to_apply: Patterns to apply
+            patterns_to_suggest: Patterns to suggest
+            metrics_context: Optional metrics context
 
-                enriched += "\n"
+        Returns:
+            List of prompt segments; joined, they form the enriched prompt
+        """
+        if patterns_to_apply:
+            required = _REQUIRED_PATTERNS_HEADER + "".join(
+                self._pattern_prompt_modules.get(match["name"])
+                or _format_pattern_module(match["name"], match["pattern"])
+                for match in patterns_to_apply
+            )
         else:
-            enriched += "No specific patterns required.\n\n"
+            required = _REQUIRED_PATTERNS_HEADER + "No specific patterns required.\n\n"
 
+        context = io.StringIO()
+        w = context.write
         if patterns_to_suggest:
-            enriched += "\n## Suggested Patterns\n"
-            enriched += "Consider these patterns if applicable:\n\n"
-
+            w("## Suggested Patterns\n")
+            w("Consider these patterns if applicable:\n\n")
             for match in patterns_to_suggest:
-                pattern = match["pattern"]
-                pattern_name = pattern["name"]
-                description = pattern.get("description", "")
-                enriched += f"- **{pattern_name}**: {description}\n"
-
-            enriched += "\n"
+                w(f"- **{match['name']}**: {match['description']}\n")
+            w("\n")
 
         if metrics_context:
-            enriched += "\n## Metrics Context\n"
+            w("## Metrics Context\n")
             high_freq = metrics_context.get("high_frequency_patterns", [])
             if high_freq:
-                enriched += f"High-frequency issues: {', '.join(high_freq[:5])}\n"
+                w(f"High-frequency issues: {', '.join(high_freq[:5])}\n")
+            w("\n")
 
-        enriched += "\n## Instructions\n"
-        enriched += "Generate production-ready Python code that:\n"
-        enriched += "1. Implements the requested functionality\n"
-        enriched += "2. Applies all required patterns\n"
-        enriched += "3. Includes proper error handling\n"
-        enriched += "4. Has clear comments explaining pattern usage\n"
-        enriched += "5. Is syntactically correct and ready to run\n"
-
-        return enriched
+        return [required, context.getvalue(), f"## Task\n{prompt}\n"]
 
     def _extract_code_from_response(self, response: str) -> str:
         """Extract code from LLM response.
@@ -433,25 +1333,76 @@ class PatternAwareGenerator:
         Returns:
             Cleaned code
         """
-        # Remove markdown code blocks
-        if "```python" in response:
-            parts = response.split("```python")
-            if len(parts) > 1:
-                code_part = parts[1].split("```")[0]
-                return code_part.strip()
+        # Remove markdown code blocks, preferring the first ```python block
+        start = response.find(_PYTHON_FENCE)
+        if start >= 0:
+            start += len(_PYTHON_FENCE)
+            # The block also ends where a further ```python fence begins
+            limit = response.find(_PYTHON_FENCE, start)
+            if limit < 0:
+                limit = len(response)
+        else:
+            start = response.find("```")
+            if start < 0:
+                return response.strip()
+            start += 3
+            limit = len(response)
 
-        if "```" in response:
-            parts = response.split("```")
-            if len(parts) > 1:
-                return parts[1].strip()
+        end = response.find("```", start, limit)
+        return response[start : end if end >= 0 else limit].strip()
 
-        return response.strip()
+    def _extract_code_from_stream(self, chunks: Iterable[str]) -> str:
+        """Extract code from a streamed LLM response.
+
+        Gives the same result as _extract_code_from_response on the full text, but
+        stops reading (closing the stream) as soon as a complete ```python block
+        has arrived.
+
+        Args:
+            chunks: Response text chunks
+
+        Returns:
+            Cleaned code
+        """
+        text = ""
+        scan_from = 0
+        code_start = closing = -1
+
+        try:
+            for chunk in chunks:
+                text += chunk
+
+                if code_start < 0:
+                    opening = text.find(_PYTHON_FENCE, scan_from)
+                    if opening < 0:
+                        # A fence may be split across chunks; rescan its possible prefix
+                        scan_from = max(0, len(text) - len(_PYTHON_FENCE) + 1)
+                        continue
+                    code_start = scan_from = opening + len(_PYTHON_FENCE)
+
+                if closing < 0:
+                    closing = text.find("```", scan_from)
+                    if closing < 0:
+                        scan_from = max(code_start, len(text) - 2)
+                        continue
+
+                # Read far enough that a ```python fence overlapping the closing
+                # backticks would be visible, then apply the full-response rules
+                if len(text) >= closing + 3 + len(_PYTHON_FENCE):
+                    return self._extract_code_from_response(text)
+        finally:
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
+        return self._extract_code_from_response(text)
 
     def _generate_code_with_templates(
         self,
         prompt: str,
         patterns_to_apply: List[Dict[str, Any]],
         patterns_to_suggest: List[Dict[str, Any]],
+        applied_names: FrozenSet[str],
     ) -> str:
         """Generate code with pattern annotations.
 
@@ -459,49 +1410,36 @@ class PatternAwareGenerator:
             prompt: Original prompt
             patterns_to_apply: Patterns to apply
             patterns_to_suggest: Patterns to suggest
+            applied_names: Names of the patterns to apply
 
         Returns:
             Generated code with annotations
         """
-        # Start with header comment
-        code_lines = [
-            '"""',
-            f"Generated code for: {prompt}",
-            "",
-            "Pattern-aware code generation applied the following patterns:",
-        ]
-
-        # List applied patterns
-        if patterns_to_apply:
-            for match in patterns_to_apply:
-                pattern_name = match["pattern"]["name"]
-                confidence = match["confidence"]
-                code_lines.append(f"  - {pattern_name} (confidence: {confidence:.2f})")
-        else:
-            code_lines.append("  - None")
-
-        code_lines.append('"""')
-        code_lines.append("")
-
-        # Generate imports based on patterns
-        imports = self._generate_imports(patterns_to_apply)
-        code_lines.extend(imports)
-        code_lines.append("")
+        applied = (
+            "\n".join(
+                f"  - {match['name']} (confidence: {match['confidence']:.2f})"
+                for match in patterns_to_apply
+            )
+            or "  - None"
+        )
 
-        # Generate main code based on prompt and patterns
-        main_code = self._generate_main_code(prompt, patterns_to_apply)
-        code_lines.extend(main_code)
+        # Generate imports and main code based on prompt and patterns
+        imports = "".join(f"{line}\n" for line in _imports_for(applied_names))
+        main_code = "\n".join(self._generate_main_code(prompt, applied_names))
 
         # Add suggestions as comments
+        suggested = ""
         if patterns_to_suggest:
-            code_lines.append("")
-            code_lines.append("# SUGGESTED PATTERNS (not auto-applied):")
-            for match in patterns_to_suggest:
-                pattern_name = match["pattern"]["name"]
-                description = match["pattern"]["description"]
-                code_lines.append(f"# - {pattern_name}: {description[:80]}...")
+            suggested = "\n\n# SUGGESTED PATTERNS (not auto-applied):\n" + "\n".join(
+                f"# - {match['name']}: {match['description'][:80]}..."
+                for match in patterns_to_suggest
+            )
 
-        return "\n".join(code_lines)
+        return (
+            f'"""\nGenerated code for: {prompt}\n\n'
+            f"Pattern-aware code generation applied the following patterns:\n"
+            f'{applied}\n"""\n\n{imports}\n{main_code}{suggested}'
+        )
 
     def _generate_imports(self, patterns_to_apply: List[Dict[str, Any]]) -> List[str]:
         """Generate import statements based on patterns.
@@ -512,32 +1450,14 @@ class PatternAwareGenerator:
         Returns:
             List of import statement strings
         """
-        imports = set()
-
-        pattern_imports = {
-            "numpy_json_serialization": ["import json", "import numpy as np"],
-            "bounds_checking": ["import logging"],
-            "specific_exceptions": ["import json", "import logging"],
-            "logger_debug": ["import logging"],
-            "temp_file_handling": ["import os", "import tempfile", "import logging"],
-            "large_file_processing": ["import os", "import logging"],
-        }
-
-        for match in patterns_to_apply:
-            pattern_name = match["pattern"]["name"]
-            pattern_imports_list = pattern_imports.get(pattern_name, [])
-            imports.update(pattern_imports_list)
-
-        return sorted(list(imports))
+        return list(_imports_for(frozenset(match["name"] for match in patterns_to_apply)))
 
-    def _generate_main_code(
-        self, prompt: str, patterns_to_apply: List[Dict[str, Any]]
-    ) -> List[str]:
+    def _generate_main_code(self, prompt: str, applied_names: FrozenSet[str]) -> List[str]:
         """Generate main code based on prompt and patterns.
 
         Args:
             prompt: Original prompt
-            patterns_to_apply: Patterns being applied
+            applied_names: Names of the patterns being applied
 
         Returns:
             List of code lines
@@ -545,24 +1465,17 @@ class PatternAwareGenerator:
         code_lines = []
 
         # Check if logger pattern is applied
-        uses_logging = any(
-            p["pattern"]["name"] in ["logger_debug", "bounds_checking", "specific_exceptions"]
-            for p in patterns_to_apply
-        )
+        uses_logging = not self._LOGGING_PATTERNS.isdisjoint(applied_names)
 
         if uses_logging:
             code_lines.append("logger = logging.getLogger(__name__)")
             code_lines.append("")
 
         # Generate function based on prompt keywords
-        prompt_lower = prompt.lower()
-
-        if "numpy" in prompt_lower and "json" in prompt_lower:
-            code_lines.extend(self._generate_numpy_json_function())
-        elif "list" in prompt_lower or "first" in prompt_lower:
-            code_lines.extend(self._generate_list_access_function())
-        elif "file" in prompt_lower:
-            code_lines.extend(self._generate_file_processing_function())
+        template_key = _template_key(_scan_prompt_terms(prompt))
+
+        if template_key is not None:
+            code_lines.extend(self._template_fns[template_key]())
         else:
             # Generic function template
             code_lines.extend(
@@ -582,53 +1495,17 @@ class PatternAwareGenerator:
 
         return code_lines
 
-    def _generate_numpy_json_function(self) -> List[str]:
+    def _generate_numpy_json_function(self) -> Tuple[str, ...]:
         """Generate NumPy to JSON function with pattern."""
-        return [
-            "def process_numpy_data(data_array):",
-            '    """Process NumPy array and return JSON-serializable result."""',
-            "    # PATTERN: numpy_json_serialization - Convert before JSON serialization",
-            "    result = {",
-            '        "mean": float(np.mean(data_array)),',
-            '        "std": float(np.std(data_array)),',
-            '        "max": float(np.max(data_array))',
-            "    }",
-            "    return json.dumps(result)",
-        ]
+        return _TMPL_NUMPY_JSON
 
-    def _generate_list_access_function(self) -> List[str]:
+    def _generate_list_access_function(self) -> Tuple[str, ...]:
         """Generate list access function with bounds checking."""
-        return [
-            "def get_first_item(items):",
-            '    """Get first item with bounds checking."""',
-            "    # PATTERN: bounds_checking - Validate before accessing",
-            "    if not items:",
-            '        logger.debug("List is empty, returning None")',
-            "        return None",
-            "    return items[0]",
-        ]
+        return _TMPL_LIST_ACCESS
 
-    def _generate_file_processing_function(self) -> List[str]:
+    def _generate_file_processing_function(self) -> Tuple[str, ...]:
         """Generate file processing function with pattern."""
-        return [
-            "def process_file(file_path, max_size_bytes=800 * 1024 * 1024):",
-            '    """Process file with size validation."""',
-            "    # PATTERN: large_file_processing - Check size before loading",
-            "    try:",
-            "        file_size = os.path.getsize(file_path)",
-            "        ",
-            "        if file_size > max_size_bytes:",
-            '            logger.debug(f"File too large: {file_size} > {max_size_bytes}")',
-            "            return None",
-            "        ",
-            "        return {",
-            '            "file_path": file_path,',
-            '            "size_bytes": int(file_size)',
-            "        }",
-            "    except (FileNotFoundError, IOError, OSError) as e:",
-            '        logger.debug(f"Error processing file: {e}")',
-            "        return None",
-        ]
+        return _TMPL_FILE_PROCESSING
 
     def _validate_code(self, code: str) -> ValidationResult:
         """Validate generated code.
@@ -639,39 +1516,16 @@ class PatternAwareGenerator:
         Returns:
             ValidationResult with validation details
         """
-        warnings = []
-        syntax_valid = False
-        compilation_error = None
+        syntax_valid, compilation_error, warnings = _check_code(code)
 
-        # Check syntax
-        try:
-            ast.parse(code)
-            syntax_valid = True
-        except SyntaxError as e:
-            syntax_valid = False
-            compilation_error = f"Syntax error at line {e.lineno}: {e.msg}"
+        if not syntax_valid:
             logger.warning(f"Code validation failed: {compilation_error}")
 
-        # Additional checks
-        if syntax_valid:
-            # Check for common issues
-            if "print(" in code:
-                warnings.append("Code contains print() statements - consider using logger.debug()")
-
-            if "except:" in code and "except Exception:" not in code:
-                warnings.append("Code contains bare except: - use specific exceptions")
-
-            # Check for TODO comments
-            if "TODO" in code or "FIXME" in code:
-                warnings.append("Code contains TODO/FIXME comments")
-
-        is_valid = syntax_valid and len(warnings) == 0
-
         return ValidationResult(
-            is_valid=is_valid,
+            is_valid=syntax_valid and not warnings,
             syntax_valid=syntax_valid,
             compilation_error=compilation_error,
-            warnings=warnings,
+            warnings=list(warnings),
         )
 
     def _calculate_confidence(self, matched_patterns: List[Dict[str, Any]]) -> float:
@@ -686,16 +1540,22 @@ class PatternAwareGenerator:
         if not matched_patterns:
             return 0.5
 
-        # Average of top 3 confidence scores
-        top_scores = sorted([m["confidence"] for m in matched_patterns], reverse=True)[:3]
+        # Average of top 3 confidence scores; partition is O(n) where a sort is O(n log n)
+        scores = np.fromiter(
+            map(_by_confidence, matched_patterns), dtype=np.float64, count=len(matched_patterns)
+        )
+        if scores.size > 3:
+            scores = np.partition(scores, scores.size - 3)[-3:]
+        # Sum highest first, in the same order as the fused scoring pass
+        top_scores = np.sort(scores)[::-1]
 
-        return sum(top_scores) / len(top_scores) if top_scores else 0.5
+        return float(top_scores.sum()) / top_scores.size
 
     def _generate_report(
         self,
         patterns_applied: List[Dict[str, Any]],
         patterns_suggested: List[Dict[str, Any]],
-        context_indicators: Dict[str, bool],
+        context_indicators: FrozenSet[str],
         confidence: float,
         validation: Optional[ValidationResult] = None,
     ) -> str:
@@ -711,53 +1571,45 @@ class PatternAwareGenerator:
         Returns:
             Report string
         """
-        lines = [
-            "=== Pattern-Aware Code Generation Report ===",
-            "",
-            f"Confidence Score: {confidence:.2%}",
-            f"Generation Mode: {'LLM' if self.use_llm and self.llm_manager else 'Template'}",
-            "",
-            "Context Detected:",
-        ]
+        buf = io.StringIO()
+        w = buf.write
 
-        for indicator, detected in context_indicators.items():
-            if detected:
-                lines.append(f"  ✓ {indicator}")
+        w("=== Pattern-Aware Code Generation Report ===\n\n")
+        w(f"Confidence Score: {confidence:.2%}\n")
+        w(f"Generation Mode: {'LLM' if self.use_llm and self.llm_manager else 'Template'}\n\n")
+        w("Context Detected:\n")
 
-        lines.append("")
-        lines.append(f"Patterns Applied: {len(patterns_applied)}")
+        # Walk the key tuple rather than the set so the report order is stable
+        for indicator in _INDICATOR_KEYS:
+            if indicator in context_indicators:
+                w(f"  ✓ {indicator}\n")
+
+        w(f"\nPatterns Applied: {len(patterns_applied)}\n")
         for match in patterns_applied:
-            pattern_name = match["pattern"]["name"]
-            pattern_confidence = match["confidence"]
-            severity = match["severity"]
-            lines.append(
-                f"  - {pattern_name} (severity: {severity}, confidence: {pattern_confidence:.2%})"
+            w(
+                f"  - {match['name']} (severity: {match['severity']}, "
+                f"confidence: {match['confidence']:.2%})\n"
             )
 
-        lines.append("")
-        lines.append(f"Patterns Suggested: {len(patterns_suggested)}")
+        w(f"\nPatterns Suggested: {len(patterns_suggested)}\n")
         for match in patterns_suggested:
-            pattern_name = match["pattern"]["name"]
-            pattern_confidence = match["confidence"]
-            lines.append(f"  - {pattern_name} (confidence: {pattern_confidence:.2%})")
+            w(f"  - {match['name']} (confidence: {match['confidence']:.2%})\n")
 
         # Add validation results
         if validation:
-            lines.append("")
-            lines.append("Validation Results:")
-            lines.append(f"  Syntax Valid: {'✓' if validation.syntax_valid else '✗'}")
+            w("\nValidation Results:\n")
+            w(f"  Syntax Valid: {'✓' if validation.syntax_valid else '✗'}\n")
 
             if validation.compilation_error:
-                lines.append(f"  Error: {validation.compilation_error}")
+                w(f"  Error: {validation.compilation_error}\n")
 
             if validation.warnings:
-                lines.append(f"  Warnings: {len(validation.warnings)}")
+                w(f"  Warnings: {len(validation.warnings)}\n")
                 for warning in validation.warnings:
-                    lines.append(f"    - {warning}")
+                    w(f"    - {warning}\n")
 
-            lines.append(f"  Overall: {'✓ Valid' if validation.is_valid else '✗ Issues Found'}")
+            w(f"  Overall: {'✓ Valid' if validation.is_valid else '✗ Issues Found'}\n")
 
-        lines.append("")
-        lines.append("=== End Report ===")
+        w("\n=== End Report ===")
 
-        return "\n".join(lines)
+        return buf.getvalue()
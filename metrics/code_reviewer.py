@@ -4,16 +4,764 @@ Interactive Code Review Module
 Provides LLM-powered code review with pattern suggestions and best practices.
 """
 
+import ast
+import asyncio
+import copy
+import hashlib
+import json
 import logging
+import os
 import re
-from typing import Any, Dict, List, Optional
+import shutil
+import sqlite3
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 from metrics.config_manager import ConfigManager
-from metrics.llm_providers import get_llm_manager
+from metrics.llm_providers import LLMManager, get_llm_manager
 from metrics.pattern_manager import PatternManager
 
+try:
+    import orjson
+except ImportError:  # orjson is optional; cached reviews fall back to json
+    orjson = None
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken is optional; token counts fall back to an estimate
+    tiktoken = None
+
 logger = logging.getLogger(__name__)
 
+# Providers only cache a prompt prefix of at least this many tokens
+_MIN_CACHEABLE_PREFIX_TOKENS = 1024
+
+# Rough characters per token for English prose and code
+_CHARS_PER_TOKEN = 4
+
+# Output tokens dominate latency, so every prompt asks for a short answer
+_CONCISE_INSTRUCTION = (
+    "Respond in under 300 words. Use a bulleted list, no preamble, no closing summary.\n"
+)
+
+# Output tokens allowed on top of one per input token of code
+_BASE_OUTPUT_TOKENS = 256
+
+_REVIEW_STYLE_RUBRIC = f"""
+## Severity Rubric:
+- **Critical**: security vulnerabilities, data loss, or crashes on common inputs
+- **High**: incorrect results, resource leaks, or unhandled errors on realistic inputs
+- **Medium**: missing validation, fragile error handling, or pattern violations
+  without immediate impact
+- **Low**: naming, documentation, readability, and style
+
+## Response Format:
+- Start with the most severe issue
+- For each issue, name the function or line, explain the problem, and show the fix
+- Keep code fixes to short Python snippets
+{_CONCISE_INSTRUCTION}"""
+
+
+# Runs of blank lines longer than this are collapsed before review
+_MAX_BLANK_RUN = 2
+
+# Debrief parsing: the leading difficulty rating
+_LEAD_DIGITS_RE = re.compile(r"\s*(\d+)")
+
+# Section headings the debrief prompt asks the LLM to use
+_STRATEGIES_MARKER = "**Improvement Strategies:**"
+_DIFFICULTY_MARKER = "**Difficulty Rating:**"
+_EXPLANATION_MARKER = "**Explanation:**"
+
+# Heading that separates the review from the debrief in a combined response
+_DEBRIEF_HEADING = "## Debrief"
+
+# Appended to the review prompt so one response carries both review and debrief
+_COMBINED_DEBRIEF_INSTRUCTION = f"""
+After the review, add a line containing only "{_DEBRIEF_HEADING}" followed by:
+
+{_STRATEGIES_MARKER}
+1. [3-5 specific, actionable strategies to avoid similar issues in future code]
+
+{_DIFFICULTY_MARKER} [1-10: 1-3 easy, 4-6 moderate, 7-9 hard, 10 very hard]
+
+{_EXPLANATION_MARKER}
+[Brief explanation of why this difficulty rating was assigned]
+"""
+
+# Fixed parts of the generate_debrief prompt, around the code, review and context
+_DEBRIEF_PROMPT_HEADER = """Based on the code review provided, generate a debrief that includes:
+
+1. **Improvement Strategies**: 3-5 specific, actionable strategies the
+   developer can use to improve their code quality and avoid similar issues in
+   future submissions.
+2. **Difficulty Rating**: Rate the difficulty of executing these improvements
+   on a scale of 1-10, where:
+   - 1-3: Easy (simple changes, no architectural impact)
+   - 4-6: Moderate (requires refactoring or new patterns)
+   - 7-9: Hard (significant architectural changes or deep understanding needed)
+   - 10: Very Hard (requires extensive rewrite or advanced expertise)
+"""
+_DEBRIEF_OUTPUT_FORMAT = f"""
+## Output Format:
+Provide your response in the following format:
+
+{_STRATEGIES_MARKER}
+1. [Strategy 1]
+2. [Strategy 2]
+3. [Strategy 3]
+...
+
+{_DIFFICULTY_MARKER} [1-10]
+
+{_EXPLANATION_MARKER}
+[Brief explanation of why this difficulty rating was assigned and what makes
+these improvements more or less challenging]
+"""
+
+# Explanation of the fallback debrief returned when generation fails
+_DEBRIEF_ERROR_EXPLANATION = "Error during debrief generation."
+
+# Bump when review prompts or result shapes change to invalidate stored reviews
+_REVIEW_CACHE_VERSION = 1
+
+
+def _debrief_section(text: str, marker: str, *stops: str) -> Optional[str]:
+    """Return the text after the first marker, up to the next marker or stop.
+
+    Args:
+        text: Debrief response text
+        marker: Heading that starts the section
+        *stops: Headings that end the section early
+
+    Returns:
+        Section text, or None if the marker does not occur
+    """
+    start = text.find(marker)
+    if start < 0:
+        return None
+    start += len(marker)
+    end = len(text)
+    for stop in (marker, *stops):
+        found = text.find(stop, start, end)
+        if found >= 0:
+            end = found
+    return text[start:end]
+
+
+def _strip_list_marker(line: str) -> str:
+    """Drop a leading "1.", "-" or "*" list marker and the whitespace after it.
+
+    Args:
+        line: Stripped, non-empty line
+
+    Returns:
+        The item text, or the whole line if nothing follows the marker
+    """
+    first = line[0]
+    if first == "*" or first == "-":
+        rest = line[1:].lstrip()
+    elif first.isdecimal():
+        end = 1
+        while end < len(line) and line[end].isdecimal():
+            end += 1
+        if line[end : end + 1] != ".":
+            return line
+        rest = line[end + 1 :].lstrip()
+    else:
+        return line
+    return rest or line
+
+
+def _parse_debrief(debrief_text: str) -> Dict[str, Any]:
+    """Parse the strategies, difficulty and explanation out of a debrief response.
+
+    Args:
+        debrief_text: Debrief text using the _STRATEGIES_MARKER style headings
+
+    Returns:
+        Debrief dictionary; the whole text becomes the only strategy if no list
+        items are found
+    """
+    # Every section heading is bold, so free-form text without "**" needs no
+    # per-marker searches
+    if "**" not in debrief_text:
+        return {"strategies": [debrief_text], "difficulty": 5, "explanation": ""}
+
+    strategies = []
+    difficulty = 5
+    explanation = ""
+
+    # Extract strategies
+    strategies_section = _debrief_section(debrief_text, _STRATEGIES_MARKER, _DIFFICULTY_MARKER)
+    if strategies_section is not None:
+        # Numbered lists (1., 2., etc), bullet points (-, *), or simple text
+        for line in strategies_section.split("\n"):
+            line = line.strip()
+            if line:
+                strategies.append(_strip_list_marker(line))
+
+    # Extract difficulty rating from the beginning of its section. Matching in place
+    # is safe: the section ends at a "**" marker, which stops the digit run.
+    rating_at = debrief_text.find(_DIFFICULTY_MARKER)
+    if rating_at >= 0:
+        rating = _LEAD_DIGITS_RE.match(debrief_text, rating_at + len(_DIFFICULTY_MARKER))
+        if rating:
+            difficulty = min(10, max(1, int(rating.group(1))))
+
+    # Extract explanation
+    explanation_section = _debrief_section(debrief_text, _EXPLANATION_MARKER)
+    if explanation_section is not None:
+        explanation = explanation_section.strip()
+
+    # Fallback if parsing failed
+    if not strategies:
+        strategies = [debrief_text]
+
+    return {
+        "strategies": strategies,
+        "difficulty": difficulty,
+        "explanation": explanation,
+    }
+
+
+def _find_debrief_heading(text: str, start: int = 0) -> int:
+    """Find the debrief heading at the start of a line.
+
+    Args:
+        text: Combined review response
+        start: Offset to search from
+
+    Returns:
+        Offset of the heading, or -1 if it does not occur
+    """
+    found = text.find(_DEBRIEF_HEADING, start)
+    while found > 0 and text[found - 1] != "\n":
+        found = text.find(_DEBRIEF_HEADING, found + 1)
+    return found
+
+
+def _split_combined_review(text: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """Split a combined response into the review text and the parsed debrief.
+
+    Args:
+        text: Response to a prompt ending in _COMBINED_DEBRIEF_INSTRUCTION
+
+    Returns:
+        Tuple of (review text, debrief or None if the model left it out)
+    """
+    found = _find_debrief_heading(text)
+    if found < 0:
+        return text, None
+    return text[:found].rstrip(), _parse_debrief(text[found + len(_DEBRIEF_HEADING) :])
+
+
+def _compact_code(code: str, max_lines: int = 0, strip_module_docstring: bool = False) -> str:
+    """Drop whitespace and other tokens that add cost but nothing to a review.
+
+    Dedents the code, strips trailing whitespace and collapses long runs of
+    blank lines. If max_lines is set and the code is longer, only the last
+    max_lines lines are kept behind a marker comment; review_code splits
+    oversize input with _split_code instead, so this is off by default.
+
+    Args:
+        code: Code to review
+        max_lines: Maximum number of lines to keep (0 = no limit)
+        strip_module_docstring: Also remove the module docstring, if any
+
+    Returns:
+        Compacted code
+    """
+    lines = [line.rstrip() for line in textwrap.dedent(code).splitlines()]
+
+    if strip_module_docstring:
+        try:
+            body = ast.parse("\n".join(lines)).body
+        except SyntaxError:
+            body = []
+        if (
+            body
+            and isinstance(body[0], ast.Expr)
+            and isinstance(body[0].value, ast.Constant)
+            and isinstance(body[0].value.value, str)
+        ):
+            del lines[body[0].lineno - 1 : body[0].end_lineno]
+
+    compacted: List[str] = []
+    blank_run = 0
+    for line in lines:
+        blank_run = blank_run + 1 if not line else 0
+        if blank_run <= _MAX_BLANK_RUN:
+            compacted.append(line)
+
+    # Leading and trailing blank lines carry nothing
+    while compacted and not compacted[0]:
+        compacted.pop(0)
+    while compacted and not compacted[-1]:
+        compacted.pop()
+
+    if max_lines and len(compacted) > max_lines:
+        removed = len(compacted) - max_lines
+        compacted = [f"# ...{removed} earlier lines elided..."] + compacted[-max_lines:]
+
+    return "\n".join(compacted)
+
+
+# Top-level statements that make code boilerplate (imports, constants, docstrings)
+_BOILERPLATE_NODES = (ast.Import, ast.ImportFrom, ast.Assign, ast.AnnAssign, ast.Expr, ast.Pass)
+
+
+def _is_pure_boilerplate(tree: ast.Module) -> bool:
+    """Return True if a module contains no functions, classes or control flow.
+
+    Args:
+        tree: Parsed module
+
+    Returns:
+        True if every top-level statement is an import, assignment or expression
+    """
+    return all(isinstance(node, _BOILERPLATE_NODES) for node in tree.body)
+
+
+def _output_token_budget(code: str, limit: int) -> int:
+    """Scale the output token limit to the size of the code being discussed.
+
+    Args:
+        code: Code included in the prompt
+        limit: Configured maximum output tokens
+
+    Returns:
+        Output token limit for the request
+    """
+    return min(limit, _BASE_OUTPUT_TOKENS + len(code) // _CHARS_PER_TOKEN)
+
+
+# Local lint runs here while the review waits on the LLM
+_LINT_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="review-lint")
+
+
+def _hedged(call: Callable[[], Any], copies: int, delay: float = 0.0) -> Any:
+    """Run identical copies of a slow call and return the first to succeed.
+
+    A copy is started every `delay` seconds while no earlier copy has
+    finished, so with a positive delay the extra requests are only sent when
+    the first one is slow. Copies still running are abandoned.
+
+    Args:
+        call: Zero-argument function making the request
+        copies: Maximum number of copies to run
+        delay: Seconds to wait before starting each further copy
+
+    Returns:
+        Result of the first successful copy
+
+    Raises:
+        Exception: The last copy's error if every copy fails
+    """
+    if copies <= 1:
+        return call()
+
+    executor = ThreadPoolExecutor(max_workers=copies, thread_name_prefix="review-hedge")
+    try:
+        pending = {executor.submit(call)}
+        started = 1
+        last_error: Optional[BaseException] = None
+        while pending:
+            timeout = delay if started < copies else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                last_error = future.exception()
+            if started < copies and (not done or not pending):
+                pending.add(executor.submit(call))
+                started += 1
+        raise last_error  # type: ignore[misc]
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _run_ruff(code: str, timeout: float) -> List[Dict[str, Any]]:
+    """Lint code with the ruff CLI.
+
+    Args:
+        code: Python source to lint
+        timeout: Seconds to wait for ruff
+
+    Returns:
+        Findings with `line`, `code` and `message` keys; empty if ruff is not
+        installed or fails
+    """
+    ruff = shutil.which("ruff")
+    if ruff is None:
+        return []
+
+    try:
+        result = subprocess.run(
+            [ruff, "check", "--output-format=json", "--stdin-filename=review.py", "-"],
+            input=code,
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+        findings = json.loads(result.stdout or "[]")
+    except (OSError, subprocess.TimeoutExpired, ValueError) as e:
+        logger.debug(f"Local lint skipped: {e}")
+        return []
+
+    return [
+        {
+            "line": finding.get("location", {}).get("row"),
+            "code": finding.get("code"),
+            "message": finding.get("message"),
+        }
+        for finding in findings
+    ]
+
+
+def _estimate_tokens(text: str) -> int:
+    """Estimate the token count of a prompt without a provider tokenizer.
+
+    Args:
+        text: Prompt text
+
+    Returns:
+        Approximate number of tokens
+    """
+    return len(text) // _CHARS_PER_TOKEN
+
+
+# Pattern descriptions are cut to one bullet line of this many characters
+_PATTERN_SUMMARY_WIDTH = 120
+
+
+@lru_cache(maxsize=256)
+def _summarize_description(description: str) -> str:
+    """Shorten a pattern description to a single prompt bullet.
+
+    Markdown headings are dropped and whitespace is collapsed before the text
+    is cut at a word boundary.
+
+    Args:
+        description: Pattern description, possibly multi-line markdown
+
+    Returns:
+        Description of at most _PATTERN_SUMMARY_WIDTH characters
+    """
+    text = " ".join(
+        line for line in description.splitlines() if not line.lstrip().startswith("#")
+    )
+    return textwrap.shorten(text, width=_PATTERN_SUMMARY_WIDTH, placeholder="…")
+
+
+@lru_cache(maxsize=1)
+def _token_encoding():
+    """Load the tiktoken encoding used for token counts, or None if unavailable."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.debug(f"tiktoken encoding unavailable: {e}")
+        return None
+
+
+def _count_tokens(text: str) -> int:
+    """Count prompt tokens with tiktoken, or estimate them without it.
+
+    Args:
+        text: Prompt text
+
+    Returns:
+        Number of tokens
+    """
+    encoding = _token_encoding()
+    if encoding is None:
+        return _estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _split_code(code: str, max_tokens: int) -> List[Tuple[int, str]]:
+    """Split code on top-level definition boundaries into chunks of at most max_tokens.
+
+    Consecutive top-level statements are packed into a chunk until the next one
+    would exceed the limit. A single definition larger than the limit becomes
+    its own chunk, since cutting inside it would leave code that does not parse.
+    Code with a syntax error is returned whole.
+
+    Args:
+        code: Python source
+        max_tokens: Token limit per chunk
+
+    Returns:
+        (first line number, chunk source) pairs in source order
+    """
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return [(1, code)]
+
+    lines = code.splitlines(keepends=True)
+    starts = [
+        min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+        for node in tree.body
+    ]
+    if not starts:
+        return [(1, code)]
+    # Leading comments and blank lines belong to the first segment
+    starts[0] = 1
+    bounds = list(zip(starts, starts[1:] + [len(lines) + 1]))
+
+    chunks: List[Tuple[int, str]] = []
+    chunk_start, chunk_parts, chunk_tokens = 1, [], 0
+    for start, end in bounds:
+        segment = "".join(lines[start - 1 : end - 1])
+        tokens = _count_tokens(segment)
+        if chunk_parts and chunk_tokens + tokens > max_tokens:
+            chunks.append((chunk_start, "".join(chunk_parts)))
+            chunk_start, chunk_parts, chunk_tokens = start, [], 0
+        chunk_parts.append(segment)
+        chunk_tokens += tokens
+    chunks.append((chunk_start, "".join(chunk_parts)))
+    return chunks
+
+
+@lru_cache(maxsize=32)
+def _review_prompt_prefix(patterns: Tuple[Tuple[str, str, str, str], ...]) -> str:
+    """Build the fixed part of the review prompt.
+
+    Everything that does not depend on the code under review comes first, so the
+    prompt shares one byte-identical prefix across calls that providers can cache.
+    If the catalog and rubric fall short of the caching floor, pattern examples
+    are appended until the prefix is long enough to be cached.
+
+    Args:
+        patterns: (name, description, bad_example, good_example) for each pattern
+
+    Returns:
+        Review prompt prefix
+    """
+    pattern_lines = "".join(
+        f"- **{name}**: {_summarize_description(desc)}\n" for name, desc, _, _ in patterns
+    )
+    prefix = f"""You are an expert code reviewer for the feedback-loop framework.
+
+Review the Python code at the end of this message and provide:
+1. Pattern violations or missing patterns
+2. Potential bugs or issues
+3. Best practice improvements
+4. Specific, actionable suggestions
+
+Focus on these key patterns:
+{pattern_lines}
+## Review Guidelines:
+- Be specific and actionable
+- Reference patterns by name when applicable
+- Prioritize critical issues
+- Suggest concrete code improvements
+- Keep feedback concise but thorough
+{_REVIEW_STYLE_RUBRIC}"""
+
+    examples = [(name, bad, good) for name, _, bad, good in patterns if bad or good]
+    if examples and _estimate_tokens(prefix) < _MIN_CACHEABLE_PREFIX_TOKENS:
+        parts = [prefix, "\n## Reference Examples:\n"]
+        size = len(prefix)
+        for name, bad, good in examples:
+            section = f"\n### {name}\n"
+            if bad:
+                section += f"Avoid:\n```python\n{bad}\n```\n"
+            if good:
+                section += f"Prefer:\n```python\n{good}\n```\n"
+            parts.append(section)
+            size += len(section)
+            if size // _CHARS_PER_TOKEN >= _MIN_CACHEABLE_PREFIX_TOKENS:
+                break
+        prefix = "".join(parts)
+
+    return prefix
+
+
+class _ResponseCache:
+    """Thread-safe LRU cache of LLM responses with a time-to-live.
+
+    Keys are prompt digests, so identical review, explanation and suggestion
+    requests (CI re-runs, editor save loops) skip the LLM round-trip.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 3600.0):
+        """Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of responses kept
+            ttl_seconds: Seconds a response stays valid
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[Any, ...], Tuple[float, Dict[str, Any]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(prompt: str, max_tokens: int, provider: Optional[str]) -> Tuple[Any, ...]:
+        """Build the cache key for an LLM call.
+
+        Args:
+            prompt: Full prompt text
+            max_tokens: Output token limit
+            provider: Preferred provider name
+
+        Returns:
+            Hashable cache key
+        """
+        digest = hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).hexdigest()
+        return digest, max_tokens, provider
+
+    def get(self, key: Tuple[Any, ...]) -> Optional[Dict[str, Any]]:
+        """Return a cached response, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, response = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            # Deep copies, so callers mutating nested lists cannot corrupt the entry
+            return copy.deepcopy(response)
+
+    def put(self, key: Tuple[Any, ...], response: Dict[str, Any]) -> None:
+        """Store a response, evicting the least recently used entry if full."""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(response))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every cached response."""
+        with self._lock:
+            self._entries.clear()
+
+
+def _dump_json(value: Any) -> str:
+    """Serialize a cached response, using orjson when it is installed.
+
+    Non-string keys are stringified as json.dumps does.
+    """
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(value)
+
+
+def _load_json(text: str) -> Any:
+    """Deserialize a cached response, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+class _DiskResponseCache:
+    """SQLite store of LLM responses that survives across process runs.
+
+    Repeated CLI invocations on unchanged code reuse the earlier response. Any
+    database error disables the cache for the rest of the process instead of
+    failing the review.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 86400.0):
+        """Initialize the cache; the database is opened on first use.
+
+        Args:
+            path: SQLite file path (``~`` is expanded)
+            ttl_seconds: Seconds a response stays valid
+        """
+        self.path = os.path.expanduser(path)
+        self.ttl_seconds = ttl_seconds
+        self._conn: Optional[sqlite3.Connection] = None
+        self._disabled = False
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(memory_key: Tuple[Any, ...]) -> str:
+        """Turn an in-memory cache key into a database key."""
+        return "|".join(str(part) for part in memory_key)
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        if self._conn is None and not self._disabled:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                conn = sqlite3.connect(self.path, timeout=1.0, check_same_thread=False)
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses "
+                    "(key TEXT PRIMARY KEY, expires_at REAL NOT NULL, response TEXT NOT NULL)"
+                )
+                self._conn = conn
+            except (sqlite3.Error, OSError) as e:
+                self._disable(e)
+        return self._conn
+
+    def _disable(self, error: Exception) -> None:
+        logger.debug(f"Disk response cache disabled: {error}")
+        self._disabled = True
+        self._conn = None
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached response, or None if missing or expired."""
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute(
+                    "SELECT response FROM responses WHERE key = ? AND expires_at >= ?",
+                    (key, time.time()),
+                ).fetchone()
+            except sqlite3.Error as e:
+                self._disable(e)
+                return None
+        return _load_json(row[0]) if row else None
+
+    def put(self, key: str, response: Dict[str, Any]) -> None:
+        """Store a response and drop expired ones."""
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return
+            now = time.time()
+            try:
+                with conn:
+                    conn.execute("DELETE FROM responses WHERE expires_at < ?", (now,))
+                    conn.execute(
+                        "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)",
+                        (key, now + self.ttl_seconds, _dump_json(response)),
+                    )
+            except (sqlite3.Error, TypeError, ValueError) as e:
+                self._disable(e)
+
+    def clear(self) -> None:
+        """Drop every cached response."""
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return
+            try:
+                with conn:
+                    conn.execute("DELETE FROM responses")
+            except sqlite3.Error as e:
+                self._disable(e)
+
 
 class CodeReviewer:
     """Interactive code reviewer with LLM assistance."""
@@ -51,10 +799,306 @@ class CodeReviewer:
 
         self.pattern_manager = PatternManager()
         self.patterns = self.pattern_manager.get_all_patterns()
-    def _call_llm(self, prompt: str, max_tokens: int) -> Dict[str, Any]:
+
+        self._response_cache = _ResponseCache(
+            max_entries=self.config.get("code_review.response_cache_size", 512),
+            ttl_seconds=self.config.get("code_review.response_cache_ttl", 3600),
+        )
+        # Persistent cache shared by CLI runs; FEEDBACK_LOOP_NO_CACHE=1 turns it off.
+        # Only responses from the real providers are persisted: an injected
+        # LLMClient or substitute manager keeps its responses in memory.
+        self._disk_cache: Optional[_DiskResponseCache] = None
+        disk_cache_enabled = (
+            self.config.get("code_review.disk_cache", True)
+            and self.llm_client is None
+            and isinstance(self.llm_manager, LLMManager)
+        )
+        if disk_cache_enabled and os.getenv("FEEDBACK_LOOP_NO_CACHE") != "1":
+            self._disk_cache = _DiskResponseCache(
+                self.config.get(
+                    "code_review.disk_cache_path", "~/.cache/feedback-loop/reviews.sqlite3"
+                ),
+                ttl_seconds=self.config.get("code_review.disk_cache_ttl", 86400),
+            )
+
+        # Request limits, read once instead of on every call
+        self.max_code_size = self.config.get("code_review.max_code_size", 50000)
+        self.max_tokens = self.config.get("code_review.max_tokens", 2048)
+        self.max_tokens_debrief = self.config.get("code_review.max_tokens_debrief", 1500)
+        self.max_tokens_explain = self.config.get("code_review.max_tokens_explain", 1500)
+        self.max_tokens_explain_brief = self.config.get(
+            "code_review.max_tokens_explain_brief", 600
+        )
+        self.max_tokens_suggest = self.config.get("code_review.max_tokens_suggest", 2048)
+
+        # Input compaction applied before code is sent to the LLM
+        self.max_review_lines = self.config.get("code_review.max_review_lines", 0)
+        self.strip_module_docstring = self.config.get("code_review.strip_module_docstring", False)
+
+        # Short or boilerplate code goes to the provider's smaller model; code that
+        # does not parse is reported locally without an LLM call
+        self.fast_model_max_chars = self.config.get("code_review.fast_model_max_chars", 400)
+        self.fast_model_max_lines = self.config.get("code_review.fast_model_max_lines", 20)
+        self.local_syntax_check = self.config.get("code_review.local_syntax_check", True)
+
+        # Snippets packed into one prompt by review_batch
+        self.batch_size = self.config.get("code_review.batch_size", 5)
+
+        # Reviews in flight at once in review_many_async
+        self.concurrency = self.config.get("code_review.concurrency", 8)
+
+        # Larger code is split at top-level definitions and reviewed in parts
+        self.max_input_tokens = self.config.get("code_review.max_input_tokens", 8000)
+
+        # Send each request to every provider at once and keep the first answer
+        self.race_providers = self.config.get("code_review.race_providers", False)
+        self.race_timeout = self.config.get("code_review.race_timeout", 8.0)
+
+        # Copies of each LLM request to hedge against slow responses (1 = off);
+        # each copy after the first is sent only if none has finished in hedge_delay
+        self.hedge_requests = self.config.get("code_review.hedge_requests", 1)
+        self.hedge_delay = self.config.get("code_review.hedge_delay", 0.0)
+
+        # Ask for the debrief in the review response instead of a second LLM call
+        self.combined_debrief = self.config.get("code_review.combined_debrief", False)
+
+        # Deterministic lint findings gathered while the LLM review runs
+        self.local_lint = self.config.get("code_review.local_lint", True)
+        self.lint_timeout = self.config.get("code_review.lint_timeout", 10.0)
+
+    @property
+    def patterns(self) -> List[Dict[str, Any]]:
+        """Patterns the review prompt focuses on."""
+        return self._patterns
+
+    @patterns.setter
+    def patterns(self, patterns: List[Dict[str, Any]]) -> None:
+        self._patterns = patterns
+        # Rebuilt on the next review; the prefix only depends on the patterns
+        self._prompt_prefix: Optional[str] = None
+
+    def clear_cache(self) -> None:
+        """Forget cached LLM responses so the next calls go to the provider."""
+        self._response_cache.clear()
+        if self._disk_cache is not None:
+            self._disk_cache.clear()
+
+    def _call_llm(
+        self,
+        prompt: str,
+        max_tokens: int,
+        cache_segments: Optional[List[str]] = None,
+        model_tier: Optional[str] = None,
+        prediction: Optional[str] = None,
+    ) -> Dict[str, Any]:
         """Unified call helper that supports both the legacy LLMManager and the
         new `LLMClient` interface. Returns a dict with at least the `text`
         key and optional `provider` and `model` keys.
+
+        `cache_segments` lists leading chunks of the prompt that repeat across
+        calls; the LLM manager marks them for provider prompt caching.
+        `model_tier="fast"` asks the manager for the provider's smaller model.
+        `prediction` is text the response is expected to largely repeat, which
+        providers with predicted outputs use to speed up decoding.
+        Responses to identical prompts are served from an in-process cache,
+        backed by an on-disk cache that persists across runs.
+        """
+        cache_key = self._response_cache_key(prompt, max_tokens, model_tier)
+        cached = self._response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        disk_key = _DiskResponseCache.key(cache_key)
+        if self._disk_cache is not None:
+            cached = self._disk_cache.get(disk_key)
+            if cached is not None:
+                self._response_cache.put(cache_key, cached)
+                return cached
+
+        hints = {
+            "cache_segments": cache_segments,
+            "model_tier": model_tier,
+            "prediction": prediction,
+        }
+        response = self._call_llm_uncached(
+            prompt, max_tokens, {name: value for name, value in hints.items() if value}
+        )
+        if response.get("text"):
+            self._response_cache.put(cache_key, response)
+            if self._disk_cache is not None:
+                self._disk_cache.put(disk_key, response)
+        return response
+
+    def _call_llm_stream(
+        self,
+        prompt: str,
+        max_tokens: int,
+        cache_segments: Optional[List[str]] = None,
+        model_tier: Optional[str] = None,
+        answered_by: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[str]:
+        """Streaming counterpart of _call_llm.
+
+        Cached responses are yielded whole. Otherwise chunks are yielded as the
+        provider produces them, and the complete text is cached once the stream
+        finishes so a repeated request is answered without the LLM.
+
+        Args:
+            prompt: Full prompt text
+            max_tokens: Output token limit
+            cache_segments: Leading prompt chunks to mark for prompt caching
+            model_tier: "fast" to use the provider's smaller model
+            answered_by: Optional dict that receives the `provider` and `model`
+                of the response
+
+        Yields:
+            Response text chunks
+        """
+        if answered_by is None:
+            answered_by = {}
+
+        # LLMClient has no streaming interface; yield its full response
+        if getattr(self, "llm_client", None) is not None:
+            response = self._call_llm(prompt, max_tokens)
+            answered_by["provider"] = response.get("provider")
+            answered_by["model"] = response.get("model")
+            yield response["text"] or ""
+            return
+
+        cache_key = self._response_cache_key(prompt, max_tokens, model_tier)
+        disk_key = _DiskResponseCache.key(cache_key)
+        cached = self._response_cache.get(cache_key)
+        if cached is None and self._disk_cache is not None:
+            cached = self._disk_cache.get(disk_key)
+        if cached is not None:
+            answered_by["provider"] = cached.get("provider")
+            answered_by["model"] = cached.get("model")
+            yield cached["text"]
+            return
+
+        kwargs: Dict[str, Any] = {"cache_segments": cache_segments} if cache_segments else {}
+        if model_tier:
+            kwargs["model_tier"] = model_tier
+        parts = []
+        stream = self.llm_manager.stream(
+            prompt, max_tokens=max_tokens, fallback=True, answered_by=answered_by, **kwargs
+        )
+        for chunk in stream:
+            parts.append(chunk)
+            yield chunk
+
+        text = "".join(parts)
+        if text:
+            response = {
+                "text": text,
+                "provider": answered_by.get("provider"),
+                "model": answered_by.get("model"),
+            }
+            self._response_cache.put(cache_key, response)
+            if self._disk_cache is not None:
+                self._disk_cache.put(disk_key, response)
+
+    def _compact(self, code: str) -> str:
+        """Compact code for an LLM prompt using this reviewer's settings."""
+        return _compact_code(code, self.max_review_lines, self.strip_module_docstring)
+
+    def _response_cache_key(
+        self, prompt: str, max_tokens: int, model_tier: Optional[str] = None
+    ) -> Tuple[Any, ...]:
+        """Return the response-cache key for a prompt sent to the preferred provider."""
+        provider = getattr(self.llm_manager, "preferred_provider", None)
+        return _ResponseCache.key(prompt, max_tokens, provider) + (
+            model_tier,
+            self._backend_identity(),
+        )
+
+    def _backend_identity(self) -> str:
+        """Name the client or manager that answers prompts, for cache keys.
+
+        The disk cache is shared across processes, so a response from an injected
+        LLMClient or a substitute manager must not be served as a provider's.
+
+        Returns:
+            Class name of the LLMClient, with its model, or of the LLM manager
+        """
+        client = getattr(self, "llm_client", None)
+        if client is not None:
+            return f"{type(client).__qualname__}:{getattr(client, 'model', None)}"
+        return type(self.llm_manager).__qualname__
+
+    def _triage(
+        self, code: str, compacted: str
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Decide how to review code before any LLM call.
+
+        The syntax check runs on the code as submitted, so reported line numbers
+        match the user's source; the model tier follows the compacted size.
+
+        Args:
+            code: Code to review, as submitted
+            compacted: The same code after _compact
+
+        Returns:
+            Tuple of (local result for code with a syntax error, else None; model
+            tier for the LLM review: "fast" for short or boilerplate code)
+        """
+        if not self.local_syntax_check:
+            return None, None
+
+        try:
+            tree = ast.parse(textwrap.dedent(code))
+        except SyntaxError as e:
+            message = f"Syntax error at line {e.lineno}: {e.msg}"
+            return {
+                "review": f"{message}. Fix it before requesting a full review.",
+                "provider": "local",
+                "model": None,
+                "debrief": {
+                    "strategies": [f"Fix the syntax error at line {e.lineno} ({e.msg})."],
+                    "difficulty": 1,
+                    "explanation": "The code does not parse, so it was not sent for review.",
+                },
+            }, None
+
+        if (
+            len(compacted) < self.fast_model_max_chars
+            or compacted.count("\n") < self.fast_model_max_lines
+            or _is_pure_boilerplate(tree)
+        ):
+            return None, "fast"
+        return None, "quality"
+
+    def _local_lint(self, code: str) -> List[Dict[str, Any]]:
+        """Run the local linter over code.
+
+        Args:
+            code: Python source to lint
+
+        Returns:
+            Lint findings, see _run_ruff
+        """
+        return _run_ruff(code, self.lint_timeout)
+
+    def _llm_available(self) -> bool:
+        """Check whether an LLMClient or any LLM manager provider can serve requests.
+
+        Returns:
+            True if a prompt can be sent
+        """
+        return getattr(self, "llm_client", None) is not None or self.llm_manager.is_any_available()
+
+    def _call_llm_uncached(
+        self, prompt: str, max_tokens: int, hints: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Send a prompt to the LLM client or manager without consulting the cache.
+
+        Args:
+            prompt: Full prompt text
+            max_tokens: Output token limit
+            hints: Provider kwargs for the LLM manager (ignored by LLMClient)
+
+        Returns:
+            Dict with `text`, `provider` and `model` keys
         """
         # Prefer LLMClient if available
         if getattr(self, "llm_client", None) is not None:
@@ -72,21 +1116,537 @@ class CodeReviewer:
                 "model": getattr(result, "model", None),
             }
 
-        # Legacy manager path
-        response = self.llm_manager.generate(prompt, max_tokens=max_tokens, fallback=True)
-        return {"text": response.text, "provider": response.provider, "model": response.model}
-    def review_code(self, code: str, context: Optional[str] = None) -> Dict[str, Any]:
-        """Review code with pattern awareness.
+        # Legacy manager path
+        if self.race_providers:
+            response = self.llm_manager.generate_first(
+                prompt, timeout=self.race_timeout, max_tokens=max_tokens, **hints
+            )
+        else:
+            response = _hedged(
+                lambda: self.llm_manager.generate(
+                    prompt, max_tokens=max_tokens, fallback=True, **hints
+                ),
+                self.hedge_requests,
+                self.hedge_delay,
+            )
+        return {"text": response.text, "provider": response.provider, "model": response.model}
+
+    def review_code(self, code: str, context: Optional[str] = None) -> Dict[str, Any]:
+        """Review code with pattern awareness.
+
+        Args:
+            code: Code to review
+            context: Optional context about the code
+
+        Returns:
+            Dictionary with review results including debrief, plus local lint
+            findings under `lint` when local_lint is enabled
+        """
+        invalid = self._validate_review_request(code)
+        if invalid is not None:
+            return invalid
+
+        cache_key = self._review_cache_key(code, context)
+        if self._disk_cache is not None:
+            cached = self._disk_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        result = None
+        if _count_tokens(code) > self.max_input_tokens:
+            chunks = _split_code(textwrap.dedent(code), self.max_input_tokens)
+            if len(chunks) > 1:
+                result = self._review_chunks(code, chunks, context)
+        if result is None:
+            result = self._review_single(code, context)
+
+        if self._disk_cache is not None and _is_complete_review(result):
+            self._disk_cache.put(cache_key, result)
+        return result
+
+    def _review_cache_key(self, code: str, context: Optional[str]) -> str:
+        """Build the disk cache key for a full review_code result.
+
+        The key covers the inputs, the client or manager answering prompts, the
+        review prompt prefix (and so the pattern catalog) and every setting that
+        shapes the result, so a changed pattern library, client, provider, token
+        budget, compaction, triage or lint setting never serves a stale review.
+
+        Args:
+            code: Code under review
+            context: Optional context about the code
+
+        Returns:
+            Disk cache key
+        """
+        settings = (
+            _REVIEW_CACHE_VERSION,
+            self._backend_identity(),
+            self.llm_manager.preferred_provider,
+            self.max_tokens,
+            self.max_tokens_debrief,
+            self.max_input_tokens,
+            self.max_review_lines,
+            self.local_syntax_check,
+            self.fast_model_max_chars,
+            self.fast_model_max_lines,
+            self.local_lint,
+            self.strip_module_docstring,
+            self.combined_debrief,
+        )
+        prefix, _ = self._review_prompt_parts("")
+        digest = hashlib.blake2b(digest_size=16)
+        for part in (repr(settings), prefix, code, context or ""):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return f"review|{digest.hexdigest()}"
+
+    def _review_single(
+        self, code: str, context: Optional[str] = None, with_debrief: bool = True
+    ) -> Dict[str, Any]:
+        """Review code that fits in one request.
+
+        Args:
+            code: Validated code to review
+            context: Optional context about the code
+            with_debrief: Whether to generate a debrief for this review
+
+        Returns:
+            review_code-style result
+        """
+        compacted = self._compact(code)
+        local_result, model_tier = self._triage(code, compacted)
+        if local_result is not None:
+            return local_result
+
+        # Lint locally while the LLM works on the review. The linter sees the code
+        # as submitted, so its line numbers match the user's source; only the
+        # prompt uses the compacted text.
+        lint_future = (
+            _LINT_EXECUTOR.submit(self._local_lint, textwrap.dedent(code))
+            if self.local_lint
+            else None
+        )
+        code = compacted
+
+        # Build review prompt; the fixed prefix is marked cacheable
+        combined = with_debrief and self.combined_debrief
+        prefix, suffix, max_tokens = self._review_request(code, context, combined)
+
+        try:
+            # Get LLM review
+            response = self._call_llm(
+                prefix + suffix, max_tokens, cache_segments=[prefix], model_tier=model_tier
+            )
+
+            # Parse response
+            review, debrief = response["text"], None
+            if combined:
+                review, debrief = _split_combined_review(review)
+            result = {
+                "review": review,
+                "provider": response.get("provider"),
+                "model": response.get("model"),
+            }
+            if with_debrief:
+                # Fall back to a separate debrief call if the model left it out
+                result["debrief"] = debrief or self.generate_debrief(code, review, context)
+
+        except Exception as e:
+            logger.error(f"Code review failed: {e}")
+            result = {
+                "error": f"Code review failed: {e}",
+                "suggestions": [],
+                "debrief": {
+                    "strategies": [
+                        "Check if the LLM service is available and responding.",
+                        "Verify API keys are valid and have sufficient quota.",
+                        "Try again after a short wait if this is a temporary service issue.",
+                    ],
+                    "difficulty": 3,
+                    "explanation": "Review failed due to an error during processing.",
+                },
+            }
+
+        if lint_future is not None:
+            result["lint"] = lint_future.result()
+        return result
+
+    def _review_chunks(
+        self, code: str, chunks: List[Tuple[int, str]], context: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Review oversize code in parts concurrently and merge the results.
+
+        Every part shares the cached review prompt prefix. One debrief is
+        generated for the combined review.
+
+        Args:
+            code: Full code being reviewed
+            chunks: (first line number, chunk source) pairs from _split_code
+            context: Optional context about the code
+
+        Returns:
+            review_code-style result with a `chunks` count, plus `failed_chunks`
+            when some parts could not be reviewed
+        """
+        with ThreadPoolExecutor(
+            max_workers=min(len(chunks), self.batch_size), thread_name_prefix="review-chunk"
+        ) as executor:
+            results = list(
+                executor.map(
+                    lambda chunk: self._review_single(chunk[1], context, with_debrief=False),
+                    chunks,
+                )
+            )
+
+        reviewed = [
+            (start, chunk, result)
+            for (start, chunk), result in zip(chunks, results)
+            if "review" in result
+        ]
+        if not reviewed:
+            return results[0]
+
+        sections = []
+        for start, chunk, result in reviewed:
+            end = start + len(chunk.splitlines()) - 1
+            sections.append(f"### Lines {start}-{end}\n\n{result['review']}")
+        review = "\n\n".join(sections)
+
+        merged: Dict[str, Any] = {
+            "review": review,
+            "provider": reviewed[0][2].get("provider"),
+            "model": reviewed[0][2].get("model"),
+            "debrief": self.generate_debrief(self._compact(code), review, context),
+            "chunks": len(chunks),
+        }
+        if len(reviewed) < len(chunks):
+            merged["failed_chunks"] = len(chunks) - len(reviewed)
+        if self.local_lint:
+            # Each part was linted as submitted; line numbers are shifted back to
+            # positions in the full code
+            merged["lint"] = [
+                dict(finding, line=(finding["line"] or 1) + start - 1)
+                for (start, _), result in zip(chunks, results)
+                for finding in result.get("lint", [])
+            ]
+        return merged
+
+    async def review_code_async(
+        self, code: str, context: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Async variant of review_code().
+
+        The review runs in a worker thread, so an event loop (e.g. a FastAPI
+        handler) stays responsive and concurrent reviews overlap.
+
+        Args:
+            code: Code to review
+            context: Optional context about the code
+
+        Returns:
+            Dictionary with review results including debrief
+        """
+        return await asyncio.to_thread(self.review_code, code, context)
+
+    def review_batch(
+        self, snippets: List[Tuple[str, Optional[str]]]
+    ) -> List[Dict[str, Any]]:
+        """Review several snippets with one LLM request per batch_size snippets.
+
+        The snippets share the cacheable review prefix and the model is asked for
+        a JSON array with one review per snippet. If a batch response cannot be
+        parsed, its snippets are reviewed one at a time with review_code.
+
+        Args:
+            snippets: (code, context) pairs to review
+
+        Returns:
+            One review_code-style result per snippet, in input order
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(snippets)
+        batch: List[Tuple[int, str, Optional[str]]] = []
+        for index, (code, context) in enumerate(snippets):
+            invalid = self._validate_review_request(code)
+            if invalid is None:
+                invalid, _ = self._triage(code, self._compact(code))
+            if invalid is not None:
+                results[index] = invalid
+            else:
+                batch.append((index, code, context))
+
+        size = max(1, self.batch_size)
+        for start in range(0, len(batch), size):
+            group = batch[start : start + size]
+            reviews = self._review_group(group) if len(group) > 1 else None
+            for position, (index, code, context) in enumerate(group):
+                if reviews is None:
+                    results[index] = self.review_code(code, context)
+                    continue
+                text, provider, model = reviews[position]
+                results[index] = {
+                    "review": text,
+                    "provider": provider,
+                    "model": model,
+                    "debrief": self.generate_debrief(self._compact(code), text, context),
+                }
+
+        return results  # type: ignore[return-value]
+
+    def _review_group(
+        self, group: List[Tuple[int, str, Optional[str]]]
+    ) -> Optional[List[Tuple[str, Optional[str], Optional[str]]]]:
+        """Review a batch of snippets in one request.
+
+        Args:
+            group: (index, code, context) of each snippet
+
+        Returns:
+            (review, provider, model) per snippet in group order, or None if the
+            request failed or its response could not be parsed
+        """
+        prefix, _ = self._review_prompt_parts("")
+        sections = ["\n## Snippets to Review:\n"]
+        for number, (_, code, context) in enumerate(group, 1):
+            sections.append(
+                f"\n### Snippet {number}\n\n```python\n{self._compact(code)}\n```\n"
+            )
+            if context:
+                sections.append(f"\nContext: {context}\n")
+        sections.append(
+            "\n## Output Format:\n"
+            "Respond with only a JSON array containing one object per snippet, "
+            'in order: [{"id": 1, "review": "..."}, {"id": 2, "review": "..."}]\n'
+        )
+        prompt = prefix + "".join(sections)
+
+        try:
+            max_tokens = sum(
+                _output_token_budget(self._compact(code), self.max_tokens) for _, code, _ in group
+            )
+            response = self._call_llm(prompt, max_tokens, cache_segments=[prefix])
+            text = response["text"] or ""
+            items = json.loads(text[text.index("[") : text.rindex("]") + 1])
+            reviews = {int(item["id"]): str(item["review"]) for item in items}
+            return [
+                (reviews[number], response.get("provider"), response.get("model"))
+                for number in range(1, len(group) + 1)
+            ]
+        except Exception as e:
+            logger.warning(f"Batch review failed, reviewing snippets individually: {e}")
+            return None
+
+    def review_many(self, snippets: List[Tuple[str, Optional[str]]]) -> List[Dict[str, Any]]:
+        """Review several snippets concurrently, one request per snippet.
+
+        Synchronous counterpart of review_many_async for callers without an
+        event loop, such as CI scripts; reviews run on a thread pool of
+        `concurrency` workers.
+
+        Args:
+            snippets: (code, context) pairs to review
+
+        Returns:
+            One review_code result per snippet, in input order
+        """
+        if not snippets:
+            return []
+        workers = max(1, min(self.concurrency, len(snippets)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda snippet: self.review_code(*snippet), snippets))
+
+    async def review_batch_async(
+        self, snippets: List[Tuple[str, Optional[str]]]
+    ) -> List[Dict[str, Any]]:
+        """Async variant of review_batch(), run in a worker thread.
+
+        Args:
+            snippets: (code, context) pairs to review
+
+        Returns:
+            One review_code-style result per snippet, in input order
+        """
+        return await asyncio.to_thread(self.review_batch, snippets)
+
+    async def review_many_async(
+        self, snippets: List[Tuple[str, Optional[str]]]
+    ) -> List[Dict[str, Any]]:
+        """Review several snippets concurrently, one request per snippet.
+
+        Unlike review_batch, every snippet gets its own full review and debrief;
+        wall-clock time is close to that of the slowest review. At most
+        `concurrency` reviews are in flight at once to stay within provider
+        rate limits.
+
+        Args:
+            snippets: (code, context) pairs to review
+
+        Returns:
+            One review_code result per snippet, in input order
+        """
+        semaphore = asyncio.Semaphore(max(1, self.concurrency))
+
+        async def review(code: str, context: Optional[str]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.review_code_async(code, context)
+
+        return list(await asyncio.gather(*(review(code, context) for code, context in snippets)))
+
+    async def explain_issue_async(self, issue_description: str, verbose: bool = False) -> str:
+        """Async variant of explain_issue(), run in a worker thread.
+
+        Args:
+            issue_description: Description of the issue
+            verbose: Allow a long answer instead of a short, bulleted one
+
+        Returns:
+            Detailed explanation
+        """
+        return await asyncio.to_thread(self.explain_issue, issue_description, verbose)
+
+    async def suggest_improvements_async(self, code: str, goal: str) -> str:
+        """Async variant of suggest_improvements(), run in a worker thread.
+
+        Args:
+            code: Current code
+            goal: Improvement goal (e.g., "make it more efficient")
+
+        Returns:
+            Improvement suggestions
+        """
+        return await asyncio.to_thread(self.suggest_improvements, code, goal)
+
+    def review_code_stream(self, code: str, context: Optional[str] = None) -> Iterator[str]:
+        """Review code, yielding the review text as the LLM produces it.
+
+        Unlike review_code, no debrief is generated and failures are not raised:
+        they are logged and yielded as a final error message.
+
+        Args:
+            code: Code to review
+            context: Optional context about the code
+
+        Yields:
+            Chunks of review text
+        """
+        invalid = self._validate_review_request(code)
+        if invalid is not None:
+            yield f"Error: {invalid['error']}\n"
+            return
+
+        compacted = self._compact(code)
+        local_result, model_tier = self._triage(code, compacted)
+        code = compacted
+        if local_result is not None:
+            yield local_result["review"]
+            return
+
+        prefix, suffix = self._review_prompt_parts(code, context)
+        prompt = prefix + suffix
+        max_tokens = _output_token_budget(code, self.max_tokens)
+
+        try:
+            yield from self._call_llm_stream(
+                prompt, max_tokens, cache_segments=[prefix], model_tier=model_tier
+            )
+        except Exception as e:
+            logger.error(f"Code review failed: {e}")
+            yield f"\nError: Code review failed: {e}\n"
+
+    def review_code_events(
+        self, code: str, context: Optional[str] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream a review, then yield its debrief.
+
+        With combined_debrief the prompt asks for the debrief after the review,
+        so no second LLM round-trip is needed; otherwise, or if the model leaves
+        it out, the debrief is generated once the review stream ends. Review
+        text is yielded as it arrives.
 
         Args:
             code: Code to review
             context: Optional context about the code
 
+        Yields:
+            ``{"event": "review", "text": ...}`` chunks, then one
+            ``{"event": "debrief", "debrief": ..., "provider": ..., "model": ...}``,
+            or an ``{"event": "error", "error": ...}`` if the review fails.
+            Code with a syntax error is answered locally, with provider "local".
+        """
+        invalid = self._validate_review_request(code)
+        if invalid is not None:
+            yield {"event": "error", "error": invalid["error"]}
+            return
+
+        compacted = self._compact(code)
+        local_result, model_tier = self._triage(code, compacted)
+        code = compacted
+        if local_result is not None:
+            yield {"event": "review", "text": local_result["review"]}
+            yield {
+                "event": "debrief",
+                "debrief": local_result["debrief"],
+                "provider": "local",
+                "model": None,
+            }
+            return
+
+        combined = self.combined_debrief
+        prefix, suffix, max_tokens = self._review_request(code, context, combined)
+        answered_by: Dict[str, Any] = {}
+        text = ""
+        emitted = 0
+        heading_at = -1
+        try:
+            for chunk in self._call_llm_stream(
+                prefix + suffix,
+                max_tokens,
+                cache_segments=[prefix],
+                model_tier=model_tier,
+                answered_by=answered_by,
+            ):
+                text += chunk
+                if not combined:
+                    yield {"event": "review", "text": chunk}
+                    continue
+                if heading_at >= 0:
+                    continue
+                heading_at = _find_debrief_heading(text, emitted)
+                # Hold back a possible partial heading until the next chunk
+                end = heading_at if heading_at >= 0 else len(text) - len(_DEBRIEF_HEADING)
+                if end > emitted:
+                    yield {"event": "review", "text": text[emitted:end]}
+                    emitted = end
+        except Exception as e:
+            logger.error(f"Code review failed: {e}")
+            yield {"event": "error", "error": f"Code review failed: {e}"}
+            return
+
+        if not combined:
+            debrief = self.generate_debrief(code, text, context)
+        elif heading_at < 0:
+            if len(text) > emitted:
+                yield {"event": "review", "text": text[emitted:]}
+            debrief = self.generate_debrief(code, text, context)
+        else:
+            debrief = _parse_debrief(text[heading_at + len(_DEBRIEF_HEADING) :])
+        yield {
+            "event": "debrief",
+            "debrief": debrief,
+            "provider": answered_by.get("provider"),
+            "model": answered_by.get("model"),
+        }
+
+    def _validate_review_request(self, code: str) -> Optional[Dict[str, Any]]:
+        """Check that code can be sent for review.
+
+        Args:
+            code: Code to review
+
         Returns:
-            Dictionary with review results including debrief
+            Error result (with debrief) to return to the caller, or None if valid
         """
-        # Input validation
-        if not code or not code.strip():
+        if not code or code.isspace():
             return {
                 "error": "No code provided for review.",
                 "suggestions": [],
@@ -97,11 +1657,10 @@ class CodeReviewer:
                 },
             }
 
-        max_code_size = self.config.get("code_review.max_code_size", 50000)
-        if len(code) > max_code_size:
+        if len(code) > self.max_code_size:
             return {
                 "error": (
-                    f"Code too large for review (max {max_code_size} bytes). "
+                    f"Code too large for review (max {self.max_code_size} bytes). "
                     "Please review in smaller chunks."
                 ),
                 "suggestions": [],
@@ -112,7 +1671,7 @@ class CodeReviewer:
                 },
             }
 
-        if not (getattr(self, "llm_client", None) is not None or self.llm_manager.is_any_available()):
+        if not self._llm_available():
             return {
                 "error": "No LLM providers available. Set API keys to use code review.",
                 "suggestions": [],
@@ -125,40 +1684,7 @@ class CodeReviewer:
                 },
             }
 
-        # Build review prompt
-        prompt = self._build_review_prompt(code, context)
-
-        try:
-            # Get LLM review
-            max_tokens = self.config.get("code_review.max_tokens", 2048)
-            response = self._call_llm(prompt, max_tokens)
-
-            # Generate debrief
-            debrief = self.generate_debrief(code, response["text"], context)
-
-            # Parse response
-            return {
-                "review": response["text"],
-                "provider": response.get("provider"),
-                "model": response.get("model"),
-                "debrief": debrief,
-            }
-
-        except Exception as e:
-            logger.error(f"Code review failed: {e}")
-            return {
-                "error": f"Code review failed: {e}",
-                "suggestions": [],
-                "debrief": {
-                    "strategies": [
-                        "Check if the LLM service is available and responding.",
-                        "Verify API keys are valid and have sufficient quota.",
-                        "Try again after a short wait if this is a temporary service issue.",
-                    ],
-                    "difficulty": 3,
-                    "explanation": "Review failed due to an error during processing.",
-                },
-            }
+        return None
 
     def _build_review_prompt(self, code: str, context: Optional[str] = None) -> str:
         """Build review prompt with pattern context.
@@ -170,51 +1696,69 @@ class CodeReviewer:
         Returns:
             Review prompt
         """
-        prompt = """You are an expert code reviewer for the feedback-loop framework.
-
-Review the following Python code and provide:
-1. Pattern violations or missing patterns
-2. Potential bugs or issues
-3. Best practice improvements
-4. Specific, actionable suggestions
+        prefix, suffix = self._review_prompt_parts(code, context)
+        return prefix + suffix
 
-Focus on these key patterns:
-"""
+    def _review_prompt_parts(self, code: str, context: Optional[str] = None) -> Tuple[str, str]:
+        """Split the review prompt into its fixed prefix and per-call suffix.
 
-        # Add key patterns
-        for pattern in self.patterns[:5]:  # Top 5 patterns
-            name = pattern.get("name", "")
-            desc = pattern.get("description", "")
-            prompt += f"- **{name}**: {desc}\n"
+        Args:
+            code: Code to review
+            context: Optional context
 
-        prompt += "\n## Code to Review:\n\n```python\n"
-        prompt += code
-        prompt += "\n```\n"
+        Returns:
+            Tuple of (prefix shared by every review, suffix with the code and context)
+        """
+        if self._prompt_prefix is None:
+            self._prompt_prefix = _review_prompt_prefix(
+                tuple(
+                    (
+                        pattern.get("name", ""),
+                        pattern.get("description", ""),
+                        pattern.get("bad_example", ""),
+                        pattern.get("good_example", ""),
+                    )
+                    for pattern in self._patterns
+                )
+            )
 
-        if context:
-            prompt += f"\n## Context:\n{context}\n"
+        context_section = f"\n## Context:\n{context}\n" if context else ""
+        return (
+            self._prompt_prefix,
+            f"\n## Code to Review:\n\n```python\n{code}\n```\n{context_section}",
+        )
 
-        prompt += """
-## Review Guidelines:
-- Be specific and actionable
-- Reference patterns by name when applicable
-- Prioritize critical issues
-- Suggest concrete code improvements
-- Keep feedback concise but thorough
-"""
+    def _review_request(
+        self, code: str, context: Optional[str], combined: bool
+    ) -> Tuple[str, str, int]:
+        """Build the review prompt parts and output token budget.
 
-        return prompt
+        Args:
+            code: Compacted code to review
+            context: Optional context
+            combined: Ask for the debrief in the same response
 
-    def explain_issue(self, issue_description: str) -> str:
+        Returns:
+            Tuple of (cacheable prefix, suffix, max output tokens)
+        """
+        prefix, suffix = self._review_prompt_parts(code, context)
+        max_tokens = _output_token_budget(code, self.max_tokens)
+        if combined:
+            suffix += _COMBINED_DEBRIEF_INSTRUCTION
+            max_tokens += self.max_tokens_debrief
+        return prefix, suffix, max_tokens
+
+    def explain_issue(self, issue_description: str, verbose: bool = False) -> str:
         """Get detailed explanation of a code issue.
 
         Args:
             issue_description: Description of the issue
+            verbose: Allow a long answer instead of a short, bulleted one
 
         Returns:
             Detailed explanation
         """
-        if not (getattr(self, "llm_client", None) is not None or self.llm_manager.is_any_available()):
+        if not self._llm_available():
             return "No LLM providers available. Set API keys to use this feature."
 
         prompt = f"""Explain this Python code issue in detail:
@@ -229,9 +1773,11 @@ Provide:
 5. Related best practices
 
 Keep it practical and code-focused."""
+        if not verbose:
+            prompt += f"\n{_CONCISE_INSTRUCTION}"
 
         try:
-            max_tokens = self.config.get("code_review.max_tokens_explain", 1500)
+            max_tokens = self.max_tokens_explain if verbose else self.max_tokens_explain_brief
             response = self._call_llm(prompt, max_tokens)
             return response["text"]
         except Exception as e:
@@ -248,13 +1794,14 @@ Keep it practical and code-focused."""
         Returns:
             Improvement suggestions
         """
-        if not (getattr(self, "llm_client", None) is not None or self.llm_manager.is_any_available()):
+        if not self._llm_available():
             return "No LLM providers available. Set API keys to use this feature."
 
+        compacted = self._compact(code)
         prompt = f"""Given this Python code:
 
 ```python
-{code}
+{compacted}
 ```
 
 Goal: {goal}
@@ -264,11 +1811,13 @@ Suggest specific improvements with:
 2. Updated code snippets
 3. Expected benefits
 
-Keep suggestions practical and pattern-aware."""
+Keep suggestions practical and pattern-aware.
+{_CONCISE_INSTRUCTION}"""
 
         try:
-            max_tokens = self.config.get("code_review.max_tokens_suggest", 2048)
-            response = self._call_llm(prompt, max_tokens)
+            max_tokens = _output_token_budget(code, self.max_tokens_suggest)
+            # Suggested code mostly repeats the input, so offer it as the prediction
+            response = self._call_llm(prompt, max_tokens, prediction=compacted)
             return response["text"]
         except Exception as e:
             logger.error(f"Suggestions failed: {e}")
@@ -287,117 +1836,298 @@ Keep suggestions practical and pattern-aware."""
         Returns:
             Dictionary containing improvement strategies and difficulty rating
         """
-        if not (getattr(self, "llm_client", None) is not None or self.llm_manager.is_any_available()):
+        if not self._llm_available():
             return {
                 "strategies": ["No LLM providers available. Set API keys to use this feature."],
                 "difficulty": 5,
                 "explanation": "Cannot generate debrief without LLM access.",
             }
 
-        prompt = """Based on the code review provided, generate a debrief that includes:
+        parts = [
+            _DEBRIEF_PROMPT_HEADER,
+            "\n## Code Reviewed:\n```python\n",
+            code,
+            "\n```\n\n## Review Feedback:\n",
+            review,
+            "\n",
+        ]
+        if context:
+            parts.extend(("\n## Context:\n", context, "\n"))
+        parts.append(_DEBRIEF_OUTPUT_FORMAT)
+        prompt = "".join(parts)
 
-1. **Improvement Strategies**: 3-5 specific, actionable strategies the
-   developer can use to improve their code quality and avoid similar issues in
-   future submissions.
-2. **Difficulty Rating**: Rate the difficulty of executing these improvements
-   on a scale of 1-10, where:
-   - 1-3: Easy (simple changes, no architectural impact)
-   - 4-6: Moderate (requires refactoring or new patterns)
-   - 7-9: Hard (significant architectural changes or deep understanding needed)
-   - 10: Very Hard (requires extensive rewrite or advanced expertise)
+        try:
+            max_tokens = self.max_tokens_debrief
+            response = self._call_llm(prompt, max_tokens)
+            return _parse_debrief(response["text"])
 
-## Code Reviewed:
-```python
-{code}
-```
+        except Exception as e:
+            logger.error(f"Debrief generation failed: {e}")
+            return {
+                "strategies": [f"Could not generate debrief: {e}"],
+                "difficulty": 5,
+                "explanation": _DEBRIEF_ERROR_EXPLANATION,
+            }
 
-## Review Feedback:
-{review}
-"""
 
-        if context:
-            prompt += f"\n## Context:\n{context}\n"
+def _is_complete_review(result: Dict[str, Any]) -> bool:
+    """Check whether a review_code result is worth storing in the disk cache.
 
-        prompt += """
-## Output Format:
-Provide your response in the following format:
+    Args:
+        result: review_code result
 
-**Improvement Strategies:**
-1. [Strategy 1]
-2. [Strategy 2]
-3. [Strategy 3]
-...
+    Returns:
+        False for errors, partially failed chunked reviews and failed debriefs
+    """
+    if "error" in result or result.get("failed_chunks"):
+        return False
+    debrief = result.get("debrief") or {}
+    return debrief.get("explanation") != _DEBRIEF_ERROR_EXPLANATION
+
+
+# Number of patterns named in council review prompts
+_COUNCIL_FOCUS_PATTERNS = 5
+
+# Line-level pattern checks for get_pattern_connections. The regexes never match
+# across a newline, so each one scans the whole source in a single pass. Every
+# match contains the check's `literal`, so sources without it skip the regex.
+_PATTERN_CHECKS: Dict[str, Dict[str, Any]] = {
+    "numpy_json_serialization": {
+        "regex": re.compile(r"json\.dumps\([^)\n]*np\.|json\.dumps\([^)\n]*numpy"),
+        "literal": "json.dumps(",
+        "description": "NumPy types in JSON serialization",
+        "severity": "high",
+    },
+    "bounds_checking": {
+        "regex": re.compile(r"\w+\[0\](?![^\S\n]+if[^\S\n]+\w+)"),
+        "literal": "[0]",
+        "description": "List access without bounds checking",
+        "severity": "medium",
+    },
+    "specific_exceptions": {
+        "regex": re.compile(r"except[^\S\n]*:"),
+        "literal": "except",
+        "description": "Bare except clause",
+        "severity": "medium",
+    },
+    "structured_logging": {
+        "regex": re.compile(r"\bprint[^\S\n]*\("),
+        "literal": "print",
+        "description": "Using print instead of logging",
+        "severity": "low",
+    },
+    "temp_file_handling": {
+        "regex": re.compile(r"tempfile\.mktemp\("),
+        "literal": "tempfile.mktemp(",
+        "description": "Using deprecated mktemp function",
+        "severity": "high",
+    },
+}
+
+
+# Quick-fix text for each _PATTERN_CHECKS entry, used by generate_quick_fixes
+_QUICK_FIX_TEMPLATES: Dict[str, Dict[str, str]] = {
+    "numpy_json_serialization": {
+        "title": "Convert NumPy types for JSON serialization",
+        "fix": "Use float() and .tolist() for NumPy types",
+        "example": "result = {'mean': float(np.mean(data)), 'values': data.tolist()}",
+    },
+    "bounds_checking": {
+        "title": "Add bounds checking for list access",
+        "fix": "Check list length before accessing elements",
+        "example": "first = items[0] if items else None",
+    },
+    "specific_exceptions": {
+        "title": "Use specific exception handling",
+        "fix": "Catch specific exceptions instead of bare except",
+        "example": "except json.JSONDecodeError as e:",
+    },
+    "structured_logging": {
+        "title": "Replace print with proper logging",
+        "fix": "Use logger instead of proper logging",
+        "example": 'logger.debug(f"Processing {filename}")',
+    },
+    "temp_file_handling": {
+        "title": "Use secure temporary file handling",
+        "fix": "Replace mktemp with NamedTemporaryFile",
+        "example": "with tempfile.NamedTemporaryFile() as tmp:",
+    },
+}
+
+
+# Single-line rewrites used by CouncilCodeReviewer._generate_line_fix
+_PRINT_CALL_RE = re.compile(r"print\s*\(")
+
+# Line breaks indexed by _scan_pattern_checks to map match offsets to line numbers
+_NEWLINE_RE = re.compile("\n")
+
+
+def _is_call_to(node: ast.AST, module: str, name: Optional[str] = None) -> bool:
+    """Return True if node calls module.name (any attribute of module if name is None)."""
+    return (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Attribute)
+        and isinstance(node.func.value, ast.Name)
+        and node.func.value.id == module
+        and (name is None or node.func.attr == name)
+    )
+
+
+def _rewrite_line(
+    line: str, rewrite: Callable[[ast.AST, str], Optional[Tuple[ast.AST, str]]]
+) -> str:
+    """Rewrite parts of one line of code through its syntax tree.
+
+    Block openers are parsed with a placeholder body; other lines that do not
+    parse on their own (parts of multi-line statements) are returned unchanged,
+    so a rewrite never yields invalid code.
 
-**Difficulty Rating:** [1-10]
+    Args:
+        line: Line of code, with its indentation
+        rewrite: Called with each node and the stripped line; returns the node to
+            replace (itself or a descendant) and its replacement source, or None
 
-**Explanation:**
-[Brief explanation of why this difficulty rating was assigned and what makes
-these improvements more or less challenging]
-"""
+    Returns:
+        The rewritten line, or the line unchanged if nothing applies
+    """
+    stripped = line.strip()
+    try:
+        tree = ast.parse(stripped + " pass" if stripped.endswith(":") else stripped)
+    except SyntaxError:
+        return line
+
+    # Node offsets count UTF-8 bytes; outer edits win over edits nested inside them
+    source = stripped.encode("utf-8")
+    edits: List[Tuple[int, int, str]] = []
+    for node in ast.walk(tree):
+        edit = rewrite(node, stripped)
+        if edit is None:
+            continue
+        target, replacement = edit
+        start, end = target.col_offset, target.end_col_offset
+        if not any(low <= start and end <= high for low, high, _ in edits):
+            edits.append((start, end, replacement))
+    if not edits:
+        return line
+
+    for start, end, replacement in sorted(edits, reverse=True):
+        source = source[:start] + replacement.encode("utf-8") + source[end:]
+    return line[: len(line) - len(line.lstrip())] + source.decode("utf-8")
+
+
+def _numpy_json_edit(node: ast.AST, line: str) -> Optional[Tuple[ast.AST, str]]:
+    """Wrap NumPy results in float() or .tolist() (see _rewrite_line)."""
+    # x = np.mean(data)  ->  x = float(np.mean(data))
+    if isinstance(node, ast.Assign) and _is_call_to(node.value, "np"):
+        return node.value, f"float({ast.get_source_segment(line, node.value)})"
+    if not _is_call_to(node, "json", "dumps") or not node.args:
+        return None
+
+    value = node.args[0]
+    segment = ast.get_source_segment(line, value)
+    if isinstance(value, (ast.Dict, ast.List, ast.Tuple, ast.Set)):
+        # {"mean": np.mean(data)}  ->  {"mean": float(np.mean(data))}
+        items = value.values if isinstance(value, ast.Dict) else value.elts
+        calls = [item for item in items if _is_call_to(item, "np")]
+        if not calls:
+            return None
+        for call in sorted(calls, key=lambda item: item.col_offset, reverse=True):
+            start = call.col_offset - value.col_offset
+            end = call.end_col_offset - value.col_offset
+            encoded = segment.encode("utf-8")
+            segment = (
+                encoded[:start] + b"float(" + encoded[start:end] + b")" + encoded[end:]
+            ).decode("utf-8")
+        return value, segment
+    if isinstance(value, ast.Call) and isinstance(value.func, ast.Attribute):
+        if value.func.attr == "tolist":
+            return None
+    if not isinstance(value, (ast.Name, ast.Attribute, ast.Call, ast.Subscript)):
+        segment = f"({segment})"
+    # json.dumps(data)  ->  json.dumps(data.tolist())
+    return value, f"{segment}.tolist()"
 
-        try:
-            max_tokens = self.config.get("code_review.max_tokens_debrief", 1500)
-            response = self._call_llm(prompt, max_tokens)
 
-            # Parse the response
-            debrief_text = response["text"]
-            strategies = []
-            difficulty = 5
-            explanation = ""
-
-            # Extract strategies
-            if "**Improvement Strategies:**" in debrief_text:
-                strategies_section = debrief_text.split("**Improvement Strategies:**")[1]
-                if "**Difficulty Rating:**" in strategies_section:
-                    strategies_section = strategies_section.split("**Difficulty Rating:**")[0]
-
-                # Parse numbered list using regex for better handling
-                lines = strategies_section.strip().split("\n")
-                for line in lines:
-                    line = line.strip()
-                    if line:
-                        # Match numbered lists (1., 2., etc), bullet points (-, *), or simple text
-                        # Pattern: optional number/bullet + optional space + content
-                        match = re.match(r"^(?:\d+\.|\*|\-)?\s*(.+)$", line)
-                        if match:
-                            clean_line = match.group(1).strip()
-                            if clean_line:
-                                strategies.append(clean_line)
-
-            # Extract difficulty rating
-            if "**Difficulty Rating:**" in debrief_text:
-                rating_section = debrief_text.split("**Difficulty Rating:**")[1]
-                if "**Explanation:**" in rating_section:
-                    rating_text = rating_section.split("**Explanation:**")[0].strip()
-                else:
-                    rating_text = rating_section.strip().split("\n")[0].strip()
-
-                # Extract number from the beginning of rating text
-                numbers = re.findall(r"^\s*(\d+)", rating_text)
-                if numbers:
-                    difficulty = min(10, max(1, int(numbers[0])))
-
-            # Extract explanation
-            if "**Explanation:**" in debrief_text:
-                explanation = debrief_text.split("**Explanation:**")[1].strip()
-
-            # Fallback if parsing failed
-            if not strategies:
-                strategies = [debrief_text]
+def _mktemp_edit(node: ast.AST, line: str) -> Optional[Tuple[ast.AST, str]]:
+    """Replace a tempfile.mktemp() call with NamedTemporaryFile (see _rewrite_line)."""
+    # mktemp's positional parameters do not line up with NamedTemporaryFile's
+    if not _is_call_to(node, "tempfile", "mktemp") or node.args:
+        return None
+    arguments = "".join(
+        f", {ast.get_source_segment(line, keyword)}" for keyword in node.keywords
+    )
+    return node, f"tempfile.NamedTemporaryFile(delete=False{arguments}).name"
 
-            return {
-                "strategies": strategies,
-                "difficulty": difficulty,
-                "explanation": explanation,
-            }
 
-        except Exception as e:
-            logger.error(f"Debrief generation failed: {e}")
-            return {
-                "strategies": [f"Could not generate debrief: {e}"],
-                "difficulty": 5,
-                "explanation": "Error during debrief generation.",
-            }
+def _fix_numpy_json(line: str) -> str:
+    """Convert NumPy results to Python types before JSON serialization."""
+    # Cheap literal check keeps lines that cannot match away from the parser
+    if "np." not in line and "json.dumps(" not in line:
+        return line
+    return _rewrite_line(line, _numpy_json_edit)
+
+
+def _fix_bare_except(line: str) -> str:
+    """Catch Exception instead of using a bare except."""
+    return line.replace("except:", "except Exception as e:")
+
+
+def _fix_print_call(line: str) -> str:
+    """Send print() output to the logger."""
+    if "print(" not in line:
+        return line
+    # Plain replace suffices unless some call has whitespace before "("
+    if line.count("print") == line.count("print("):
+        return line.replace("print(", "logger.info(")
+    return _PRINT_CALL_RE.sub("logger.info(", line)
+
+
+def _fix_mktemp(line: str) -> str:
+    """Replace the insecure tempfile.mktemp with NamedTemporaryFile."""
+    if "tempfile.mktemp(" not in line:
+        return line
+    return _rewrite_line(line, _mktemp_edit)
+
+
+# Single-line fixer for each _PATTERN_CHECKS entry; bounds_checking has no safe
+# one-line rewrite, so it only gets a quick-fix description
+_LINE_FIXERS: Dict[str, Callable[[str], str]] = {
+    "numpy_json_serialization": _fix_numpy_json,
+    "specific_exceptions": _fix_bare_except,
+    "structured_logging": _fix_print_call,
+    "temp_file_handling": _fix_mktemp,
+}
+
+
+@lru_cache(maxsize=64)
+def _scan_pattern_checks(code: str) -> Tuple[Tuple[int, str, str], ...]:
+    """Find the lines of code matching each check in _PATTERN_CHECKS.
+
+    Line numbers and text come from a newline offset index, so the source is
+    never split into a list of line strings.
+
+    Args:
+        code: Source to scan
+
+    Returns:
+        Sorted (line number, pattern name, stripped line text) triples, at most
+        one per line and pattern, ordered by line and then by check order
+    """
+    newline_offsets = [match.start() for match in _NEWLINE_RE.finditer(code)]
+    hits = set()
+    for order, check in enumerate(_PATTERN_CHECKS.values()):
+        if check["literal"] not in code:
+            continue
+        for match in check["regex"].finditer(code):
+            hits.add((bisect_right(newline_offsets, match.start()) + 1, order))
+
+    names = list(_PATTERN_CHECKS)
+    results = []
+    for line_num, order in sorted(hits):
+        start = newline_offsets[line_num - 2] + 1 if line_num > 1 else 0
+        end = newline_offsets[line_num - 1] if line_num <= len(newline_offsets) else len(code)
+        results.append((line_num, names[order], code[start:end].strip()))
+    return tuple(results)
 
 
 class CouncilCodeReviewer:
@@ -412,7 +2142,8 @@ class CouncilCodeReviewer:
     ):
         self.config = ConfigManager()
         self.pattern_manager = PatternManager()
-        self.patterns = self.pattern_manager.get_all_patterns()
+        # Only the leading patterns are named in council prompts
+        self.patterns = self.pattern_manager.get_top_patterns(_COUNCIL_FOCUS_PATTERNS)
 
         self.prefer_local = (
             prefer_local
@@ -431,25 +2162,78 @@ class CouncilCodeReviewer:
         self.max_tokens = self.config.get("council_review.max_tokens", 1200)
         self.provider = provider or self.config.get("council_review.provider")
 
+        self._response_cache = _ResponseCache(
+            max_entries=self.config.get("council_review.response_cache_size", 256),
+            ttl_seconds=self.config.get("council_review.response_cache_ttl", 3600),
+        )
+        # Keep-alive session for the consult endpoint, created on first HTTP review
+        self._http_session: Any = None
+        # Set once importing council_ai fails; a failed import is never cached by
+        # Python, so retrying would search sys.path again on every review
+        self._council_unavailable = False
+        # Hedged copies of each HTTP review request (1 = off), see CodeReviewer
+        self.hedge_requests = self.config.get("council_review.hedge_requests", 1)
+        self.hedge_delay = self.config.get("council_review.hedge_delay", 0.0)
+
     def review_code(
         self, code: str, context: Optional[str] = None, api_key: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Review code with Council AI, falling back to HTTP API."""
-        if not code or not code.strip():
+        """Review code with Council AI, falling back to HTTP API.
+
+        Successful reviews are cached, so resubmitting identical code and
+        context skips the council round-trip. The key includes a digest of
+        api_key, so a review is only reused for the caller that fetched it.
+        """
+        if not code or code.isspace():
             return {"error": "No code provided for review.", "responses": []}
 
         prompt = self._build_review_prompt(code, context)
+        key_digest = (
+            hashlib.blake2b(api_key.encode("utf-8"), digest_size=16).hexdigest()
+            if api_key
+            else None
+        )
+        cache_key = _ResponseCache.key(prompt, self.max_tokens, self.provider) + (
+            self.domain,
+            self.mode,
+            self.temperature,
+            key_digest,
+        )
+        cached = self._response_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
+        result = None
         if self.prefer_local:
-            local_result = self._review_local(prompt, api_key)
-            if local_result:
-                return local_result
+            result = self._review_local(prompt, api_key)
+        if not result:
+            result = self._review_http(prompt, api_key)
+
+        if "error" not in result:
+            self._response_cache.put(cache_key, result)
+        return result
+
+    def clear_cache(self) -> None:
+        """Forget cached council reviews."""
+        self._response_cache.clear()
+
+    @property
+    def patterns(self) -> List[Dict[str, Any]]:
+        """Patterns named in the council review prompt."""
+        return self._patterns
 
-        return self._review_http(prompt, api_key)
+    @patterns.setter
+    def patterns(self, patterns: List[Dict[str, Any]]) -> None:
+        self._patterns = patterns
+        # Rebuilt on the next review; the prefix only depends on the patterns
+        self._prompt_prefix: Optional[str] = None
 
     def _build_review_prompt(self, code: str, context: Optional[str] = None) -> str:
         """Build review prompt with pattern context for council review."""
-        prompt = """You are a multi-perspective code reviewer.
+        if self._prompt_prefix is None:
+            self._prompt_prefix = "".join(
+                [
+                    """You are a multi-perspective code reviewer.
 
 Provide:
 1. Security concerns
@@ -459,26 +2243,30 @@ Provide:
 5. Actionable fixes
 
 Focus on these key patterns:
-"""
-        for pattern in self.patterns[:5]:
-            name = pattern.get("name", "")
-            desc = pattern.get("description", "")
-            prompt += f"- **{name}**: {desc}\n"
-
-        prompt += "\n## Code to Review:\n\n```python\n"
-        prompt += code
-        prompt += "\n```\n"
-
-        if context:
-            prompt += f"\n## Context:\n{context}\n"
+""",
+                    *(
+                        f"- **{pattern.get('name', '')}**: "
+                        f"{_summarize_description(pattern.get('description', ''))}\n"
+                        for pattern in self.patterns[:_COUNCIL_FOCUS_PATTERNS]
+                    ),
+                ]
+            )
 
-        return prompt
+        context_section = f"\n## Context:\n{context}\n" if context else ""
+        return (
+            f"{self._prompt_prefix}\n## Code to Review:\n\n```python\n{code}\n```\n"
+            f"{context_section}"
+        )
 
     def _review_local(self, prompt: str, api_key: Optional[str]) -> Optional[Dict[str, Any]]:
         """Attempt local Council AI review."""
+        if self._council_unavailable:
+            return None
         try:
             from council_ai import Council
         except ImportError:
+            logger.debug("council_ai not installed; using the HTTP consult endpoint")
+            self._council_unavailable = True
             return None
 
         try:
@@ -514,7 +2302,14 @@ Focus on these key patterns:
         }
 
         try:
-            response = requests.post(self.http_base_url, json=payload, timeout=self.timeout_seconds)
+            session = self._session(requests)
+            response = _hedged(
+                lambda: session.post(
+                    self.http_base_url, json=payload, timeout=self.timeout_seconds
+                ),
+                self.hedge_requests,
+                self.hedge_delay,
+            )
             if not response.ok:
                 return {
                     "error": f"HTTP review failed: {response.status_code} - {response.text}",
@@ -538,6 +2333,44 @@ Focus on these key patterns:
         except Exception as e:
             return {"error": f"HTTP review failed: {e}", "responses": []}
 
+    def _session(self, requests: Any) -> Any:
+        """Return the pooled HTTP session for the consult endpoint.
+
+        The session reuses connections across reviews and retries gateway
+        errors (502/503/504) with backoff. A requests-compatible module without
+        sessions is used directly.
+
+        Args:
+            requests: The imported requests module
+
+        Returns:
+            Object with a requests-style ``post`` method
+        """
+        if self._http_session is None:
+            if not hasattr(requests, "Session"):
+                return requests
+
+            session = requests.Session()
+            try:
+                from urllib3.util.retry import Retry
+
+                retries: Any = Retry(
+                    total=2,
+                    backoff_factor=0.2,
+                    status_forcelist=(502, 503, 504),
+                    allowed_methods=frozenset({"POST"}),
+                    raise_on_status=False,
+                )
+            except (ImportError, TypeError):
+                retries = 0
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=4, pool_maxsize=16, max_retries=retries
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._http_session = session
+        return self._http_session
+
     def _build_local_council(self, council_cls: Any, api_key: Optional[str]) -> Any:
         """Construct Council instance with optional provider override."""
         if self.provider:
@@ -595,6 +2428,48 @@ Focus on these key patterns:
 
         return review_result
 
+    async def review_with_visual_diff_async(
+        self, code: str, context: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Async variant of review_with_visual_diff().
+
+        The council review and the local pattern scan run concurrently in
+        worker threads, so neither blocks the event loop.
+
+        Args:
+            code: Code to review
+            context: Optional context about the code
+
+        Returns:
+            Dictionary with review results and visual diff information
+        """
+        review_result, pattern_connections = await asyncio.gather(
+            asyncio.to_thread(self.review_code, code, context),
+            self.get_pattern_connections_async(code),
+        )
+        if "error" in review_result:
+            return review_result
+
+        review_result.update(
+            {
+                "pattern_connections": pattern_connections,
+                "visual_diff": self._generate_visual_diff(code, pattern_connections),
+                "diff_summary": self._summarize_diff(pattern_connections),
+            }
+        )
+        return review_result
+
+    async def get_pattern_connections_async(self, code: str) -> Dict[str, Any]:
+        """Run get_pattern_connections() in a worker thread.
+
+        Args:
+            code: Code to analyze
+
+        Returns:
+            Dictionary mapping code patterns to relevant feedback-loop patterns
+        """
+        return await asyncio.to_thread(self.get_pattern_connections, code)
+
     def get_pattern_connections(self, code: str) -> Dict[str, Any]:
         """Map code sections to relevant patterns.
 
@@ -611,61 +2486,29 @@ Focus on these key patterns:
             "code_sections": [],
         }
 
-        # Analyze code for pattern violations using regex
-        pattern_checks = {
-            "numpy_json_serialization": {
-                "regex": r"json\.dumps\([^)]*np\.|json\.dumps\([^)]*numpy",
-                "description": "NumPy types in JSON serialization",
-                "severity": "high",
-            },
-            "bounds_checking": {
-                "regex": r"\w+\[0\](?!\s+if\s+\w+)",
-                "description": "List access without bounds checking",
-                "severity": "medium",
-            },
-            "specific_exceptions": {
-                "regex": r"except\s*:",
-                "description": "Bare except clause",
-                "severity": "medium",
-            },
-            "structured_logging": {
-                "regex": r"\bprint\s*\(",
-                "description": "Using print instead of logging",
-                "severity": "low",
-            },
-            "temp_file_handling": {
-                "regex": r"tempfile\.mktemp\(",
-                "description": "Using deprecated mktemp function",
-                "severity": "high",
-            },
-        }
-
-        lines = code.split("\n")
-        for line_num, line in enumerate(lines, 1):
-            for pattern_name, pattern_info in pattern_checks.items():
-                if re.search(pattern_info["regex"], line):
-                    connections["detected_patterns"].append(
-                        {
-                            "pattern": pattern_name,
-                            "line": line_num,
-                            "code": line.strip(),
-                            "description": pattern_info["description"],
-                            "severity": pattern_info["severity"],
-                            "confidence": 0.8,  # Default confidence
-                        }
-                    )
-
-                    if pattern_name not in connections["pattern_matches"]:
-                        connections["pattern_matches"][pattern_name] = []
-
-                    connections["pattern_matches"][pattern_name].append(
-                        {"line": line_num, "code": line.strip()}
-                    )
+        # Analyze code for pattern violations using regex. Records stay plain dicts so
+        # results remain JSON-serializable and indexable by key for callers.
+        detected = connections["detected_patterns"]
+        matches = connections["pattern_matches"]
+        for line_num, pattern_name, line_text in _scan_pattern_checks(code):
+            pattern_info = _PATTERN_CHECKS[pattern_name]
+            detected.append(
+                {
+                    "pattern": pattern_name,
+                    "line": line_num,
+                    "code": line_text,
+                    "description": pattern_info["description"],
+                    "severity": pattern_info["severity"],
+                    "confidence": 0.8,  # Default confidence
+                }
+            )
+            matches.setdefault(pattern_name, []).append({"line": line_num, "code": line_text})
 
         # Calculate confidence scores
-        for pattern_name in connections["pattern_matches"]:
-            match_count = len(connections["pattern_matches"][pattern_name])
-            connections["confidence_scores"][pattern_name] = min(0.9, 0.6 + (match_count * 0.1))
+        for pattern_name, pattern_hits in matches.items():
+            connections["confidence_scores"][pattern_name] = min(
+                0.9, 0.6 + (len(pattern_hits) * 0.1)
+            )
 
         return connections
 
@@ -686,39 +2529,9 @@ Focus on these key patterns:
         pattern_connections = review_result["pattern_connections"]
 
         # Generate fixes for each detected pattern
-        fix_templates = {
-            "numpy_json_serialization": {
-                "title": "Convert NumPy types for JSON serialization",
-                "fix": "Use float() and .tolist() for NumPy types",
-                "example": "result = {'mean': float(np.mean(data)), 'values': data.tolist()}",
-            },
-            "bounds_checking": {
-                "title": "Add bounds checking for list access",
-                "fix": "Check list length before accessing elements",
-                "example": "first = items[0] if items else None",
-            },
-            "specific_exceptions": {
-                "title": "Use specific exception handling",
-                "fix": "Catch specific exceptions instead of bare except",
-                "example": "except json.JSONDecodeError as e:",
-            },
-            "structured_logging": {
-                "title": "Replace print with proper logging",
-                "fix": "Use logger instead of proper logging",
-                "example": 'logger.debug(f"Processing {filename}")',
-            },
-            "temp_file_handling": {
-                "title": "Use secure temporary file handling",
-                "fix": "Replace mktemp with NamedTemporaryFile",
-                "example": "with tempfile.NamedTemporaryFile() as tmp:",
-            },
-        }
-
         for detection in pattern_connections.get("detected_patterns", []):
             pattern_name = detection["pattern"]
-
-            if pattern_name in fix_templates:
-                template = fix_templates[pattern_name]
+            if (template := _QUICK_FIX_TEMPLATES.get(pattern_name)) is not None:
                 fixes.append(
                     {
                         "pattern": pattern_name,
@@ -789,37 +2602,13 @@ Focus on these key patterns:
             pattern: Pattern name
 
         Returns:
-            Suggested fixed line or None
+            Suggested fixed line, or None if no rewrite applies
         """
-        if pattern == "numpy_json_serialization":
-            # Replace np.mean(data) with float(np.mean(data))
-            line = re.sub(r"(\w+)\s*=\s*np\.(\w+)\(([^)]+)\)", r"\1 = float(np.\2(\3))", line)
-            # Replace data with data.tolist() in JSON contexts
-            line = re.sub(
-                r"json\.dumps\([^)]*(\w+)[^)]*\)", r"json.dumps(..., \1.tolist(), ...)", line
-            )
-
-        elif pattern == "bounds_checking":
-            # Add bounds check before [0] access
-            if "[0]" in line and "if" not in line:
-                # This is a simple heuristic - real implementation would be more sophisticated
-                pass
-
-        elif pattern == "specific_exceptions":
-            if "except:" in line:
-                line = line.replace("except:", "except Exception as e:")
-
-        elif pattern == "structured_logging":
-            if "print(" in line:
-                line = re.sub(r"print\s*\(", "logger.info(", line)
-
-        elif pattern == "temp_file_handling":
-            if "tempfile.mktemp(" in line:
-                line = line.replace(
-                    "tempfile.mktemp(", "tempfile.NamedTemporaryFile(delete=False).name"
-                )
-
-        return line if line != line else None  # Return None if no change
+        fixer = _LINE_FIXERS.get(pattern)
+        if fixer is None:
+            return None
+        fixed = fixer(line)
+        return fixed if fixed != line else None
 
     def _summarize_diff(self, pattern_connections: Dict[str, Any]) -> Dict[str, Any]:
         """Summarize the diff for display.
@@ -839,51 +2628,62 @@ Focus on these key patterns:
             "confidence_range": {"min": 1.0, "max": 0.0, "avg": 0.0},
         }
 
-        confidences = []
-
+        # Tally counts and the confidence range in a single pass
+        by_severity = summary["by_severity"]
+        by_pattern = summary["by_pattern"]
+        lowest, highest, total = float("inf"), float("-inf"), 0.0
         for detection in detected:
             severity = detection["severity"]
             pattern = detection["pattern"]
             confidence = detection["confidence"]
 
-            summary["by_severity"][severity] += 1
-            summary["by_pattern"][pattern] = summary["by_pattern"].get(pattern, 0) + 1
-            confidences.append(confidence)
+            by_severity[severity] += 1
+            by_pattern[pattern] = by_pattern.get(pattern, 0) + 1
+            if confidence < lowest:
+                lowest = confidence
+            if confidence > highest:
+                highest = confidence
+            total += confidence
 
-        if confidences:
-            summary["confidence_range"]["min"] = min(confidences)
-            summary["confidence_range"]["max"] = max(confidences)
-            summary["confidence_range"]["avg"] = sum(confidences) / len(confidences)
+        if detected:
+            summary["confidence_range"]["min"] = lowest
+            summary["confidence_range"]["max"] = highest
+            summary["confidence_range"]["avg"] = total / len(detected)
 
         return summary
 
 
+# Heading written before every debrief
+_DEBRIEF_BANNER = "=" * 70 + "\n📋 REVIEW DEBRIEF\n" + "=" * 70 + "\n\n"
+
+# Difficulty bars for ratings 0-10, indexed by rating
+_DIFFICULTY_BARS = tuple("█" * filled + "░" * (10 - filled) for filled in range(11))
+
+
 def display_debrief(debrief: Dict[str, Any]) -> None:
     """Display the debrief section in a formatted way.
 
     Args:
         debrief: Debrief dictionary containing strategies, difficulty, and explanation
     """
-    print("=" * 70)
-    print("📋 REVIEW DEBRIEF")
-    print("=" * 70)
-    print()
+    # Build the whole debrief and write it once instead of a print() per line
+    out = [_DEBRIEF_BANNER]
 
     if "strategies" in debrief and debrief["strategies"]:
-        print("💡 Improvement Strategies:")
-        print()
-        for i, strategy in enumerate(debrief["strategies"], 1):
-            print(f"  {i}. {strategy}")
-        print()
+        out.append("💡 Improvement Strategies:\n\n")
+        out.extend(f"  {i}. {strategy}\n" for i, strategy in enumerate(debrief["strategies"], 1))
+        out.append("\n")
 
     if "difficulty" in debrief:
         difficulty = debrief["difficulty"]
-        print(f"📊 Difficulty of Execution: {difficulty}/10")
+        out.append(f"📊 Difficulty of Execution: {difficulty}/10\n")
 
         # Visual representation
-        filled = "█" * difficulty
-        empty = "░" * (10 - difficulty)
-        print(f"   {filled}{empty}")
+        if 0 <= difficulty < len(_DIFFICULTY_BARS):
+            bar = _DIFFICULTY_BARS[difficulty]
+        else:
+            bar = "█" * difficulty + "░" * (10 - difficulty)
+        out.append(f"   {bar}\n")
 
         # Difficulty level description
         if difficulty <= 3:
@@ -899,57 +2699,110 @@ def display_debrief(debrief: Dict[str, Any]) -> None:
             level = "Very Hard"
             emoji = "⚫"
 
-        print(f"   {emoji} Level: {level}")
-        print()
+        out.append(f"   {emoji} Level: {level}\n\n")
 
     if "explanation" in debrief and debrief["explanation"]:
-        print("📝 Explanation:")
-        explanation_lines = debrief["explanation"].split("\n")
-        for line in explanation_lines:
-            if line.strip():
-                print(f"   {line}")
-        print()
+        out.append("📝 Explanation:\n")
+        out.extend(
+            f"   {line}\n"
+            for line in debrief["explanation"].splitlines()
+            if line and not line.isspace()
+        )
+        out.append("\n")
+
+    out.append("=" * 70 + "\n")
+    sys.stdout.write("".join(out))
+
+
+# A line holding only this marks the end of pasted code
+_PASTE_SENTINEL = re.compile(r"^[^\S\n]*---[^\S\n]*$", re.MULTILINE)
+
+
+def _read_pasted_code(stream) -> str:
+    """Read code up to the first sentinel line or end of input.
+
+    Terminals are read line by line so the session ends at the sentinel; piped
+    input is read in one call and split on the sentinel.
+
+    Args:
+        stream: Text stream to read, usually sys.stdin
+
+    Returns:
+        Code without the sentinel line or trailing newline
+    """
+    if stream.isatty():
+        code_lines = []
+        while True:
+            try:
+                line = input()
+                if line.strip() == "---":
+                    break
+                code_lines.append(line)
+            except EOFError:
+                break
+        return "\n".join(code_lines)
 
-    print("=" * 70)
+    raw = stream.read()
+    match = _PASTE_SENTINEL.search(raw)
+    code = raw[: match.start()] if match else raw
+    return code[:-1] if code.endswith("\n") else code
+
+
+_reviewer: Optional[CodeReviewer] = None
+_reviewer_lock = threading.Lock()
+
+
+def get_code_reviewer() -> CodeReviewer:
+    """Get or create the shared CodeReviewer instance.
+
+    Reusing one reviewer keeps its pattern library, prompt prefix and response
+    cache warm across reviews in the same process.
+
+    Returns:
+        Shared CodeReviewer instance
+    """
+    global _reviewer
+    if _reviewer is None:
+        with _reviewer_lock:
+            if _reviewer is None:
+                _reviewer = CodeReviewer()
+    return _reviewer
+
+
+# Messages interactive_review writes in one piece
+_INTERACTIVE_BANNER = "\n" + "=" * 70 + "\n🔍 Interactive Code Review\n" + "=" * 70 + "\n\n"
+_NO_PROVIDERS_MESSAGE = (
+    "⚠️  No LLM providers available!\n"
+    "\n"
+    "Set one of these API keys:\n"
+    "  • ANTHROPIC_API_KEY\n"
+    "  • OPENAI_API_KEY\n"
+    "  • GEMINI_API_KEY\n"
+    "\n"
+)
 
 
 def interactive_review():
     """Run interactive code review session."""
-    print("\n" + "=" * 70)
-    print("🔍 Interactive Code Review")
-    print("=" * 70)
-    print()
+    # Each banner goes out in one write rather than a print() per line
+    sys.stdout.write(_INTERACTIVE_BANNER)
 
-    reviewer = CodeReviewer()
+    reviewer = get_code_reviewer()
 
     if not reviewer.llm_manager.is_any_available():
-        print("⚠️  No LLM providers available!")
-        print()
-        print("Set one of these API keys:")
-        print("  • ANTHROPIC_API_KEY")
-        print("  • OPENAI_API_KEY")
-        print("  • GEMINI_API_KEY")
-        print()
+        sys.stdout.write(_NO_PROVIDERS_MESSAGE)
         return
 
     providers = reviewer.llm_manager.list_available_providers()
-    print(f"✓ Using LLM: {', '.join(providers)}")
-    print()
-    print("Paste your code (end with a line containing only '---'):")
-    print()
-
-    # Collect code
-    code_lines = []
-    while True:
-        try:
-            line = input()
-            if line.strip() == "---":
-                break
-            code_lines.append(line)
-        except EOFError:
-            break
+    sys.stdout.write(f"✓ Using LLM: {', '.join(providers)}\n\n")
+
+    # Open provider connections while the user pastes their code
+    if reviewer.config.get("code_review.warmup", True):
+        threading.Thread(target=reviewer.llm_manager.warmup, daemon=True).start()
 
-    code = "\n".join(code_lines)
+    sys.stdout.write("Paste your code (end with a line containing only '---'):\n\n")
+
+    code = _read_pasted_code(sys.stdin)
 
     if not code.strip():
         print("\nNo code provided.\n")
@@ -957,22 +2810,22 @@ def interactive_review():
 
     print("\n🔍 Reviewing code...\n")
 
-    # Review code
-    result = reviewer.review_code(code)
-
-    if "error" in result:
-        print(f"Error: {result['error']}\n")
-    else:
-        print(result["review"])
-        print()
-
-        # Display debrief if available
-        if "debrief" in result:
-            display_debrief(result["debrief"])
-
-        print()
-        print(f"Reviewed by: {result['provider']} ({result['model']})")
-        print()
+    # Stream the review so text appears as soon as the provider starts responding
+    for event in reviewer.review_code_events(code):
+        if event["event"] == "review":
+            sys.stdout.write(event["text"])
+            sys.stdout.flush()
+        elif event["event"] == "error":
+            print(f"\nError: {event['error']}\n")
+        elif event["provider"] == "local":
+            # Answered without the LLM; the review text already says what to fix
+            print("\n")
+        else:
+            print("\n")
+            display_debrief(event["debrief"])
+            print()
+            print(f"Reviewed by: {event['provider']} ({event['model']})")
+            print()
 
 
 if __name__ == "__main__":
@@ -5,11 +5,16 @@ Provides unified interface for multiple LLM providers (Claude, GPT-4, Gemini).
 Makes it easy to switch between providers or use multiple simultaneously.
 """
 
+import asyncio
 import logging
 import os
+import random
+import threading
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional
 from types import SimpleNamespace
 
 # Import the LLMClient interface so we can wrap legacy providers when a
@@ -41,6 +46,9 @@ class LLMResponse:
 class LLMProvider(ABC):
     """Abstract base class for LLM providers."""
 
+    # Smaller, cheaper model used for requests with model_tier="fast"
+    FAST_MODEL: Optional[str] = None
+
     def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None):
         """Initialize provider with API key and model.
 
@@ -50,6 +58,7 @@ class LLMProvider(ABC):
         """
         self.api_key = api_key
         self.model = model
+        self.fast_model = self.FAST_MODEL
         self.client = None
 
     @abstractmethod
@@ -66,6 +75,36 @@ class LLMProvider(ABC):
         """
         pass
 
+    def stream(self, prompt: str, max_tokens: int = 4096, **kwargs) -> Iterator[str]:
+        """Stream the response text in chunks as it is generated.
+
+        Providers without a streaming implementation yield the whole response
+        as a single chunk.
+
+        Args:
+            prompt: Input prompt
+            max_tokens: Maximum tokens to generate
+            **kwargs: Provider-specific parameters
+
+        Yields:
+            Response text chunks
+        """
+        yield self.generate(prompt, max_tokens=max_tokens, **kwargs).text
+
+    def _resolve_model(self, kwargs: Dict[str, Any]) -> Optional[str]:
+        """Pop the ``model_tier`` kwarg and return the model to call.
+
+        Args:
+            kwargs: Request kwargs; ``model_tier`` ("fast" or "quality") is consumed
+
+        Returns:
+            The fast model for the "fast" tier when the provider has one, else the
+            configured model
+        """
+        if kwargs.pop("model_tier", None) == "fast" and self.fast_model:
+            return self.fast_model
+        return self.model
+
     @abstractmethod
     def is_available(self) -> bool:
         """Check if provider is available (API key set, package installed)."""
@@ -81,6 +120,8 @@ class LLMProvider(ABC):
 class ClaudeProvider(LLMProvider):
     """Anthropic Claude LLM provider."""
 
+    FAST_MODEL = "claude-haiku-4-5-20251001"
+
     def __init__(self, api_key: Optional[str] = None, model: str = "claude-sonnet-4-5-20250929"):
         """Initialize Claude provider.
 
@@ -101,21 +142,30 @@ class ClaudeProvider(LLMProvider):
                 self.client = None
 
     def generate(self, prompt: str, max_tokens: int = 4096, **kwargs) -> LLMResponse:
-        """Generate response using Claude API."""
+        """Generate response using Claude API.
+
+        A ``cache_segments`` kwarg lists leading chunks of the prompt that repeat
+        across calls; each becomes a content block with a ``cache_control``
+        breakpoint so Anthropic prompt caching can reuse it. A ``system`` kwarg
+        is sent as a cached system block.
+        """
         if not self.is_available() or not self.client:
             raise RuntimeError("Claude provider not available")
 
+        content = self._prepare_request(prompt, kwargs)
+        model = self._resolve_model(kwargs)
+
         try:
             response = self.client.messages.create(
-                model=self.model,
+                model=model,
                 max_tokens=max_tokens,
-                messages=[{"role": "user", "content": prompt}],
+                messages=[{"role": "user", "content": content}],
                 **kwargs,
             )
 
             return LLMResponse(
                 text=response.content[0].text,
-                model=self.model,
+                model=model,
                 provider="claude",
                 tokens_used=response.usage.input_tokens + response.usage.output_tokens,
                 metadata={
@@ -127,6 +177,94 @@ class ClaudeProvider(LLMProvider):
             logger.error(f"Claude API error: {e}")
             raise
 
+    def stream(self, prompt: str, max_tokens: int = 4096, **kwargs) -> Iterator[str]:
+        """Stream response text using the Claude messages streaming API."""
+        if not self.is_available() or not self.client:
+            raise RuntimeError("Claude provider not available")
+
+        content = self._prepare_request(prompt, kwargs)
+        model = self._resolve_model(kwargs)
+
+        try:
+            with self.client.messages.stream(
+                model=model,
+                max_tokens=max_tokens,
+                messages=[{"role": "user", "content": content}],
+                **kwargs,
+            ) as response:
+                yield from response.text_stream
+        except Exception as e:
+            logger.error(f"Claude API error: {e}")
+            raise
+
+    # Anthropic allows at most four cache breakpoints per request
+    _MAX_CACHE_BREAKPOINTS = 4
+
+    def _prepare_request(self, prompt: str, kwargs: Dict[str, Any]) -> Any:
+        """Pop the caching kwargs and return the user message content.
+
+        A ``system`` kwarg is replaced in ``kwargs`` by a cached system block,
+        which uses one of the request's cache breakpoints. ``prediction`` is
+        dropped as Anthropic does not support it.
+
+        Args:
+            prompt: Full prompt text
+            kwargs: Request kwargs; ``cache_segments``, ``system`` and
+                ``prediction`` are consumed
+
+        Returns:
+            User message content from _build_content
+        """
+        # Anthropic has no predicted outputs
+        kwargs.pop("prediction", None)
+
+        breakpoints = self._MAX_CACHE_BREAKPOINTS
+        system = kwargs.pop("system", None)
+        if system:
+            kwargs["system"] = [
+                {"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}
+            ]
+            breakpoints -= 1
+        return self._build_content(prompt, kwargs.pop("cache_segments", None), breakpoints)
+
+    @classmethod
+    def _build_content(
+        cls,
+        prompt: str,
+        cache_segments: Optional[List[str]],
+        max_breakpoints: Optional[int] = None,
+    ) -> Any:
+        """Split the prompt into content blocks with cache breakpoints.
+
+        Args:
+            prompt: Full prompt text
+            cache_segments: Leading segments of the prompt to mark cacheable
+            max_breakpoints: Breakpoints available to the prompt (default: all)
+
+        Returns:
+            The prompt string unchanged, or a list of text content blocks
+        """
+        segments = [segment for segment in cache_segments or () if segment]
+        prefix = "".join(segments)
+        if not segments or not prompt.startswith(prefix):
+            return prompt
+
+        if max_breakpoints is None:
+            max_breakpoints = cls._MAX_CACHE_BREAKPOINTS
+        # Keep the breakpoints on the longest prefixes if there are too many segments
+        first_cached = max(0, len(segments) - max_breakpoints)
+        blocks: List[Dict[str, Any]] = []
+        for i, segment in enumerate(segments):
+            block: Dict[str, Any] = {"type": "text", "text": segment}
+            if i >= first_cached:
+                block["cache_control"] = {"type": "ephemeral"}
+            blocks.append(block)
+
+        rest = prompt[len(prefix) :]
+        if rest:
+            blocks.append({"type": "text", "text": rest})
+        return blocks
+
     def is_available(self) -> bool:
         """Check if Claude is available."""
         try:
@@ -144,6 +282,8 @@ class ClaudeProvider(LLMProvider):
 class OpenAIProvider(LLMProvider):
     """OpenAI GPT LLM provider."""
 
+    FAST_MODEL = "gpt-4o-mini"
+
     def __init__(self, api_key: Optional[str] = None, model: str = "gpt-4o"):
         """Initialize OpenAI provider.
 
@@ -168,17 +308,23 @@ class OpenAIProvider(LLMProvider):
         if not self.is_available() or not self.client:
             raise RuntimeError("OpenAI provider not available")
 
+        # OpenAI caches repeated prompt prefixes automatically
+        kwargs.pop("cache_segments", None)
+        messages = self._build_messages(prompt, kwargs.pop("system", None))
+        model = self._resolve_model(kwargs)
+        self._apply_prediction(kwargs)
+
         try:
             response = self.client.chat.completions.create(
-                model=self.model,
+                model=model,
                 max_tokens=max_tokens,
-                messages=[{"role": "user", "content": prompt}],
+                messages=messages,
                 **kwargs,
             )
 
             return LLMResponse(
                 text=response.choices[0].message.content,
-                model=self.model,
+                model=model,
                 provider="openai",
                 tokens_used=response.usage.total_tokens if response.usage else None,
                 metadata={
@@ -190,6 +336,59 @@ class OpenAIProvider(LLMProvider):
             logger.error(f"OpenAI API error: {e}")
             raise
 
+    def stream(self, prompt: str, max_tokens: int = 4096, **kwargs) -> Iterator[str]:
+        """Stream response text using the OpenAI chat completions API."""
+        if not self.is_available() or not self.client:
+            raise RuntimeError("OpenAI provider not available")
+
+        kwargs.pop("cache_segments", None)
+        messages = self._build_messages(prompt, kwargs.pop("system", None))
+        model = self._resolve_model(kwargs)
+        self._apply_prediction(kwargs)
+
+        try:
+            response = self.client.chat.completions.create(
+                model=model,
+                max_tokens=max_tokens,
+                messages=messages,
+                stream=True,
+                **kwargs,
+            )
+            for chunk in response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            logger.error(f"OpenAI API error: {e}")
+            raise
+
+    @staticmethod
+    def _apply_prediction(kwargs: Dict[str, Any]) -> None:
+        """Turn a plain-text ``prediction`` kwarg into a Predicted Outputs parameter.
+
+        Args:
+            kwargs: Request kwargs, updated in place
+        """
+        prediction = kwargs.pop("prediction", None)
+        if isinstance(prediction, str) and prediction:
+            kwargs["prediction"] = {"type": "content", "content": prediction}
+        elif prediction:
+            kwargs["prediction"] = prediction
+
+    @staticmethod
+    def _build_messages(prompt: str, system: Optional[str]) -> List[Dict[str, str]]:
+        """Build chat messages, leading with the system prompt if there is one.
+
+        Args:
+            prompt: User prompt
+            system: Optional system prompt
+
+        Returns:
+            Chat completion messages
+        """
+        messages = [{"role": "system", "content": system}] if system else []
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
     def is_available(self) -> bool:
         """Check if OpenAI is available."""
         try:
@@ -253,6 +452,11 @@ class GeminiProvider(LLMProvider):
         if not self.is_available() or not self.client:
             raise RuntimeError("Gemini provider not available")
 
+        # The model's system instruction is fixed at construction, so prepend instead
+        system = kwargs.pop("system", None)
+        if system:
+            prompt = f"{system}\n\n{prompt}"
+
         try:
             # Gemini uses different parameter naming
             generation_config = {
@@ -299,6 +503,97 @@ class GeminiProvider(LLMProvider):
         return "gemini"
 
 
+# Provider SDK errors worth retrying, matched by class name so no SDK import is needed
+_TRANSIENT_ERROR_NAMES = frozenset(
+    {
+        "APIConnectionError",
+        "APITimeoutError",
+        "ConnectionError",
+        "DeadlineExceeded",
+        "InternalServerError",
+        "OverloadedError",
+        "RateLimitError",
+        "ResourceExhausted",
+        "ServiceUnavailable",
+        "TimeoutError",
+    }
+)
+_TRANSIENT_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504, 529})
+# Longest server-requested Retry-After wait honoured before retrying
+_MAX_RETRY_AFTER = 60.0
+
+
+def _is_transient_error(error: Exception) -> bool:
+    """Check whether a provider error is likely to succeed on retry.
+
+    Args:
+        error: Exception raised by a provider
+
+    Returns:
+        True for rate limits, timeouts, connection errors and 5xx responses
+    """
+    if type(error).__name__ in _TRANSIENT_ERROR_NAMES:
+        return True
+    return getattr(error, "status_code", None) in _TRANSIENT_STATUS_CODES
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Read the Retry-After delay a provider sent with a rate-limit error.
+
+    Args:
+        error: Exception raised by a provider
+
+    Returns:
+        Seconds to wait, capped at _MAX_RETRY_AFTER, or None if the error
+        carries no usable Retry-After header
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        value = float(headers.get("retry-after") or headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+    return min(max(value, 0.0), _MAX_RETRY_AFTER)
+
+
+class _CircuitBreaker:
+    """Stops calling a provider for a while after repeated failures."""
+
+    def __init__(self, fail_max: int = 5, reset_timeout: float = 30.0):
+        """Initialize the breaker in the closed state.
+
+        Args:
+            fail_max: Consecutive failures that open the breaker
+            reset_timeout: Seconds before an open breaker lets a trial call through
+        """
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Return True if a call may be attempted."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            return time.monotonic() - self._opened_at >= self.reset_timeout
+
+    def record_success(self) -> None:
+        """Close the breaker."""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> None:
+        """Count a failure, opening the breaker once fail_max is reached."""
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.fail_max:
+                self._opened_at = time.monotonic()
+
+
 class LLMManager:
     """Manages multiple LLM providers with automatic fallback.
 
@@ -308,6 +603,10 @@ class LLMManager:
     telemetry callback is provided, the manager wraps the legacy provider in a
     small adapter and calls it via the `LLMClient` to get retry/timeout/telemetry
     behavior.
+
+    Without a telemetry callback, transient provider errors (rate limits,
+    timeouts, 5xx) are retried with jittered exponential backoff, and a provider
+    that keeps failing is skipped until its circuit breaker resets.
     """
 
     def __init__(self, preferred_provider: Optional[str] = None):
@@ -319,6 +618,13 @@ class LLMManager:
         self.providers: Dict[str, LLMProvider] = {}
         self._initialize_providers()
 
+        # Retry and circuit-breaker settings for generate()
+        self.max_retries = int(os.environ.get("FL_LLM_MAX_RETRIES", "3"))
+        self.backoff_base = 0.3
+        self.max_backoff = 4.0
+        self._breakers: Dict[str, _CircuitBreaker] = {}
+        self._breakers_lock = threading.Lock()
+
         self.preferred_provider = preferred_provider or os.environ.get("FL_LLM_PROVIDER", "claude")
         logger.info(f"LLM Manager initialized with preferred provider: {self.preferred_provider}")
 
@@ -334,6 +640,52 @@ class LLMManager:
             except Exception as e:
                 logger.debug(f"Could not initialize {provider_class.__name__}: {e}")
 
+    def _breaker(self, name: str) -> _CircuitBreaker:
+        """Get the circuit breaker for a provider, creating it on first use."""
+        with self._breakers_lock:
+            if name not in self._breakers:
+                self._breakers[name] = _CircuitBreaker()
+            return self._breakers[name]
+
+    def _generate_with_retry(self, name: str, prompt: str, **kwargs) -> LLMResponse:
+        """Call one provider, retrying transient errors with backoff.
+
+        Args:
+            name: Provider name
+            prompt: Input prompt
+            **kwargs: Provider-specific parameters
+
+        Returns:
+            Provider response
+
+        Raises:
+            RuntimeError: If the provider's circuit breaker is open
+            Exception: The provider's error once retries are exhausted
+        """
+        breaker = self._breaker(name)
+        if not breaker.allow():
+            raise RuntimeError(f"Circuit open for provider {name}")
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.providers[name].generate(prompt, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_transient_error(e):
+                    breaker.record_failure()
+                    raise
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = random.uniform(
+                        0, min(self.max_backoff, self.backoff_base * 2**attempt)
+                    )
+                logger.info(f"Provider {name} failed ({e}); retrying in {delay:.2f}s")
+                time.sleep(delay)
+            else:
+                breaker.record_success()
+                return response
+
+        raise RuntimeError(f"Provider {name} failed")  # pragma: no cover - loop always returns
+
     def generate(
         self,
         prompt: str,
@@ -349,7 +701,13 @@ class LLMManager:
             provider: Specific provider to use (None = use preferred)
             fallback: If True, try other providers on failure
             telemetry_callback: Optional callable to receive LLM telemetry events
-            **kwargs: Provider-specific parameters
+            **kwargs: Provider-specific parameters. ``cache_segments`` (leading
+                chunks of the prompt that repeat across calls) and ``system`` (a
+                fixed system prompt) are understood by every provider and used
+                for prompt caching where supported. ``model_tier="fast"`` selects
+                the provider's smaller model where it has one, and ``prediction``
+                (text the response will largely repeat) enables OpenAI
+                Predicted Outputs.
 
         Returns:
             LLMResponse-like object with generated text
@@ -400,7 +758,7 @@ class LLMManager:
             try:
                 if telemetry_callback is not None:
                     return _call_with_telemetry(target_provider, self.providers[target_provider])
-                return self.providers[target_provider].generate(prompt, **kwargs)
+                return self._generate_with_retry(target_provider, prompt, **kwargs)
             except Exception as e:
                 logger.warning(f"Provider {target_provider} failed: {e}")
                 if not fallback:
@@ -415,13 +773,172 @@ class LLMManager:
                     logger.info(f"Falling back to provider: {name}")
                     if telemetry_callback is not None:
                         return _call_with_telemetry(name, prov)
-                    return prov.generate(prompt, **kwargs)
+                    return self._generate_with_retry(name, prompt, **kwargs)
                 except Exception as e:
                     logger.warning(f"Provider {name} failed: {e}")
                     continue
 
         raise RuntimeError("All LLM providers failed")
 
+    def stream(
+        self,
+        prompt: str,
+        provider: Optional[str] = None,
+        fallback: bool = True,
+        answered_by: Optional[Dict[str, Any]] = None,
+        **kwargs,
+    ) -> Iterator[str]:
+        """Stream a response using the specified or preferred provider.
+
+        Falls back to the next provider only if one fails before producing any
+        text; a failure mid-stream is raised to the caller.
+
+        Args:
+            prompt: Input prompt
+            provider: Specific provider to use (None = use preferred)
+            fallback: If True, try other providers on failure
+            answered_by: Optional dict that receives the `provider` and `model`
+                of the provider that produced the text, once it starts
+            **kwargs: Provider-specific parameters
+
+        Yields:
+            Response text chunks
+
+        Raises:
+            RuntimeError: If no providers are available or all fail
+        """
+        if not self.providers:
+            raise RuntimeError("No LLM providers available. Set API keys and install packages.")
+
+        target_provider = provider or self.preferred_provider
+        order = [target_provider] if target_provider in self.providers else []
+        if fallback:
+            order += [name for name in self.providers if name != target_provider]
+
+        for name in order:
+            try:
+                chunks = iter(self.providers[name].stream(prompt, **kwargs))
+                first = next(chunks)
+            except StopIteration:
+                return
+            except Exception as e:
+                logger.warning(f"Provider {name} failed: {e}")
+                if not fallback:
+                    raise
+                continue
+
+            if answered_by is not None:
+                answered_by["provider"] = name
+                answered_by["model"] = self.providers[name]._resolve_model(dict(kwargs))
+            yield first
+            yield from chunks
+            return
+
+        raise RuntimeError("All LLM providers failed")
+
+    def generate_first(
+        self,
+        prompt: str,
+        providers: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+        **kwargs,
+    ) -> LLMResponse:
+        """Send the prompt to several providers at once and return the first success.
+
+        Unlike generate(fallback=True), a slow or failing provider does not delay
+        the others. Losing requests are abandoned rather than interrupted (the SDK
+        clients cannot be cancelled mid-request), so this costs one call per
+        provider.
+
+        Args:
+            prompt: Input prompt
+            providers: Providers to race (None = all available)
+            timeout: Seconds to wait for a successful response (None = no limit)
+            **kwargs: Provider-specific parameters
+
+        Returns:
+            Response from the first provider to succeed
+
+        Raises:
+            RuntimeError: If no providers are available, all fail, or time runs out
+        """
+        names = [name for name in providers or self.providers if name in self.providers]
+        if not names:
+            raise RuntimeError("No LLM providers available. Set API keys and install packages.")
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        executor = ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="llm-race")
+        try:
+            pending = {
+                executor.submit(self.providers[name].generate, prompt, **kwargs): name
+                for name in names
+            }
+            while pending:
+                remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+                done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                if not done:
+                    raise RuntimeError(f"No LLM provider responded within {timeout}s")
+                for future in done:
+                    name = pending.pop(future)
+                    try:
+                        return future.result()
+                    except Exception as e:
+                        logger.warning(f"Provider {name} failed: {e}")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        raise RuntimeError("All LLM providers failed")
+
+    async def agenerate(self, prompt: str, **kwargs) -> LLMResponse:
+        """Async variant of generate().
+
+        The provider SDK clients are synchronous, so the call runs in a worker
+        thread; concurrent awaits therefore overlap their network round-trips.
+
+        Args:
+            prompt: Input prompt
+            **kwargs: Arguments passed through to generate()
+
+        Returns:
+            LLMResponse-like object with generated text
+        """
+        return await asyncio.to_thread(self.generate, prompt, **kwargs)
+
+    def warmup(self, timeout: Optional[float] = 10.0) -> Dict[str, bool]:
+        """Send a one-token request to every provider to open its connection.
+
+        The SDK clients keep their HTTP connections alive, so the first real
+        request skips the TCP and TLS handshakes. Failures are logged and ignored.
+
+        Args:
+            timeout: Seconds to wait for all providers (None = no limit)
+
+        Returns:
+            Mapping of provider name to whether its warmup request succeeded
+        """
+        names = list(self.providers)
+        if not names:
+            return {}
+
+        executor = ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="llm-warmup")
+        try:
+            futures = {
+                executor.submit(self.providers[name].generate, "ping", max_tokens=1): name
+                for name in names
+            }
+            done, _ = wait(futures, timeout=timeout)
+            warmed = {name: False for name in names}
+            for future in done:
+                name = futures[future]
+                try:
+                    future.result()
+                    warmed[name] = True
+                except Exception as e:
+                    logger.debug(f"Warmup for {name} failed: {e}")
+            return warmed
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
     def list_available_providers(self) -> List[str]:
         """Get list of available provider names."""
         return list(self.providers.keys())
@@ -437,11 +954,18 @@ class LLMManager:
 
 # Global instance for easy access
 _manager: Optional[LLMManager] = None
+_manager_lock = threading.Lock()
 
 
 def get_llm_manager() -> LLMManager:
-    """Get or create global LLM manager instance."""
+    """Get or create global LLM manager instance.
+
+    Provider discovery and client setup run once per process; concurrent first
+    callers are serialized so only one manager is ever built.
+    """
     global _manager
     if _manager is None:
-        _manager = LLMManager()
+        with _manager_lock:
+            if _manager is None:
+                _manager = LLMManager()
     return _manager
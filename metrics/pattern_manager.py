@@ -10,8 +10,9 @@ import os
 import re
 import uuid
 from datetime import datetime, timedelta
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -606,6 +607,25 @@ class PatternManager:
         """
         return self.patterns.copy()
 
+    def iter_patterns(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over patterns without copying the library.
+
+        Returns:
+            Iterator over pattern dictionaries
+        """
+        return iter(self.patterns)
+
+    def get_top_patterns(self, n: int) -> List[Dict[str, Any]]:
+        """Get the first n patterns in library order.
+
+        Args:
+            n: Maximum number of patterns to return
+
+        Returns:
+            List of at most n patterns
+        """
+        return list(islice(self.iter_patterns(), n))
+
     def get_changelog(self) -> List[Dict[str, Any]]:
         """Get changelog entries.
 
@@ -1,5 +1,6 @@
 """Tests for the code reviewer debrief feature."""
 
+import io
 from unittest.mock import Mock, patch
 
 from metrics.code_reviewer import CodeReviewer
@@ -247,3 +248,754 @@ Moderate difficulty with given context""",
         assert "debrief" in result
         assert "strategies" in result["debrief"]
         assert result["debrief"]["difficulty"] >= 1
+
+    @patch("metrics.code_reviewer.get_llm_manager")
+    def test_review_prompt_has_stable_prefix(self, mock_get_llm):
+        """Test the review prompt leads with a code-independent, cacheable prefix."""
+        mock_llm = Mock()
+        mock_llm.is_any_available.return_value = True
+        mock_llm.generate.return_value = LLMResponse(
+            text="Looks fine", model="test-model", provider="test-provider"
+        )
+        mock_get_llm.return_value = mock_llm
+
+        reviewer = CodeReviewer()
+        prefix, suffix = reviewer._review_prompt_parts("x = 1", "Some context")
+        other_prefix, _ = reviewer._review_prompt_parts("y = 2")
+
+        assert prefix is other_prefix
+        assert "## Review Guidelines:" in prefix
+        assert "x = 1" in suffix and "Some context" in suffix
+        assert reviewer._build_review_prompt("x = 1", "Some context") == prefix + suffix
+
+        reviewer.review_code("x = 1", "Some context")
+        review_call = mock_llm.generate.call_args_list[0]
+        assert review_call.args[0] == prefix + suffix
+        assert review_call.kwargs["cache_segments"] == [prefix]
+
+    @patch("metrics.code_reviewer.get_llm_manager")
+    def test_review_prefix_lists_catalog_and_pads_with_examples(self, mock_get_llm):
+        """Test the prefix covers every pattern and adds examples toward the cache floor."""
+        mock_get_llm.return_value = Mock()
+        reviewer = CodeReviewer()
+        reviewer.patterns = [
+            {
+                "name": f"pattern_{i}",
+                "description": f"Description {i}",
+                "bad_example": f"bad_call_{i}()",
+                "good_example": f"good_call_{i}()",
+            }
+            for i in range(8)
+        ]
+
+        prefix, _ = reviewer._review_prompt_parts("x = 1")
+
+        assert all(f"**pattern_{i}**" in prefix for i in range(8))
+        assert "## Severity Rubric:" in prefix
+        assert "## Reference Examples:" in prefix
+        assert "good_call_0()" in prefix
+
+        reviewer.patterns = [{"name": "no_examples", "description": "Plain"}]
+        prefix, _ = reviewer._review_prompt_parts("x = 1")
+        assert "## Reference Examples:" not in prefix
+
+    @patch("metrics.code_reviewer.get_llm_manager")
+    def test_identical_prompts_served_from_response_cache(self, mock_get_llm):
+        """Test repeated identical requests reuse the cached LLM response."""
+        mock_llm = Mock()
+        mock_llm.is_any_available.return_value = True
+        mock_llm.generate.return_value = LLMResponse(
+            text="Explanation", model="test-model", provider="test-provider"
+        )
+        mock_get_llm.return_value = mock_llm
+
+        reviewer = CodeReviewer()
+        assert reviewer.explain_issue("bare except") == "Explanation"
+        assert reviewer.explain_issue("bare except") == "Explanation"
+        assert mock_llm.generate.call_count == 1
+
+        reviewer.explain_issue("mutable default argument")
+        assert mock_llm.generate.call_count == 2
+
+        reviewer.clear_cache()
+        reviewer.explain_issue("bare except")
+        assert mock_llm.generate.call_count == 3
+
+    @patch("metrics.code_reviewer.get_llm_manager")
+    def test_review_code_stream(self, mock_get_llm):
+        """Test streamed reviews yield provider chunks and report failures inline."""
+        mock_llm = Mock()
+        mock_llm.is_any_available.return_value = True
+        mock_llm.stream.return_value = iter(["Looks ", "fine"])
+        mock_get_llm.return_value = mock_llm
+
+        reviewer = CodeReviewer()
+        assert "".join(reviewer.review_code_stream("x = 1")) == "Looks fine"
+        assert mock_llm.stream.call_args.kwargs["cache_segments"]
+
+        # The finished stream is cached for an identical request
+        assert list(reviewer.review_code_stream("x = 1")) == ["Looks fine"]
+        assert mock_llm.stream.call_count == 1
+
+        reviewer.clear_cache()
+        mock_llm.stream.side_effect = Exception("stream broke")
+        chunks = list(reviewer.review_code_stream("x = 1"))
+        assert "stream broke" in chunks[-1]
+
+        assert list(reviewer.review_code_stream("")) == ["Error: No code provided for review.\n"]
+
+    @patch("metrics.code_reviewer.get_llm_manager")
+    def test_race_providers_uses_generate_first(self, mock_get_llm):
+        """Test the race_providers option sends reviews to all providers at once."""
+        mock_llm = Mock()
+        mock_llm.is_any_available.return_value = True
+        mock_llm.generate_first.return_value = LLMResponse(
+            text="Raced", model="test-model", provider="test-provider"
+        )
+        mock_get_llm.return_value = mock_llm
+
+        reviewer = CodeReviewer()
+        reviewer.race_providers = True
+
+        assert reviewer.explain_issue("bare except") == "Raced"
+        assert mock_llm.generate_first.call_args.kwargs["timeout"] == reviewer.race_timeout
+        assert not mock_llm.generate.called
+
+    @patch("metrics.code_reviewer.get_llm_manager")
+    def test_suggest_improvements_predicts_original_code(self, mock_get_llm):
+        """Test suggestions pass the submitted code as the predicted output."""
+        mock_llm = Mock()
+        mock_llm.is_any_available.return_value = True
+        mock_llm.generate.return_value = LLMResponse(
+            text="Improved", model="test-model", provider="test-provider"
+        )
+        mock_get_llm.return_value = mock_llm
+
+        reviewer = CodeReviewer()
+
+        assert reviewer.suggest_improvements("x = 1\n", "speed") == "Improved"
+        assert mock_llm.generate.call_args.kwargs["prediction"] == "x = 1"
+        reviewer.explain_issue("bare except")
+        assert "prediction" not in mock_llm.generate.call_args.kwargs
+
+
+def test_compact_code():
+    """Test review input is dedented, trimmed and bounded before prompting."""
+    from metrics.code_reviewer import _compact_code
+
+    code = '\n    """Module doc."""\n    x = 1   \n\n\n\n\n    y = 2\n\n'
+    assert _compact_code(code) == '"""Module doc."""\nx = 1\n\n\ny = 2'
+    assert _compact_code(code, strip_module_docstring=True) == "x = 1\n\n\ny = 2"
+
+    long_code = "\n".join(f"v{i} = {i}" for i in range(10))
+    assert _compact_code(long_code) == long_code
+    assert _compact_code(long_code, max_lines=3).splitlines() == [
+        "# ...7 earlier lines elided...",
+        "v7 = 7",
+        "v8 = 8",
+        "v9 = 9",
+    ]
+
+
+@patch("metrics.code_reviewer.get_llm_manager")
+def test_review_batch(mock_get_llm):
+    """Test snippets share one review request and fall back when unparseable."""
+    debrief_text = "**Improvement Strategies:**\n1. Fix it\n\n**Difficulty Rating:** 2"
+    mock_llm = Mock()
+    mock_llm.is_any_available.return_value = True
+    mock_llm.generate.side_effect = [
+        LLMResponse(
+            text='```json\n[{"id": 1, "review": "First"}, {"id": 2, "review": "Second"}]\n```',
+            model="test-model",
+            provider="test-provider",
+        ),
+        LLMResponse(text=debrief_text, model="test-model", provider="test-provider"),
+        LLMResponse(text=debrief_text, model="test-model", provider="test-provider"),
+    ]
+    mock_get_llm.return_value = mock_llm
+
+    reviewer = CodeReviewer()
+    results = reviewer.review_batch([("a = 1", None), ("", None), ("b = 2", "ctx")])
+
+    assert [result.get("review") for result in results] == ["First", None, "Second"]
+    assert "error" in results[1]
+    assert results[2]["debrief"]["difficulty"] == 2
+    batch_prompt = mock_llm.generate.call_args_list[0].args[0]
+    assert "### Snippet 2" in batch_prompt and "b = 2" in batch_prompt
+
+    mock_llm.generate.side_effect = None
+    mock_llm.generate.return_value = LLMResponse(
+        text="Not JSON", model="test-model", provider="test-provider"
+    )
+    results = reviewer.review_batch([("c = 3", None), ("d = 4", None)])
+    assert [result["review"] for result in results] == ["Not JSON", "Not JSON"]
+
+
+@patch("metrics.code_reviewer.get_llm_manager")
+def test_review_triage(mock_get_llm):
+    """Test syntax errors skip the LLM and short code is routed to the fast tier."""
+    mock_llm = Mock()
+    mock_llm.is_any_available.return_value = True
+    mock_llm.generate.return_value = LLMResponse(
+        text="Review", model="test-model", provider="test-provider"
+    )
+    mock_get_llm.return_value = mock_llm
+    reviewer = CodeReviewer()
+
+    result = reviewer.review_code("def broken(:\n    pass")
+    assert result["provider"] == "local"
+    assert "Syntax error at line 1" in result["review"]
+    assert not mock_llm.generate.called
+
+    # Line numbers refer to the submitted code, not the compacted prompt text
+    result = reviewer.review_code("import os\n\n\n\n\ndef broken(:\n    pass")
+    assert "Syntax error at line 6" in result["review"]
+
+    # Long valid code is reviewed whole, not cut down to its last lines
+    methods = "".join(f"    def m{i}(self):\n        return {i}\n\n" for i in range(300))
+    reviewer.review_code(f"class Big:\n{methods}")
+    assert "def m0(self):" in mock_llm.generate.call_args_list[0].args[0]
+    mock_llm.generate.reset_mock()
+
+    reviewer.review_code("def add(a, b):\n    return a + b")
+    assert mock_llm.generate.call_args_list[0].kwargs["model_tier"] == "fast"
+
+    body = "\n".join(f"    if x == {i}:\n        total += {i} * x" for i in range(30))
+    reviewer.review_code(f"def score(x):\n    total = 0\n{body}\n    return total")
+    review_calls = [c for c in mock_llm.generate.call_args_list if "model_tier" in c.kwargs]
+    assert review_calls[-1].kwargs["model_tier"] == "quality"
+
+
+@patch("metrics.code_reviewer.get_llm_manager")
+def test_output_budget_scales_with_input(mock_get_llm):
+    """Test output token limits follow input size and explanations default to brief."""
+    mock_llm = Mock()
+    mock_llm.is_any_available.return_value = True
+    mock_llm.generate.return_value = LLMResponse(
+        text="Answer", model="test-model", provider="test-provider"
+    )
+    mock_get_llm.return_value = mock_llm
+    reviewer = CodeReviewer()
+
+    reviewer.review_code("x = 1")
+    review_call = mock_llm.generate.call_args_list[0]
+    assert review_call.kwargs["max_tokens"] == 256 + len("x = 1") // 4
+    assert "Respond in under 300 words" in review_call.args[0]
+
+    reviewer.explain_issue("bare except")
+    assert mock_llm.generate.call_args.kwargs["max_tokens"] == 600
+    reviewer.explain_issue("bare except", verbose=True)
+    assert mock_llm.generate.call_args.kwargs["max_tokens"] == 1500
+    assert "Respond in under 300 words" not in mock_llm.generate.call_args.args[0]
+
+
+@patch("metrics.code_reviewer.get_llm_manager")
+def test_review_code_includes_local_lint(mock_get_llm):
+    """Test local lint findings are merged into the review result."""
+    mock_llm = Mock()
+    mock_llm.is_any_available.return_value = True
+    mock_llm.generate.return_value = LLMResponse(
+        text="Looks fine", model="test-model", provider="test-provider"
+    )
+    mock_get_llm.return_value = mock_llm
+
+    reviewer = CodeReviewer()
+    finding = {"line": 1, "code": "F401", "message": "`os` imported but unused"}
+    reviewer._local_lint = Mock(return_value=[finding])
+
+    result = reviewer.review_code("import os\n\ndef f(x):\n    return x * 2\n")
+    assert result["review"] == "Looks fine"
+    assert result["lint"] == [finding]
+
+    reviewer.local_lint = False
+    assert "lint" not in reviewer.review_code("def g(y):\n    return y + 1\n")
+
+
+@patch("metrics.code_reviewer.get_llm_manager")
+def test_local_lint_reports_submitted_line_numbers(mock_get_llm):
+    """Test lint runs on the code as submitted, not the compacted prompt text."""
+    mock_llm = Mock()
+    mock_llm.is_any_available.return_value = True
+    mock_llm.generate.return_value = LLMResponse(
+        text="Looks fine", model="test-model", provider="test-provider"
+    )
+    mock_get_llm.return_value = mock_llm
+
+    def lint(code):
+        lines = code.splitlines()
+        if "x = 1" not in lines:
+            return []
+        return [{"line": lines.index("x = 1") + 1, "code": "E000", "message": "x"}]
+
+    reviewer = CodeReviewer()
+    reviewer._local_lint = Mock(side_effect=lint)
+
+    code = "\n\n    import os\n\n\n\n\n    x = 1\n"
+    assert reviewer.review_code(code)["lint"][0]["line"] == 8
+    # The prompt still carries the compacted code
+    assert "import os\n\n\nx = 1" in mock_llm.generate.call_args.args[0]
+
+    # Oversize input reviewed in parts reports positions in the full code
+    reviewer.max_input_tokens = 10
+    padding = "".join(f"def f{i}(a):\n    return a + {i}\n\n\n\n\n" for i in range(3))
+    result = reviewer.review_code(f"{padding}x = 1\n")
+    assert result["chunks"] > 1
+    assert result["lint"][-1]["line"] == 19
+
+
+def test_run_ruff_without_ruff_installed():
+    """Test the lint pass is skipped when ruff is not on PATH."""
+    from metrics.code_reviewer import _run_ruff
+
+    with patch("metrics.code_reviewer.shutil.which", return_value=None):
+        assert _run_ruff("import os\n", timeout=1.0) == []
+
+
+@patch("metrics.code_reviewer.get_llm_manager")
+def test_get_code_reviewer_is_shared(mock_get_llm):
+    """Test the shared reviewer is created once and reused."""
+    import metrics.code_reviewer as code_reviewer
+
+    mock_get_llm.return_value = Mock()
+    with patch.object(code_reviewer, "_reviewer", None):
+        reviewer = code_reviewer.get_code_reviewer()
+        assert code_reviewer.get_code_reviewer() is reviewer
+    assert mock_get_llm.call_count == 1
+
+
+def test_read_pasted_code_from_pipe():
+    """Test piped input is read in bulk and cut at the sentinel line."""
+    import io
+
+    from metrics.code_reviewer import _read_pasted_code
+
+    assert _read_pasted_code(io.StringIO("x = 1\n\ny = 2\n  ---\nignored\n")) == "x = 1\n\ny = 2"
+    assert _read_pasted_code(io.StringIO("x = 1\ny = '---'\n")) == "x = 1\ny = '---'"
+    assert _read_pasted_code(io.StringIO("---\n")) == ""
+
+
+def test_disk_response_cache_round_trip(tmp_path):
+    """Test responses persist across cache instances and expire."""
+    from metrics.code_reviewer import _DiskResponseCache
+
+    path = str(tmp_path / "cache" / "reviews.sqlite3")
+    key = _DiskResponseCache.key(("digest", 256, "claude", None))
+    response = {"text": "Looks fine", "provider": "claude", "model": "m"}
+
+    _DiskResponseCache(path).put(key, response)
+    assert _DiskResponseCache(path).get(key) == response
+
+    expired = _DiskResponseCache(path, ttl_seconds=-1)
+    expired.put(key, response)
+    assert expired.get(key) is None
+
+
+def test_cached_json_matches_json_module(monkeypatch):
+    """Test cached responses round-trip like json, with or without orjson."""
+    import json
+
+    import metrics.code_reviewer as code_reviewer
+
+    value = {1: "one", "nested": [1.5, None, "caf\u00e9"]}
+    expected = json.loads(json.dumps(value))
+
+    assert code_reviewer._load_json(code_reviewer._dump_json(value)) == expected
+    monkeypatch.setattr(code_reviewer, "orjson", None)
+    assert code_reviewer._load_json(code_reviewer._dump_json(value)) == expected
+
+
+@patch("metrics.code_reviewer.get_llm_manager")
+def test_disk_cache_serves_new_reviewer(mock_get_llm, tmp_path, monkeypatch):
+    """Test a fresh reviewer reuses stored responses, but only from real providers."""
+    import json
+
+    from metrics.llm_providers import LLMManager
+
+    path = tmp_path / "reviews.sqlite3"
+    (tmp_path / ".feedback-loop").mkdir()
+    (tmp_path / ".feedback-loop" / "config.json").write_text(
+        json.dumps({"code_review": {"disk_cache_path": str(path)}})
+    )
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("FEEDBACK_LOOP_NO_CACHE", raising=False)
+
+    mock_llm = Mock(spec=LLMManager)
+    mock_llm.preferred_provider = "test-provider"
+    mock_llm.is_any_available.return_value = True
+    mock_llm.generate.return_value = LLMResponse(
+        text="Catch specific exceptions", model="test-model", provider="test-provider"
+    )
+    mock_get_llm.return_value = mock_llm
+
+    first = CodeReviewer()
+    second = CodeReviewer()
+    assert first._disk_cache.path == str(path)
+
+    assert first.explain_issue("bare except") == "Catch specific exceptions"
+    assert second.explain_issue("bare except") == "Catch specific exceptions"
+    assert mock_llm.generate.call_count == 1
+
+    # Responses from an injected client or a substitute manager are not persisted
+    assert CodeReviewer(llm_client=Mock())._disk_cache is None
+    mock_get_llm.return_value = Mock()
+    assert CodeReviewer()._disk_cache is None
+
+
+@patch("metrics.code_reviewer.get_llm_manager")
+def test_disk_cache_stores_full_review(mock_get_llm, tmp_path):
+    """Test a repeated review_code is served whole from disk, but errors are not stored."""
+    from metrics.code_reviewer import _DiskResponseCache
+
+    mock_llm = Mock()
+    mock_llm.is_any_available.return_value = True
+    mock_llm.preferred_provider = "test-provider"
+    mock_llm.generate.return_value = LLMResponse(
+        text="**Improvement Strategies:**\n1. Name things\n**Difficulty Rating:** 2",
+        model="test-model",
+        provider="test-provider",
+    )
+    mock_get_llm.return_value = mock_llm
+
+    path = str(tmp_path / "reviews.sqlite3")
+    first = CodeReviewer()
+    first.local_lint = False
+    first._disk_cache = _DiskResponseCache(path)
+    result = first.review_code("def f(x):\n    return x")
+
+    second = CodeReviewer()
+    second.local_lint = False
+    second._disk_cache = _DiskResponseCache(path)
+    with patch.object(second, "_review_single") as review_single:
+        assert second.review_code("def f(x):\n    return x") == result
+    review_single.assert_not_called()
+
+    # A different pattern catalog or triage setting changes the prompt, so it misses
+    key = second._review_cache_key("def f(x):\n    return x", None)
+    second.patterns = [{"name": "bare_except", "description": "Catch specific exceptions"}]
+    assert second._review_cache_key("def f(x):\n    return x", None) != key
+    third = CodeReviewer()
+    third.local_lint = False
+    third.fast_model_max_lines = 0
+    assert third._review_cache_key("def f(x):\n    return x", None) != key
+
+    mock_llm.generate.side_effect = Exception("API down")
+    assert "error" in second.review_code("def g(y):\n    return y")
+    assert second._disk_cache.get(second._review_cache_key("def g(y):\n    return y", None)) is None
+
+
+@patch("metrics.code_reviewer.get_llm_manager")
+def test_combined_debrief_uses_one_llm_call(mock_get_llm):
+    """Test combined_debrief reads the debrief from the review response."""
+    mock_llm = Mock()
+    mock_llm.is_any_available.return_value = True
+    mock_llm.generate.return_value = LLMResponse(
+        text=(
+            "Avoid bare except.\n\n## Debrief\n**Improvement Strategies:**\n"
+            "1. Catch ValueError\n**Difficulty Rating:** 2\n**Explanation:** Small fix"
+        ),
+        model="test-model",
+        provider="test-provider",
+    )
+    mock_get_llm.return_value = mock_llm
+
+    reviewer = CodeReviewer()
+    reviewer.combined_debrief = True
+    reviewer.local_lint = False
+    result = reviewer.review_code("try:\n    f()\nexcept:\n    pass")
+
+    assert mock_llm.generate.call_count == 1
+    assert "## Debrief" in mock_llm.generate.call_args.args[0]
+    assert result["review"] == "Avoid bare except."
+    assert result["debrief"] == {
+        "strategies": ["Catch ValueError"],
+        "difficulty": 2,
+        "explanation": "Small fix",
+    }
+
+
+@patch("metrics.code_reviewer.get_llm_manager")
+def test_review_code_events_streams_review_then_debrief(mock_get_llm):
+    """Test streamed events hold back the debrief heading split across chunks."""
+    def stream(prompt, answered_by=None, **kwargs):
+        answered_by.update(provider="test-provider", model="test-model")
+        return iter(["Looks ", "fine.\n## Deb", "rief\n**Improvement Strategies:**\n- Add tests\n"])
+
+    mock_llm = Mock()
+    mock_llm.is_any_available.return_value = True
+    mock_llm.stream.side_effect = stream
+    mock_get_llm.return_value = mock_llm
+
+    reviewer = CodeReviewer()
+    reviewer.combined_debrief = True
+    events = list(reviewer.review_code_events("x = 1"))
+
+    assert "".join(e["text"] for e in events if e["event"] == "review") == "Looks fine.\n"
+    assert events[-1] == {
+        "event": "debrief",
+        "debrief": {"strategies": ["Add tests"], "difficulty": 5, "explanation": ""},
+        "provider": "test-provider",
+        "model": "test-model",
+    }
+    assert not mock_llm.generate.called
+
+    # Without combined_debrief the review streams whole and the debrief is a second call
+    mock_llm.generate.return_value = LLMResponse(
+        text="**Improvement Strategies:**\n1. Split it", model="test-model", provider="test"
+    )
+    reviewer.combined_debrief = False
+    events = list(reviewer.review_code_events("y = 2"))
+    assert "## Debrief" not in mock_llm.stream.call_args.args[0]
+    assert "".join(e["text"] for e in events if e["event"] == "review").startswith("Looks fine")
+    assert events[-1]["debrief"]["strategies"] == ["Split it"]
+    assert events[-1]["provider"] == "test-provider"
+
+    assert list(reviewer.review_code_events("")) == [
+        {"event": "error", "error": "No code provided for review."}
+    ]
+
+
+def test_summarize_description():
+    """Test pattern descriptions are cut to one short bullet line."""
+    from metrics.code_reviewer import _PATTERN_SUMMARY_WIDTH, _summarize_description
+
+    assert _summarize_description("## Heading\nConvert NumPy types\n  before  dumping.") == (
+        "Convert NumPy types before dumping."
+    )
+    summary = _summarize_description("word " * 100)
+    assert len(summary) <= _PATTERN_SUMMARY_WIDTH
+    assert summary.endswith("…")
+
+
+def test_split_code_on_top_level_definitions():
+    """Test oversize code is split between top-level definitions."""
+    from metrics.code_reviewer import _count_tokens, _split_code
+
+    functions = [f"def f{i}(x):\n    return x + {i}\n\n\n" for i in range(6)]
+    code = "import os\n\n\n" + "".join(functions)
+    limit = _count_tokens(functions[0]) * 2 + 5
+
+    chunks = _split_code(code, limit)
+    assert len(chunks) > 1
+    assert "".join(chunk for _, chunk in chunks) == code
+    assert chunks[0][0] == 1
+    assert all(chunk.lstrip().startswith(("import", "def")) for _, chunk in chunks)
+    assert code.splitlines()[chunks[1][0] - 1].startswith("def ")
+
+    assert _split_code("def broken(:\n", 1) == [(1, "def broken(:\n")]
+
+
+@patch("metrics.code_reviewer.get_llm_manager")
+def test_review_code_chunks_oversize_input(mock_get_llm):
+    """Test oversize code is reviewed in parts with one combined debrief."""
+    mock_llm = Mock()
+    mock_llm.is_any_available.return_value = True
+    mock_llm.generate.return_value = LLMResponse(
+        text="Part looks fine", model="test-model", provider="test-provider"
+    )
+    mock_get_llm.return_value = mock_llm
+
+    reviewer = CodeReviewer()
+    reviewer.local_lint = False
+    reviewer.generate_debrief = Mock(return_value={"strategies": [], "difficulty": 1})
+    reviewer.max_input_tokens = 40
+    code = "".join(
+        f"def function_{i}(value):\n    total = value * {i}\n    return total + {i}\n\n\n"
+        for i in range(6)
+    )
+
+    result = reviewer.review_code(code)
+
+    assert result["chunks"] > 1
+    assert result["review"].count("Part looks fine") == result["chunks"]
+    assert "### Lines 1-" in result["review"]
+    reviewer.generate_debrief.assert_called_once()
+
+
+@patch("metrics.code_reviewer.get_llm_manager")
+def test_review_many_bounds_concurrency(mock_get_llm):
+    """Test concurrent reviews keep input order and respect the concurrency limit."""
+    import asyncio
+    import threading
+    import time
+
+    mock_get_llm.return_value = Mock()
+    reviewer = CodeReviewer()
+    reviewer.concurrency = 2
+    lock = threading.Lock()
+    active = {"now": 0, "peak": 0}
+
+    def fake_review(code, context=None):
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.02)
+        with lock:
+            active["now"] -= 1
+        return {"review": code}
+
+    reviewer.review_code = fake_review
+    snippets = [(f"x = {i}", None) for i in range(6)]
+
+    results = asyncio.run(reviewer.review_many_async(snippets))
+
+    assert [result["review"] for result in results] == [code for code, _ in snippets]
+    assert active["peak"] <= 2
+
+    active["peak"] = 0
+    results = reviewer.review_many(snippets)
+
+    assert [result["review"] for result in results] == [code for code, _ in snippets]
+    assert 1 <= active["peak"] <= 2
+
+
+def test_debrief_section():
+    """Test debrief sections end at the next heading or a repeat of their own."""
+    from metrics.code_reviewer import _debrief_section
+
+    text = "**A:** one **B:** two **A:** three"
+    assert _debrief_section(text, "**A:**", "**B:**") == " one "
+    assert _debrief_section(text, "**B:**") == " two **A:** three"
+    assert _debrief_section(text, "**B:**", "**A:**") == " two "
+    assert _debrief_section(text, "**C:**") is None
+
+
+@patch("metrics.code_reviewer.get_llm_manager")
+def test_debrief_prompt_includes_code_and_review(mock_get_llm):
+    """Test the debrief prompt carries the reviewed code, review and context."""
+    mock_llm = Mock()
+    mock_llm.is_any_available.return_value = True
+    mock_llm.generate.return_value = LLMResponse(text="1. Fix", model="m", provider="p")
+    mock_get_llm.return_value = mock_llm
+
+    CodeReviewer().generate_debrief("x = compute()", "Name the result", "CLI tool")
+
+    prompt = mock_llm.generate.call_args.args[0]
+    assert "```python\nx = compute()\n```" in prompt
+    assert "## Review Feedback:\nName the result" in prompt
+    assert "## Context:\nCLI tool" in prompt
+    assert "{code}" not in prompt
+
+
+def test_display_debrief(capsys):
+    """Test the debrief is printed with its difficulty bar and level."""
+    from metrics.code_reviewer import display_debrief
+
+    display_debrief(
+        {
+            "strategies": ["Add tests", "Log errors"],
+            "difficulty": 4,
+            "explanation": "Needs refactoring.\r\n\r\nNothing drastic.",
+        }
+    )
+
+    out = capsys.readouterr().out
+    assert "  1. Add tests\n  2. Log errors\n" in out
+    assert "📊 Difficulty of Execution: 4/10\n   ████░░░░░░\n   🟡 Level: Moderate\n" in out
+    assert "📝 Explanation:\n   Needs refactoring.\n   Nothing drastic.\n" in out
+
+
+def test_interactive_review_without_providers(capsys):
+    """Test the session banner and missing-key help are printed before exiting."""
+    reviewer = Mock()
+    reviewer.llm_manager.is_any_available.return_value = False
+
+    with patch("metrics.code_reviewer.get_code_reviewer", return_value=reviewer):
+        from metrics.code_reviewer import interactive_review
+
+        interactive_review()
+
+    out = capsys.readouterr().out
+    assert out.startswith("\n" + "=" * 70 + "\n🔍 Interactive Code Review\n")
+    assert "No LLM providers available!" in out
+    assert out.endswith("  • GEMINI_API_KEY\n\n")
+
+
+def test_interactive_review_skips_debrief_for_errors(capsys):
+    """Test the session only shows a debrief and provider for a successful LLM review."""
+    from metrics.code_reviewer import interactive_review
+
+    reviewer = Mock()
+    reviewer.config.get.return_value = False
+    reviewer.llm_manager.list_available_providers.return_value = ["test"]
+    reviewer.review_code_events.return_value = iter(
+        [
+            {"event": "review", "text": "Looks fine."},
+            {
+                "event": "debrief",
+                "debrief": {"strategies": ["Add tests"], "difficulty": 2, "explanation": ""},
+                "provider": "test",
+                "model": "test-model",
+            },
+        ]
+    )
+    with patch("metrics.code_reviewer.get_code_reviewer", return_value=reviewer), patch(
+        "sys.stdin", io.StringIO("x = 1\n---\n")
+    ):
+        interactive_review()
+    out = capsys.readouterr().out
+    assert "Looks fine." in out and "Add tests" in out
+    assert "Reviewed by: test (test-model)" in out
+
+    for events in (
+        [{"event": "error", "error": "Code review failed: API down"}],
+        [
+            {"event": "review", "text": "Syntax error at line 1: invalid syntax."},
+            {"event": "debrief", "debrief": {}, "provider": "local", "model": None},
+        ],
+    ):
+        reviewer.review_code_events.return_value = iter(events)
+        with patch("metrics.code_reviewer.get_code_reviewer", return_value=reviewer), patch(
+            "sys.stdin", io.StringIO("x = 1\n---\n")
+        ):
+            interactive_review()
+        out = capsys.readouterr().out
+        assert "REVIEW DEBRIEF" not in out and "Reviewed by" not in out
+    reviewer.generate_debrief.assert_not_called()
+
+
+def test_strip_list_marker():
+    """Test one leading list marker is dropped unless nothing follows it."""
+    from metrics.code_reviewer import _strip_list_marker
+
+    assert _strip_list_marker("12.  Add tests") == "Add tests"
+    assert _strip_list_marker("- Log errors") == "Log errors"
+    assert _strip_list_marker("*Bold* claim") == "Bold* claim"
+    assert _strip_list_marker("1.5x faster") == "5x faster"
+    assert _strip_list_marker("3 steps") == "3 steps"
+    assert _strip_list_marker("-") == "-"
+
+
+def test_hedged_returns_first_successful_copy():
+    """Test hedged calls send extra copies for slow requests and keep the fastest."""
+    import itertools
+    import threading
+
+    import pytest
+
+    from metrics.code_reviewer import _hedged
+
+    release = threading.Event()
+    counter = itertools.count()
+
+    def slow_then_fast():
+        if next(counter) == 0:
+            release.wait(5)
+            return "slow"
+        return "fast"
+
+    try:
+        assert _hedged(slow_then_fast, copies=2, delay=0.01) == "fast"
+    finally:
+        release.set()
+
+    attempts = itertools.count()
+
+    def fail_once():
+        if next(attempts) == 0:
+            raise ConnectionError("reset")
+        return "recovered"
+
+    assert _hedged(fail_once, copies=2, delay=1.0) == "recovered"
+    assert _hedged(lambda: "single", copies=1) == "single"
+    with pytest.raises(ValueError):
+        _hedged(Mock(side_effect=ValueError("bad")), copies=3, delay=0.0)
@@ -106,6 +106,32 @@ def test_council_review_local_import_error(monkeypatch):
     assert result["source"] == "council_http"
 
 
+def test_council_review_remembers_missing_local_council(monkeypatch):
+    """Test a failed council_ai import is not retried by the same reviewer."""
+
+    class FakeResponse:
+        ok = True
+
+        def json(self):
+            return {"synthesis": "HTTP review", "responses": [], "mode": "synthesis"}
+
+    class FakeRequests:
+        @staticmethod
+        def post(*_args, **_kwargs):
+            return FakeResponse()
+
+    monkeypatch.setitem(sys.modules, "requests", FakeRequests)
+    monkeypatch.setitem(sys.modules, "council_ai", None)
+
+    reviewer = CouncilCodeReviewer(prefer_local=True)
+    assert reviewer.review_code("x = 1")["source"] == "council_http"
+
+    council = MagicMock()
+    monkeypatch.setitem(sys.modules, "council_ai", council)
+    assert reviewer.review_code("y = 2")["source"] == "council_http"
+    council.Council.assert_not_called()
+
+
 def test_council_review_http_timeout(monkeypatch):
     """Test HTTP timeout handling."""
 
@@ -220,3 +246,191 @@ def test_council_review_requests_import_error(monkeypatch):
 
     assert "error" in result
     assert "requests" in result["error"].lower()
+
+
+def test_get_pattern_connections_reports_lines():
+    """Test pattern checks report each matching line once per pattern."""
+    reviewer = CouncilCodeReviewer(prefer_local=False)
+    code = "try:\n    print(items[0])\nexcept:\n    pass\nvalue = items[0] if items else None"
+
+    connections = reviewer.get_pattern_connections(code)
+
+    assert [(d["line"], d["pattern"]) for d in connections["detected_patterns"]] == [
+        (2, "bounds_checking"),
+        (2, "structured_logging"),
+        (3, "specific_exceptions"),
+    ]
+    assert connections["pattern_matches"]["specific_exceptions"] == [
+        {"line": 3, "code": "except:"}
+    ]
+    assert connections["confidence_scores"]["bounds_checking"] == 0.7
+
+
+def test_generate_quick_fixes_for_detected_patterns():
+    """Test every detected pattern gets one quick fix with its template text."""
+    reviewer = CouncilCodeReviewer(prefer_local=False)
+    code = "try:\n    print(items[0])\nexcept:\n    pass"
+    review = {"pattern_connections": reviewer.get_pattern_connections(code)}
+
+    fixes = reviewer.generate_quick_fixes(review)
+
+    assert [(fix["line"], fix["pattern"]) for fix in fixes] == [
+        (2, "bounds_checking"),
+        (2, "structured_logging"),
+        (3, "specific_exceptions"),
+    ]
+    assert fixes[2]["title"] == "Use specific exception handling"
+    assert reviewer.generate_quick_fixes({}) == []
+
+
+def test_visual_diff_suggests_changed_lines_only():
+    """Test only lines a fix actually rewrites appear as suggested changes."""
+    reviewer = CouncilCodeReviewer(prefer_local=False)
+    code = "try:\n    print(items[0])\nexcept:\n    pass"
+
+    diff = reviewer._generate_visual_diff(code, reviewer.get_pattern_connections(code))
+
+    assert [(c["line"], c["suggested"]) for c in diff["suggested_changes"]] == [
+        (2, "    logger.info(items[0])"),
+        (3, "except Exception as e:"),
+    ]
+    assert reviewer._generate_line_fix("value = items[0]", "bounds_checking") is None
+
+
+def test_line_fixes_suggest_valid_code():
+    """Test suggested line rewrites parse, and lines without a safe rewrite get none."""
+    import ast
+
+    reviewer = CouncilCodeReviewer(prefer_local=False)
+    cases = [
+        ("p = tempfile.mktemp()", "temp_file_handling"),
+        ('path = tempfile.mktemp(suffix=".x")', "temp_file_handling"),
+        ("with open(tempfile.mktemp(dir=d)) as f:", "temp_file_handling"),
+        ("json.dumps(np.array([1, 2]))", "numpy_json_serialization"),
+        ('body = json.dumps({"mean": np.mean(data)}, indent=2)', "numpy_json_serialization"),
+        ("mean = np.mean(data)", "numpy_json_serialization"),
+    ]
+    for line, pattern in cases:
+        fixed = reviewer._generate_line_fix(line, pattern)
+        assert fixed is not None, line
+        ast.parse(fixed + " pass" if fixed.endswith(":") else fixed)
+
+    fix = reviewer._generate_line_fix
+    assert fix('path = tempfile.mktemp(suffix=".x")', "temp_file_handling") == (
+        'path = tempfile.NamedTemporaryFile(delete=False, suffix=".x").name'
+    )
+    assert fix("json.dumps(np.array([1, 2]))", "numpy_json_serialization") == (
+        "json.dumps(np.array([1, 2]).tolist())"
+    )
+    # Positional mktemp arguments and statements split over lines are left alone
+    assert fix("p = tempfile.mktemp('.x')", "temp_file_handling") is None
+    assert fix("json.dumps(np.mean(v),", "numpy_json_serialization") is None
+
+
+def test_summarize_diff_counts_and_confidence_range():
+    """Test the diff summary tallies severities, patterns and confidence bounds."""
+    reviewer = CouncilCodeReviewer(prefer_local=False)
+    detected = [
+        {"pattern": "structured_logging", "severity": "low", "confidence": 0.6},
+        {"pattern": "specific_exceptions", "severity": "medium", "confidence": 0.9},
+        {"pattern": "structured_logging", "severity": "low", "confidence": 0.9},
+    ]
+
+    summary = reviewer._summarize_diff({"detected_patterns": detected})
+
+    assert summary["total_issues"] == 3
+    assert summary["by_severity"] == {"high": 0, "medium": 1, "low": 2}
+    assert summary["by_pattern"] == {"structured_logging": 2, "specific_exceptions": 1}
+    assert summary["confidence_range"]["min"] == 0.6
+    assert summary["confidence_range"]["max"] == 0.9
+    assert abs(summary["confidence_range"]["avg"] - 0.8) < 1e-9
+    assert reviewer._summarize_diff({})["confidence_range"] == {"min": 1.0, "max": 0.0, "avg": 0.0}
+
+
+def test_council_prompt_prefix_cached_until_patterns_change():
+    """Test the static prompt prefix is built once per pattern set."""
+    reviewer = CouncilCodeReviewer(prefer_local=False)
+    reviewer.patterns = [{"name": "bounds_checking", "description": "Check list bounds"}]
+
+    first = reviewer._build_review_prompt("x = 1")
+    prefix = reviewer._prompt_prefix
+    assert "- **bounds_checking**: Check list bounds\n" in first
+    assert reviewer._build_review_prompt("y = 2").startswith(prefix)
+    assert reviewer._prompt_prefix is prefix
+
+    reviewer.patterns = [{"name": "structured_logging", "description": "Use logger"}]
+    assert "structured_logging" in reviewer._build_review_prompt("x = 1")
+    assert "bounds_checking" not in reviewer._prompt_prefix
+
+
+def test_council_review_cached_for_identical_code(monkeypatch):
+    """Test resubmitting identical code reuses the earlier council review."""
+    calls = []
+
+    class FakeResponse:
+        ok = True
+
+        def json(self):
+            return {"synthesis": f"Review {len(calls)}", "responses": [], "mode": "synthesis"}
+
+    class FakeRequests:
+        @staticmethod
+        def post(*_args, **_kwargs):
+            calls.append(1)
+            return FakeResponse()
+
+    monkeypatch.setitem(sys.modules, "requests", FakeRequests)
+    reviewer = CouncilCodeReviewer(prefer_local=False)
+
+    assert reviewer.review_code("print('hi')")["review"] == "Review 1"
+    assert reviewer.review_code("print('hi')")["review"] == "Review 1"
+    assert reviewer.review_code("print('bye')")["review"] == "Review 2"
+
+    # A review fetched with one caller's key is not served to another caller
+    assert reviewer.review_code("print('hi')", api_key="key-a")["review"] == "Review 3"
+    assert reviewer.review_code("print('hi')", api_key="key-b")["review"] == "Review 4"
+    assert reviewer.review_code("print('hi')", api_key="key-a")["review"] == "Review 3"
+
+    # Mutating a returned review leaves the cached one intact
+    reviewer.review_code("print('hi')")["responses"].append("tampered")
+    assert reviewer.review_code("print('hi')")["responses"] == []
+
+    reviewer.clear_cache()
+    assert reviewer.review_code("print('hi')")["review"] == "Review 5"
+
+
+def test_review_with_visual_diff_async(monkeypatch):
+    """Test the async visual-diff review merges the council review and pattern scan."""
+    import asyncio
+
+    class FakeResponse:
+        ok = True
+
+        def json(self):
+            return {"synthesis": "Async review", "responses": [], "mode": "synthesis"}
+
+    class FakeRequests:
+        @staticmethod
+        def post(*_args, **_kwargs):
+            return FakeResponse()
+
+    monkeypatch.setitem(sys.modules, "requests", FakeRequests)
+    reviewer = CouncilCodeReviewer(prefer_local=False)
+
+    result = asyncio.run(reviewer.review_with_visual_diff_async("try:\n    x()\nexcept:\n    pass"))
+
+    assert result["review"] == "Async review"
+    assert result["pattern_connections"]["detected_patterns"][0]["line"] == 3
+    assert "visual_diff" in result and "diff_summary" in result
+
+
+def test_council_http_session_reused():
+    """Test HTTP reviews share one pooled session that retries gateway errors."""
+    import requests
+
+    reviewer = CouncilCodeReviewer(prefer_local=False)
+    session = reviewer._session(requests)
+
+    assert isinstance(session, requests.Session)
+    assert reviewer._session(requests) is session
+    assert 503 in session.get_adapter("https://example").max_retries.status_forcelist
@@ -70,6 +70,46 @@ class TestClaudeProvider:
                 # If anthropic not installed
                 assert provider.is_available() is False
 
+    def test_build_content_marks_cache_segments(self):
+        """Test cacheable prompt prefix segments get cache_control breakpoints."""
+        content = ClaudeProvider._build_content("AAbbCC", ["AA", "bb"])
+
+        assert content == [
+            {"type": "text", "text": "AA", "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": "bb", "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": "CC"},
+        ]
+
+    def test_resolve_model_tier(self):
+        """Test the fast tier selects the provider's smaller model."""
+        provider = ClaudeProvider(api_key="test")
+        kwargs = {"model_tier": "fast"}
+
+        assert provider._resolve_model(kwargs) == ClaudeProvider.FAST_MODEL
+        assert kwargs == {}
+        assert provider._resolve_model({"model_tier": "quality"}) == provider.model
+        assert provider._resolve_model({}) == provider.model
+
+    def test_build_content_without_matching_prefix(self):
+        """Test prompt is sent unchanged when segments are absent or not a prefix."""
+        assert ClaudeProvider._build_content("prompt", None) == "prompt"
+        assert ClaudeProvider._build_content("prompt", ["other"]) == "prompt"
+
+    def test_prepare_request_caches_system_prompt(self):
+        """Test the system prompt becomes a cached block and uses one breakpoint."""
+        provider = ClaudeProvider(api_key="test")
+        kwargs = {"system": "Be terse.", "cache_segments": ["a", "b", "c", "d"]}
+
+        content = provider._prepare_request("abcdE", kwargs)
+
+        assert kwargs == {
+            "system": [
+                {"type": "text", "text": "Be terse.", "cache_control": {"type": "ephemeral"}}
+            ]
+        }
+        assert "cache_control" not in content[0]
+        assert sum("cache_control" in block for block in content) == 3
+
 
 class TestOpenAIProvider:
     """Test OpenAI provider."""
@@ -84,6 +124,24 @@ class TestOpenAIProvider:
         provider = OpenAIProvider(api_key="test")
         assert provider.model == "gpt-4o"
 
+    def test_build_messages_with_system_prompt(self):
+        """Test the system prompt is sent as its own leading message."""
+        assert OpenAIProvider._build_messages("hi", "Be terse.") == [
+            {"role": "system", "content": "Be terse."},
+            {"role": "user", "content": "hi"},
+        ]
+        assert OpenAIProvider._build_messages("hi", None) == [{"role": "user", "content": "hi"}]
+
+    def test_apply_prediction(self):
+        """Test plain-text predictions become Predicted Outputs content."""
+        kwargs = {"prediction": "x = 1"}
+        OpenAIProvider._apply_prediction(kwargs)
+        assert kwargs == {"prediction": {"type": "content", "content": "x = 1"}}
+
+        kwargs = {}
+        OpenAIProvider._apply_prediction(kwargs)
+        assert kwargs == {}
+
 
 class TestGeminiProvider:
     """Test Gemini provider."""
@@ -199,6 +257,59 @@ class TestLLMManagerGeneration:
         mock_provider1.generate.assert_called_once()
         mock_provider2.generate.assert_called_once()
 
+    def test_transient_errors_are_retried(self):
+        """Test rate-limit style errors are retried before falling back."""
+
+        class RateLimitError(Exception):
+            pass
+
+        manager = LLMManager()
+        manager.backoff_base = 0
+        flaky = Mock(spec=LLMProvider)
+        flaky.generate.side_effect = [
+            RateLimitError("slow down"),
+            LLMResponse(text="Retried", model="m", provider="flaky"),
+        ]
+        manager.providers = {"flaky": flaky}
+        manager.preferred_provider = "flaky"
+
+        assert manager.generate("test prompt").text == "Retried"
+        assert flaky.generate.call_count == 2
+
+    @patch("metrics.llm_providers.time.sleep")
+    def test_retry_honours_retry_after_header(self, mock_sleep):
+        """Test a Retry-After header sets the wait before the next attempt."""
+
+        class RateLimitError(Exception):
+            response = Mock(headers={"retry-after": "2.5"})
+
+        manager = LLMManager()
+        flaky = Mock(spec=LLMProvider)
+        flaky.generate.side_effect = [
+            RateLimitError("slow down"),
+            LLMResponse(text="Retried", model="m", provider="flaky"),
+        ]
+        manager.providers = {"flaky": flaky}
+        manager.preferred_provider = "flaky"
+
+        assert manager.generate("test prompt").text == "Retried"
+        mock_sleep.assert_called_once_with(2.5)
+
+    def test_circuit_breaker_skips_failing_provider(self):
+        """Test a provider that keeps failing is skipped until its breaker resets."""
+        manager = LLMManager()
+        failing = Mock(spec=LLMProvider)
+        failing.generate.side_effect = Exception("API error")
+        working = Mock(spec=LLMProvider)
+        working.generate.return_value = LLMResponse(text="ok", model="m", provider="working")
+        manager.providers = {"failing": failing, "working": working}
+        manager.preferred_provider = "failing"
+
+        for _ in range(manager._breaker("failing").fail_max + 2):
+            assert manager.generate("test prompt").text == "ok"
+
+        assert failing.generate.call_count == manager._breaker("failing").fail_max
+
     def test_no_fallback_on_failure(self):
         """Test no fallback when fallback=False."""
         manager = LLMManager()
@@ -216,6 +327,110 @@ class TestLLMManagerGeneration:
         with pytest.raises(Exception, match="API error"):
             manager.generate("test prompt", fallback=False)
 
+    @pytest.mark.asyncio
+    async def test_agenerate(self):
+        """Test async generation delegates to the sync provider call."""
+        manager = LLMManager()
+
+        mock_provider = Mock(spec=LLMProvider)
+        mock_provider.provider_name = "test"
+        mock_provider.generate.return_value = LLMResponse(
+            text="Async code", model="test-model", provider="test"
+        )
+        manager.providers = {"test": mock_provider}
+        manager.preferred_provider = "test"
+
+        response = await manager.agenerate("test prompt", max_tokens=10)
+
+        assert response.text == "Async code"
+        mock_provider.generate.assert_called_once_with("test prompt", max_tokens=10)
+
+    def test_stream_falls_back_before_first_chunk(self):
+        """Test streaming falls back when a provider fails before yielding text."""
+        manager = LLMManager()
+
+        failing = Mock(spec=LLMProvider)
+        failing.stream.side_effect = Exception("API error")
+        working = Mock(spec=LLMProvider)
+        working.stream.return_value = iter(["Hello ", "world"])
+        manager.providers = {"provider1": failing, "provider2": working}
+        manager.preferred_provider = "provider1"
+
+        answered_by = {}
+        assert "".join(manager.stream("test prompt", answered_by=answered_by)) == "Hello world"
+        assert answered_by["provider"] == "provider2"
+
+    def test_generate_first_returns_fastest_success(self):
+        """Test racing providers returns the first successful response."""
+        import threading
+
+        manager = LLMManager()
+        release = threading.Event()
+
+        slow = Mock(spec=LLMProvider)
+        slow.generate.side_effect = lambda *args, **kwargs: release.wait(5) and None
+        failing = Mock(spec=LLMProvider)
+        failing.generate.side_effect = Exception("API error")
+        fast = Mock(spec=LLMProvider)
+        fast.generate.return_value = LLMResponse(text="fast", model="m", provider="fast")
+        manager.providers = {"slow": slow, "failing": failing, "fast": fast}
+
+        try:
+            response = manager.generate_first("test prompt", max_tokens=10)
+        finally:
+            release.set()
+
+        assert response.text == "fast"
+        fast.generate.assert_called_once_with("test prompt", max_tokens=10)
+
+    def test_generate_first_raises_when_all_fail_or_time_out(self):
+        """Test racing providers raises when no provider succeeds in time."""
+        import threading
+
+        manager = LLMManager()
+        release = threading.Event()
+        failing = Mock(spec=LLMProvider)
+        failing.generate.side_effect = Exception("API error")
+        manager.providers = {"failing": failing}
+
+        with pytest.raises(RuntimeError, match="All LLM providers failed"):
+            manager.generate_first("test prompt")
+
+        slow = Mock(spec=LLMProvider)
+        slow.generate.side_effect = lambda *args, **kwargs: release.wait(5)
+        manager.providers = {"slow": slow}
+        try:
+            with pytest.raises(RuntimeError, match="within"):
+                manager.generate_first("test prompt", timeout=0.05)
+        finally:
+            release.set()
+
+    def test_warmup_reports_each_provider(self):
+        """Test warmup sends a one-token request per provider and ignores failures."""
+        manager = LLMManager()
+        working = Mock(spec=LLMProvider)
+        working.generate.return_value = LLMResponse(text=".", model="m", provider="working")
+        failing = Mock(spec=LLMProvider)
+        failing.generate.side_effect = Exception("API error")
+        manager.providers = {"working": working, "failing": failing}
+
+        assert manager.warmup() == {"working": True, "failing": False}
+        working.generate.assert_called_once_with("ping", max_tokens=1)
+
+    def test_default_stream_yields_full_response(self):
+        """Test providers without streaming yield the whole response once."""
+
+        class SimpleProvider(LLMProvider):
+            provider_name = "simple"
+
+            def generate(self, prompt, max_tokens=4096, **kwargs):
+                return LLMResponse(text="full text", model="m", provider="simple")
+
+            def is_available(self):
+                return True
+
+        assert list(SimpleProvider().stream("prompt")) == ["full text"]
+
 
 class TestGetLLMManager:
     """Test global LLM manager."""
@@ -227,6 +442,21 @@ class TestGetLLMManager:
 
         assert manager1 is manager2
 
+    def test_get_llm_manager_concurrent_first_call(self):
+        """Test concurrent first callers share a single manager."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        import metrics.llm_providers as llm_providers
+
+        with patch.object(llm_providers, "_manager", None), patch.object(
+            llm_providers, "LLMManager", side_effect=lambda: object()
+        ) as manager_cls:
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                managers = list(pool.map(lambda _: get_llm_manager(), range(16)))
+
+        assert manager_cls.call_count == 1
+        assert all(manager is managers[0] for manager in managers)
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
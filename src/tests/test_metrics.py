@@ -1,12 +1,15 @@
 """Comprehensive tests for the metrics collection and pattern-aware code generation system."""
 
+import dataclasses
 import json
 from datetime import datetime, timedelta
+from unittest.mock import Mock
 
+import numpy as np
 import pytest
 
 from metrics.analyzer import MetricsAnalyzer
-from metrics.code_generator import PatternAwareGenerator
+from metrics.code_generator import GenerationResult, PatternAwareGenerator
 from metrics.collector import MetricsCollector
 from metrics.integrate import MetricsIntegration
 from metrics.pattern_manager import PatternManager
@@ -477,6 +480,19 @@ class TestPatternManager:
         assert len(manager2.patterns) == 1
         assert manager2.patterns[0]["name"] == "test_pattern"
 
+    def test_get_top_patterns(self, tmp_path):
+        """Test the leading patterns are returned without the rest of the library."""
+        manager = PatternManager(str(tmp_path / "patterns.json"))
+        manager.patterns = [{"name": f"pattern{i}"} for i in range(8)]
+
+        assert [p["name"] for p in manager.get_top_patterns(3)] == [
+            "pattern0",
+            "pattern1",
+            "pattern2",
+        ]
+        assert len(manager.get_top_patterns(20)) == 8
+        assert list(manager.iter_patterns()) == manager.patterns
+
     def test_update_frequencies(self, tmp_path):
         """Test updating pattern frequencies."""
         pattern_file = tmp_path / "patterns.json"
@@ -586,8 +602,8 @@ class TestPatternAwareGenerator:
 
         indicators = generator._analyze_prompt("Process numpy array and return JSON")
 
-        assert indicators["numpy"] is True
-        assert indicators["json"] is True
+        assert "numpy" in indicators
+        assert "json" in indicators
 
     def test_analyze_prompt_list(self):
         """Test prompt analysis for list access context."""
@@ -595,7 +611,25 @@ class TestPatternAwareGenerator:
 
         indicators = generator._analyze_prompt("Get first item from list")
 
-        assert indicators["list_access"] is True
+        assert "list_access" in indicators
+
+    def test_analyze_prompt_case_and_overlap(self):
+        """Test indicator scan is case-insensitive and finds overlapping terms."""
+        generator = PatternAwareGenerator([])
+
+        indicators = generator._analyze_prompt("Add a FastAPI Upload endpoint")
+
+        assert {"fastapi", "json", "file", "large_file"} <= indicators
+        assert "numpy" not in indicators
+
+    def test_analyze_prompt_non_ascii_case_folding(self):
+        """Test non-ASCII letters do not case-fold onto indicator terms."""
+        generator = PatternAwareGenerator([], use_llm=False)
+
+        assert "json" not in generator._analyze_prompt("ſerialize this")
+        assert "file" not in generator._analyze_prompt("read a FİLE")
+        assert generator.generate("ſerialize this").code
+        assert generator.generate("read a FİLE").code
 
     def test_match_patterns(self):
         """Test pattern matching based on context."""
@@ -608,13 +642,49 @@ class TestPatternAwareGenerator:
         ]
         generator = PatternAwareGenerator(patterns)
 
-        context_indicators = {"numpy": True, "json": True}
+        context_indicators = frozenset({"numpy", "json"})
         matched = generator._match_patterns(context_indicators, None)
 
         assert len(matched) == 1
         assert matched[0]["pattern"]["name"] == "numpy_json_serialization"
+        assert matched[0]["name"] == "numpy_json_serialization"
+        assert matched[0]["description"] == "Test"
         assert matched[0]["confidence"] > 0
 
+    def test_match_patterns_metrics_boosts(self):
+        """Test critical boost takes precedence over high-frequency boost."""
+        patterns = [
+            {"name": "numpy_json_serialization", "severity": "high"},
+            {"name": "bounds_checking", "severity": "high"},
+            {"name": "logger_debug", "severity": "low"},
+        ]
+        generator = PatternAwareGenerator(patterns)
+        metrics_context = {
+            "critical_patterns": ["numpy_json_serialization"],
+            "high_frequency_patterns": ["numpy_json_serialization", "bounds_checking"],
+        }
+
+        matched = generator._match_patterns(frozenset({"numpy"}), metrics_context)
+        confidences = {m["name"]: m["confidence"] for m in matched}
+
+        assert confidences["numpy_json_serialization"] == pytest.approx(0.8)
+        assert confidences["bounds_checking"] == pytest.approx(0.2)
+        assert "logger_debug" not in confidences
+
+    def test_score_matches_confidence(self):
+        """Test the fused scoring pass agrees with _calculate_confidence."""
+        patterns = [
+            {"name": "numpy_json_serialization", "severity": "high"},
+            {"name": "bounds_checking", "severity": "high"},
+            {"name": "large_file_processing", "severity": "medium"},
+            {"name": "logger_debug", "severity": "low"},
+        ]
+        generator = PatternAwareGenerator(patterns)
+
+        for indicators in (frozenset(), frozenset({"numpy", "list_access", "file"})):
+            matched, confidence = generator._score_matches(indicators, None)
+            assert confidence == generator._calculate_confidence(matched)
+
     def test_prioritize_patterns_by_severity(self):
         """Test pattern prioritization by severity."""
         patterns = [
@@ -624,15 +694,16 @@ class TestPatternAwareGenerator:
         generator = PatternAwareGenerator(patterns)
 
         matched = [
-            {"pattern": patterns[0], "confidence": 0.9, "severity": "critical"},
-            {"pattern": patterns[1], "confidence": 0.9, "severity": "low"},
+            {"name": "pattern1", "pattern": patterns[0], "confidence": 0.9, "severity": "critical"},
+            {"name": "pattern2", "pattern": patterns[1], "confidence": 0.9, "severity": "low"},
         ]
 
-        to_apply, to_suggest = generator._prioritize_patterns(matched, True, 0.8)
+        to_apply, to_suggest, applied_names = generator._prioritize_patterns(matched, True, 0.8)
 
         assert len(to_apply) == 1  # Only critical applied
         assert to_apply[0]["pattern"]["name"] == "pattern1"
         assert len(to_suggest) == 1
+        assert applied_names == frozenset({"pattern1"})
 
     def test_generate_code(self):
         """Test code generation."""
@@ -658,12 +729,175 @@ class TestPatternAwareGenerator:
         assert result.report is not None
         assert 0 <= result.confidence <= 1
 
+    def test_generation_result_lazy_fields(self):
+        """Test metadata and report are built once, on first access."""
+        calls = []
+
+        def build_metadata():
+            calls.append("metadata")
+            return {"prompt": "p"}
+
+        result = GenerationResult(
+            code="x = 1",
+            patterns_applied=[],
+            patterns_suggested=[],
+            report="explicit",
+            metadata_factory=build_metadata,
+        )
+
+        assert calls == []
+        assert result.report == "explicit"
+        result.metadata["strategy"] = "s"
+        assert result.metadata == {"prompt": "p", "strategy": "s"}
+        assert calls == ["metadata"]
+
+        # Still a dataclass: fields, asdict and == see the built values
+        assert [f.name for f in dataclasses.fields(result)][3:5] == ["metadata", "report"]
+        assert dataclasses.asdict(result)["metadata"] == {"prompt": "p", "strategy": "s"}
+        assert result == GenerationResult(
+            "x = 1", [], [], {"prompt": "p", "strategy": "s"}, "explicit", 0.0
+        )
+        assert "report='explicit'" in repr(result)
+
+    def test_enriched_prompt_stable_prefix(self):
+        """Test the enriched prompt leads with cacheable segments and ends with the task."""
+        patterns = [
+            {
+                "name": "numpy_json_serialization",
+                "severity": "high",
+                "description": "Convert NumPy types",
+            }
+        ]
+        generator = PatternAwareGenerator(patterns, use_llm=False)
+        matched = generator._match_patterns(frozenset({"numpy", "json"}), None)
+
+        first = generator._build_prompt_segments("Prompt one", matched, [])
+        second = generator._build_prompt_segments("Prompt two", matched, [])
+
+        assert first[0] == second[0]
+        assert "### Pattern: numpy_json_serialization" in first[0]
+        assert first[-1] == "## Task\nPrompt one\n"
+        assert generator._build_enriched_prompt("Prompt one", matched, []) == "".join(first)
+        assert generator._build_prompt_segments("Prompt one", matched, []) == first
+        assert len(generator._prompt_cache) == 2
+
+    def test_semantic_cache_reuses_llm_code(self):
+        """Test paraphrased prompts with the same patterns skip the LLM call."""
+        generator = PatternAwareGenerator([], use_llm=False, semantic_cache_threshold=0.8)
+        generator.llm_manager = Mock()
+        generator.llm_manager.stream.side_effect = lambda *args, **kwargs: iter(
+            ["```python\nx = 1\n```"]
+        )
+        applied = frozenset({"logger_debug"})
+
+        first = generator._generate_code_with_llm(
+            "parse the config file and validate every field", [], [], applied
+        )
+        second = generator._generate_code_with_llm(
+            "parse the config file and validate every single field", [], [], applied
+        )
+        generator._generate_code_with_llm("parse the config file", [], [], frozenset())
+
+        assert first == second == "x = 1"
+        assert generator.llm_manager.stream.call_count == 2
+
+    def test_extract_code_from_stream(self):
+        """Test streamed extraction matches full-response extraction."""
+        generator = PatternAwareGenerator([], use_llm=False)
+        responses = [
+            "Here:\n```python\nx = 1\n```\ntrailing text",
+            "```\nplain = True\n```\nthen\n```python\ny = 2\n```",
+            "```\nunterminated",
+            "no fences at all",
+        ]
+
+        for response in responses:
+            for size in (1, 3, len(response)):
+                chunks = [response[i : i + size] for i in range(0, len(response), size)]
+                assert generator._extract_code_from_stream(
+                    iter(chunks)
+                ) == generator._extract_code_from_response(response)
+
+    def test_extract_code_from_stream_stops_at_closing_fence(self):
+        """Test the stream is closed once the python block is complete."""
+        generator = PatternAwareGenerator([], use_llm=False)
+        consumed = []
+
+        def chunks():
+            for chunk in ["```python\n", "x = 1\n", "```\nThat is the code.", "never read"]:
+                consumed.append(chunk)
+                yield chunk
+
+        assert generator._extract_code_from_stream(chunks()) == "x = 1"
+        assert "never read" not in consumed
+
+    def test_scoring_cache_dir_round_trip(self, tmp_path, monkeypatch):
+        """Test rule arrays are written once and reloaded by later generators."""
+        patterns = [
+            {"name": "numpy_json_serialization", "severity": "high"},
+            {"name": "bounds_checking", "severity": "medium"},
+        ]
+        first = PatternAwareGenerator(patterns, use_llm=False, scoring_cache_dir=str(tmp_path))
+        assert len(list(tmp_path.glob("patterns-1.0.0-*.npz"))) == 1
+
+        def fail(*args, **kwargs):
+            raise AssertionError("rule arrays should come from the cache")
+
+        monkeypatch.setattr(PatternAwareGenerator, "_compute_rule_arrays", fail)
+        second = PatternAwareGenerator(patterns, use_llm=False, scoring_cache_dir=str(tmp_path))
+
+        assert np.array_equal(first._rule_masks, second._rule_masks)
+        assert np.array_equal(first._rule_counts, second._rule_counts)
+
+    def test_main_code_template_dispatch(self):
+        """Test template-mode bodies are chosen from the prompt's terms."""
+        generator = PatternAwareGenerator([], use_llm=False)
+
+        def main_code(prompt):
+            return "\n".join(generator._generate_main_code(prompt, frozenset()))
+
+        assert "def process_numpy_data" in main_code("Serialize a NumPy array to JSON")
+        assert "def get_first_item" in main_code("Return the first element")
+        assert "def process_file" in main_code("Read a FILE from disk")
+        assert "def process_data" in main_code("Add two numbers")
+
+    def test_generate_batch(self):
+        """Test batch generation preserves prompt order."""
+        patterns = [
+            {
+                "name": "numpy_json_serialization",
+                "severity": "high",
+                "description": "Convert NumPy types",
+            }
+        ]
+        generator = PatternAwareGenerator(patterns, use_llm=False)
+        prompts = ["Process NumPy array and return JSON", "Get first item from list"]
+
+        results = generator.generate_batch(prompts, min_confidence=0.5)
+
+        assert len(results) == 2
+        assert [r.metadata["prompt"] for r in results] == prompts
+        assert results[0].code == generator.generate(prompts[0], min_confidence=0.5).code
+        dedicated = generator.generate_batch(prompts, max_workers=2, min_confidence=0.5)
+        assert [r.code for r in dedicated] == [r.code for r in results]
+        assert generator.generate_batch([]) == []
+
+    @pytest.mark.asyncio
+    async def test_agenerate_many(self):
+        """Test async batch generation preserves prompt order."""
+        generator = PatternAwareGenerator([], use_llm=False)
+        prompts = ["Process NumPy array and return JSON", "Get first item from list"]
+
+        results = await generator.agenerate_many(prompts, max_concurrency=1)
+
+        assert [r.metadata["prompt"] for r in results] == prompts
+
     def test_generate_imports_numpy(self):
         """Test import generation for NumPy pattern."""
         patterns = [{"name": "numpy_json_serialization"}]
         generator = PatternAwareGenerator(patterns)
 
-        matched = [{"pattern": patterns[0]}]
+        matched = [{"name": "numpy_json_serialization", "pattern": patterns[0]}]
         imports = generator._generate_imports(matched)
 
         assert "import json" in imports